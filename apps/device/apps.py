@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class DeviceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'device'
+
+    def ready(self):
+        # 注册本应用的搜索索引, 保存/删除数据时自动维护
+        from device.search_indexes import device_search_index
+        device_search_index.connect_signals()
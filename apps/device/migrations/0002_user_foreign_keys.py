@@ -0,0 +1,26 @@
+# Generated by Django 3.2.18 on 2026-10-19 04:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('device', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='device',
+            name='creator_user',
+            field=models.ForeignKey(blank=True, editable=False, help_text='创建人(用户)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='创建人(用户)'),
+        ),
+        migrations.AddField(
+            model_name='device',
+            name='modifier_user',
+            field=models.ForeignKey(blank=True, editable=False, help_text='最后修改人(用户)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='最后修改人(用户)'),
+        ),
+    ]
@@ -0,0 +1,6 @@
+from device.models import Device
+from utils.django_utils.search_index import SearchIndex
+
+device_search_index = SearchIndex(Device, {'host': 2, 'username': 1},
+                                  result_fields=('id', 'host', 'port', 'username', 'device_type', 'device_status'),
+                                  route_name='device-list')
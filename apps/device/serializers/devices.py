@@ -1,10 +1,8 @@
 from rest_framework import serializers
-from drf_spectacular.utils import extend_schema_field
-from drf_spectacular.types import OpenApiTypes
 
-from system.models import User
 from device.models import Device
 from utils.drf_utils.base_model_serializer import BaseModelSerializer
+from utils.drf_utils.user_name_resolver import UserNameField
 from utils.base.secret import Secret
 from sugar.settings import env
 
@@ -38,21 +36,13 @@ class DeviceCreateUpdateSerializer(BaseModelSerializer):
 
 
 class DeviceRetrieveSerializer(BaseModelSerializer):
-    creator_name = serializers.SerializerMethodField(help_text='创建人姓名')
-    modifier_name = serializers.SerializerMethodField(help_text='最后修改人姓名')
+    creator_name = UserNameField(source='creator', help_text='创建人姓名')
+    modifier_name = UserNameField(source='modifier', help_text='最后修改人姓名')
 
     class Meta:
         model = Device
         fields = '__all__'
 
-    @extend_schema_field(OpenApiTypes.STR)
-    def get_creator_name(self, obj: Device):
-        return User.objects.filter(username=obj.creator).first().name
-
-    @extend_schema_field(OpenApiTypes.STR)
-    def get_modifier_name(self, obj: Device):
-        return User.objects.filter(username=obj.modifier).first().name
-
 
 class DeviceAliveLogTaskResultSerializer(serializers.Serializer):
     result = serializers.BooleanField(help_text='任务运行结果')
@@ -10,6 +10,8 @@ from django_filters import rest_framework as filters
 from django_celery_beat.models import PeriodicTask, IntervalSchedule
 
 from utils.drf_utils.custom_json_response import JsonResponse, unite_response_format_schema
+from utils.drf_utils.conditional_get import ConditionalGetMixin
+from utils.drf_utils.values_serializer import ValuesListModelMixin
 from device.serializers.devices import DeviceCreateUpdateSerializer, DeviceRetrieveSerializer, \
     GetDeviceAliveLogSerializer, CreateCollectDevicePerfDataTaskSerializer
 from device.models import Device
@@ -32,9 +34,13 @@ class DeviceFilter(filters.FilterSet):
 
 
 @extend_schema(tags=['设备管理'])
-class DeviceViewSet(ModelViewSet):
+class DeviceViewSet(ConditionalGetMixin, ValuesListModelMixin, ModelViewSet):
     queryset = Device.objects.all().order_by('-id')
     filterset_class = DeviceFilter
+    # 列表接口使用values()快速序列化
+    values_serializer_actions = ['list']
+    # 创建人/修改人姓名变化不会修改设备的update_time
+    conditional_get_versions = ['system.user']
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
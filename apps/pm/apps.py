@@ -1,6 +1,21 @@
 from django.apps import AppConfig
+from django.db.models.signals import m2m_changed, post_delete
 
 
 class PmConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pm'
+
+    def ready(self):
+        # 注册本应用的搜索索引及计数字段, 保存/删除数据时自动维护
+        from pm.counter_caches import child_counter, comment_counter, file_counter
+        from pm.search_indexes import project_search_index, sprint_search_index, work_item_search_index
+        for declaration in (project_search_index, sprint_search_index, work_item_search_index,
+                            comment_counter, file_counter, child_counter):
+            declaration.connect_signals()
+        # 关注人的增删、删除迭代(外键被置为NULL)不会修改工作项的update_time, 使工作项接口的ETag失效
+        from pm.models import Sprint, WorkItem
+        from utils.drf_utils.conditional_get import bump_data_version_on_changed, touch_update_time_on_m2m_changed
+        m2m_changed.connect(touch_update_time_on_m2m_changed, sender=WorkItem.followers.through,
+                            dispatch_uid='touch_work_item_on_followers_changed')
+        post_delete.connect(bump_data_version_on_changed, sender=Sprint, dispatch_uid='bump_sprint_data_version')
@@ -0,0 +1,202 @@
+import datetime
+import logging
+import threading
+import time
+
+from celery import bootsteps
+from django.db import close_old_connections, transaction
+from kombu import Consumer, Exchange, Queue
+
+from sugar.settings import TASK_CHANGELOG_WRITE_BEHIND, TASK_CHANGELOG_BATCH_SIZE, TASK_CHANGELOG_BATCH_INTERVAL_MS
+
+logger = logging.getLogger('my_debug_logger')
+
+# 变更记录专用队列, 消息由ChangelogConsumerStep批量消费, 不作为Celery任务处理
+CHANGELOG_EXCHANGE = Exchange('changelog_exchange', type='direct', durable=True)
+CHANGELOG_QUEUE = Queue('changelog_queue', exchange=CHANGELOG_EXCHANGE, routing_key='changelog', durable=True)
+# broker不可用后, 在该时间(秒)内直接同步写入, 避免每个请求都等待连接超时
+BROKER_UNAVAILABLE_BACKOFF = 30
+_broker_unavailable_until = 0
+
+
+def build_changelog_event(work_item_id: int, changelog: list, creator: str):
+    """
+    构造一条变更记录事件, timestamp用于保证同一工作项的变更记录按发生顺序写入
+    """
+    return {'work_item_id': work_item_id, 'changelog': changelog, 'creator': creator, 'timestamp': time.time()}
+
+
+def get_status_change(changelog: list):
+    """
+    从一条变更记录内容中取出工作项状态的变化, 变更记录中保存的是状态名称, 转换为状态值
+    @return: (修改前的状态, 修改后的状态), 没有修改状态或状态名称无法识别时返回None
+    """
+    from pm.models import WorkItem
+    status_values = {label: value for value, label in WorkItem.WORK_ITEM_STATUS_CHOICES}
+    for diff in changelog or []:
+        if isinstance(diff, dict) and diff.get('key') == 'work_item_status':
+            origin, current = status_values.get(diff.get('origin')), status_values.get(diff.get('current'))
+            return (origin, current) if origin is not None and current is not None else None
+    return None
+
+
+def build_status_transitions(transition_model, changelogs):
+    """
+    从变更记录中派生工作项状态变化事件, 修改时间与变更记录的创建时间一致(回填时可据此去重)
+    @param transition_model: WorkItemStatusTransition模型类(数据迁移中为历史模型类)
+    @param changelogs: [(工作项ID, 变更记录创建时间, 创建人, 变更记录内容)]
+    """
+    transitions = []
+    for work_item_id, create_time, creator, changelog in changelogs:
+        status_change = get_status_change(changelog) if work_item_id is not None else None
+        if status_change is not None:
+            transitions.append(transition_model(work_item_id=work_item_id, from_status=status_change[0],
+                                                to_status=status_change[1], transition_time=create_time,
+                                                actor=creator))
+    return transitions
+
+
+def backfill_status_transitions(changelog_model, transition_model, chunk_size: int = TASK_CHANGELOG_BATCH_SIZE):
+    """
+    按主键顺序分批从已有的变更记录回填工作项状态变化事件, 每批在单独的事务中提交, 已存在的数据忽略
+    @return: 处理的变更记录条数
+    """
+    last_pk = 0
+    changelog_count = 0
+    while True:
+        rows = list(changelog_model._default_manager.filter(pk__gt=last_pk).order_by('pk').values_list(
+            'pk', 'work_item_id', 'create_time', 'creator', 'changelog')[:chunk_size])
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        changelog_count += len(rows)
+        transition_model._default_manager.bulk_create(
+            build_status_transitions(transition_model, [row[1:] for row in rows]), ignore_conflicts=True)
+    return changelog_count
+
+
+def write_changelogs(events: list, check_work_items: bool = False):
+    """
+    一次bulk_create写入变更记录, 同时写入其中的工作项状态变化事件
+    @param events: build_changelog_event()构造的事件列表
+    @param check_work_items: 异步写入时工作项可能已被删除, 与外键on_delete=SET_NULL的行为保持一致
+    """
+    from pm.models import WorkItem, Changelog, WorkItemStatusTransition
+    events = sorted(events, key=lambda event: event.get('timestamp'))
+    if check_work_items:
+        work_item_ids = {event.get('work_item_id') for event in events}
+        existing_ids = set(WorkItem.objects.filter(id__in=work_item_ids).values_list('id', flat=True))
+        for event in events:
+            if event.get('work_item_id') not in existing_ids:
+                event['work_item_id'] = None
+    changelogs = []
+    for event in events:
+        changelog = Changelog(changelog=event.get('changelog'), work_item_id=event.get('work_item_id'),
+                              creator=event.get('creator'))
+        # 变更记录的时间为变更发生的时间, 不受队列延迟影响(状态变化事件、迭代快照回放均依赖该时间)
+        if event.get('timestamp') is not None:
+            changelog.create_time = datetime.datetime.fromtimestamp(event.get('timestamp'))
+        changelogs.append(changelog)
+    Changelog.bulk_sync_user_foreign_keys(changelogs)
+    with transaction.atomic():
+        changelogs = Changelog.objects.bulk_create(changelogs, batch_size=TASK_CHANGELOG_BATCH_SIZE)
+        WorkItemStatusTransition.objects.bulk_create(build_status_transitions(WorkItemStatusTransition, [
+            (changelog.work_item_id, changelog.create_time, changelog.creator, changelog.changelog)
+            for changelog in changelogs]), batch_size=TASK_CHANGELOG_BATCH_SIZE, ignore_conflicts=True)
+    return changelogs
+
+
+def publish_changelogs(events: list):
+    """
+    把一个请求产生的变更记录作为一条消息发送到变更记录队列, broker不可用时同步写入
+    """
+    global _broker_unavailable_until
+    if time.monotonic() < _broker_unavailable_until:
+        write_changelogs(events, check_work_items=True)
+        return
+    from sugar.celery import app
+    try:
+        with app.producer_or_acquire() as producer:
+            producer.publish(events, exchange=CHANGELOG_EXCHANGE, routing_key=CHANGELOG_QUEUE.routing_key,
+                             declare=[CHANGELOG_QUEUE], serializer='json', delivery_mode='persistent', retry=False)
+    except Exception as e:
+        logger.warning(f'发送变更记录到队列失败, 改为同步写入: {e}')
+        _broker_unavailable_until = time.monotonic() + BROKER_UNAVAILABLE_BACKOFF
+        write_changelogs(events, check_work_items=True)
+
+
+def emit_changelogs(events: list):
+    """
+    写入变更记录
+    1.未开启TASK_CHANGELOG_WRITE_BEHIND时, 在当前事务中同步写入
+    2.开启后, 在当前事务提交后发送到变更记录队列, 由启动了--changelog-consumer的worker批量写入
+    """
+    if not events:
+        return
+    if not TASK_CHANGELOG_WRITE_BEHIND:
+        write_changelogs(events)
+        return
+    transaction.on_commit(lambda: publish_changelogs(events))
+
+
+class ChangelogConsumerStep(bootsteps.ConsumerStep):
+    """
+    批量消费变更记录队列: 每TASK_CHANGELOG_BATCH_INTERVAL_MS毫秒或累计TASK_CHANGELOG_BATCH_SIZE条变更记录时写入一次
+    写入成功后才ack消息, 写入失败时消息重新入队
+    只在启动worker时指定了--changelog-consumer时启用, 为保证同一工作项的顺序, 只启动一个这样的worker
+    e.g. celery -A sugar worker -l info --changelog-consumer
+    """
+
+    def __init__(self, parent, changelog_consumer=False, **kwargs):
+        self.enabled = changelog_consumer
+        self.messages = []
+        self.event_count = 0
+        self.flush_timer = None
+        # solo/threads模式下定时器运行在单独的线程中
+        self.lock = threading.Lock()
+        super().__init__(parent, **kwargs)
+
+    def get_consumers(self, channel):
+        # 预取数量需大于批量写入的条数, 否则攒不满一批
+        return [Consumer(channel, queues=[CHANGELOG_QUEUE], callbacks=[self.on_message], accept=['json'],
+                         prefetch_count=TASK_CHANGELOG_BATCH_SIZE * 2)]
+
+    def start(self, c):
+        super().start(c)
+        self.flush_timer = c.timer.call_repeatedly(TASK_CHANGELOG_BATCH_INTERVAL_MS / 1000, self.flush)
+
+    def stop(self, c):
+        if self.flush_timer is not None:
+            self.flush_timer.cancel()
+            self.flush_timer = None
+        self.flush()
+        super().stop(c)
+
+    def shutdown(self, c):
+        self.stop(c)
+
+    def on_message(self, body, message):
+        with self.lock:
+            self.messages.append(message)
+            self.event_count += len(body)
+            is_full = self.event_count >= TASK_CHANGELOG_BATCH_SIZE
+        if is_full:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            messages, self.messages, self.event_count = self.messages, [], 0
+            if not messages:
+                return
+            try:
+                close_old_connections()
+                events = [event for message in messages for event in message.payload]
+                write_changelogs(events, check_work_items=True)
+            except Exception as e:
+                logger.error(f'批量写入变更记录失败, 消息重新入队: {e}')
+                for message in messages:
+                    message.requeue()
+                return
+            for message in messages:
+                message.ack()
+            logger.debug(f'批量写入{len(messages)}条消息中的变更记录')
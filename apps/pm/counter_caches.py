@@ -0,0 +1,6 @@
+from pm.models import Comment, UserFile, WorkItem
+from utils.django_utils.counter_cache import CounterCache
+
+comment_counter = CounterCache(Comment, 'work_item', 'comment_count')
+file_counter = CounterCache(UserFile, 'work_item', 'file_count')
+child_counter = CounterCache(WorkItem, 'parent', 'child_count')
@@ -0,0 +1,32 @@
+from django.db import migrations
+
+from utils.django_utils.user_foreign_keys import backfill_user_foreign_keys
+
+# {模型名: {用户名字段: 用户外键字段}}
+USER_FOREIGN_KEY_FIELDS = {
+    'Project': {'creator': 'creator_user', 'modifier': 'modifier_user', 'owner': 'owner_user'},
+    'Sprint': {'creator': 'creator_user', 'modifier': 'modifier_user', 'owner': 'owner_user'},
+    'WorkItem': {'creator': 'creator_user', 'modifier': 'modifier_user', 'owner': 'owner_user'},
+    'UserFile': {'creator': 'creator_user', 'modifier': 'modifier_user'},
+    'Comment': {'creator': 'creator_user', 'modifier': 'modifier_user'},
+    'Changelog': {'creator': 'creator_user', 'modifier': 'modifier_user'},
+}
+
+
+def forwards(apps, schema_editor):
+    user_model = apps.get_model('system', 'User')
+    for model_name, field_mapping in USER_FOREIGN_KEY_FIELDS.items():
+        backfill_user_foreign_keys(apps.get_model('pm', model_name), user_model, field_mapping)
+
+
+class Migration(migrations.Migration):
+    # 分批提交, 回填过程中不长时间持有锁
+    atomic = False
+
+    dependencies = [
+        ('pm', '0003_user_foreign_keys'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
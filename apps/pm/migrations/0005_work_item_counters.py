@@ -0,0 +1,28 @@
+# Generated by Django 3.2.18 on 2026-10-19 04:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pm', '0004_backfill_user_foreign_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workitem',
+            name='child_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='子工作项数', verbose_name='子工作项数'),
+        ),
+        migrations.AddField(
+            model_name='workitem',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='评论数', verbose_name='评论数'),
+        ),
+        migrations.AddField(
+            model_name='workitem',
+            name='file_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='附件数', verbose_name='附件数'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+from utils.django_utils.counter_cache import reconcile_counter
+
+# (被计数的模型名, 外键字段名, 计数字段名)
+WORK_ITEM_COUNTERS = [
+    ('Comment', 'work_item', 'comment_count'),
+    ('UserFile', 'work_item', 'file_count'),
+    ('WorkItem', 'parent', 'child_count'),
+]
+
+
+def forwards(apps, schema_editor):
+    work_item_model = apps.get_model('pm', 'WorkItem')
+    for model_name, foreign_key, counter_field in WORK_ITEM_COUNTERS:
+        reconcile_counter(work_item_model, apps.get_model('pm', model_name), foreign_key, counter_field)
+
+
+class Migration(migrations.Migration):
+    # 分批提交, 回填过程中不长时间持有锁
+    atomic = False
+
+    dependencies = [
+        ('pm', '0005_work_item_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.18 on 2026-10-19 05:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pm', '0006_backfill_work_item_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workitem',
+            name='rank',
+            field=models.CharField(db_index=True, default='', editable=False, help_text='排序值', max_length=64, verbose_name='排序值'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+from utils.django_utils.lexorank import spread_ranks
+
+CHUNK_SIZE = 1000
+
+
+def forwards(apps, schema_editor):
+    # 按创建顺序生成等间距的排序值, 之后新增的工作项依次排在最后
+    work_item_model = apps.get_model('pm', 'WorkItem')
+    ids = list(work_item_model.objects.order_by('id').values_list('id', flat=True))
+    ranks = spread_ranks(len(ids))
+    for start in range(0, len(ids), CHUNK_SIZE):
+        work_item_model.objects.bulk_update(
+            [work_item_model(id=pk, rank=rank) for pk, rank in
+             zip(ids[start:start + CHUNK_SIZE], ranks[start:start + CHUNK_SIZE])], ['rank'])
+
+
+class Migration(migrations.Migration):
+    # 分批提交, 回填过程中不长时间持有锁
+    atomic = False
+
+    dependencies = [
+        ('pm', '0007_work_item_rank'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
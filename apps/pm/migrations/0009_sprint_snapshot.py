@@ -0,0 +1,36 @@
+# Generated by Django 3.2.18 on 2026-10-19 05:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pm', '0008_backfill_work_item_ranks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SprintSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snapshot_date', models.DateField(help_text='快照日期', verbose_name='快照日期')),
+                ('total', models.PositiveIntegerField(default=0, help_text='工作项总数', verbose_name='工作项总数')),
+                ('remaining', models.PositiveIntegerField(default=0, help_text='未完成的工作项数', verbose_name='未完成的工作项数')),
+                ('status_counts', models.JSONField(default=dict, help_text='各状态的工作项数量 {状态: 数量}, 不包含数量为0的状态', verbose_name='各状态的工作项数量')),
+                ('type_counts', models.JSONField(default=dict, help_text='各类型的工作项数量 {工作项类型: 数量}, 不包含数量为0的类型', verbose_name='各类型的工作项数量')),
+                ('update_time', models.DateTimeField(auto_now=True, help_text='更新时间', verbose_name='更新时间')),
+                ('sprint', models.ForeignKey(help_text='所属迭代', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='pm.sprint', verbose_name='所属迭代')),
+            ],
+            options={
+                'verbose_name': '迭代每日快照',
+                'verbose_name_plural': '迭代每日快照',
+                'db_table': 'pm_sprint_snapshot',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='sprintsnapshot',
+            constraint=models.UniqueConstraint(fields=('sprint', 'snapshot_date'), name='sprint_snapshot_unique'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.18 on 2026-10-19 05:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pm', '0009_sprint_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkItemStatusTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.PositiveSmallIntegerField(choices=[(0, '未开始'), (1, '待处理'), (2, '重新打开'), (3, '进行中'), (4, '实现中'), (5, '已完成'), (6, '修复中'), (7, '已实现'), (8, '关闭'), (9, '已修复'), (10, '已验证'), (11, '已拒绝')], help_text='修改前的状态', verbose_name='修改前的状态')),
+                ('to_status', models.PositiveSmallIntegerField(choices=[(0, '未开始'), (1, '待处理'), (2, '重新打开'), (3, '进行中'), (4, '实现中'), (5, '已完成'), (6, '修复中'), (7, '已实现'), (8, '关闭'), (9, '已修复'), (10, '已验证'), (11, '已拒绝')], help_text='修改后的状态', verbose_name='修改后的状态')),
+                ('transition_time', models.DateTimeField(help_text='修改时间', verbose_name='修改时间')),
+                ('actor', models.CharField(help_text='修改人', max_length=150, verbose_name='修改人')),
+                ('work_item', models.ForeignKey(help_text='所属工作项', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='pm.workitem', verbose_name='所属工作项')),
+            ],
+            options={
+                'verbose_name': '工作项状态变化',
+                'verbose_name_plural': '工作项状态变化',
+                'db_table': 'pm_work_item_status_transition',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='workitemstatustransition',
+            index=models.Index(fields=['transition_time', 'to_status'], name='status_transition_time'),
+        ),
+        migrations.AddConstraint(
+            model_name='workitemstatustransition',
+            constraint=models.UniqueConstraint(fields=('work_item', 'transition_time', 'to_status'), name='work_item_status_transition_unique'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+from pm.changelog_writer import backfill_status_transitions
+
+
+def forwards(apps, schema_editor):
+    backfill_status_transitions(apps.get_model('pm', 'Changelog'), apps.get_model('pm', 'WorkItemStatusTransition'))
+
+
+class Migration(migrations.Migration):
+    # 分批提交, 回填过程中不长时间持有锁
+    atomic = False
+
+    dependencies = [
+        ('pm', '0010_work_item_status_transition'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
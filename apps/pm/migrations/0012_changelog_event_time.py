@@ -0,0 +1,19 @@
+# Generated by Django 3.2.18 on 2026-10-19 05:21
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pm', '0011_backfill_status_transitions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='changelog',
+            name='create_time',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='创建时间', verbose_name='创建时间'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from utils.django_utils.base_model import BaseModel
 from system.models import User
 
@@ -7,10 +8,13 @@ class Project(BaseModel):
     """
     项目
     """
+    USER_FOREIGN_KEY_FIELDS = {**BaseModel.USER_FOREIGN_KEY_FIELDS, 'owner': 'owner_user'}
     PROJECT_STATUS_CHOICES = [(0, '未开始'), (1, '进行中'), (2, '已完成')]
     name = models.CharField(max_length=64, verbose_name="项目名称", help_text='项目名称', db_index=True)
     members = models.ManyToManyField(User, blank=True, verbose_name="项目成员", help_text='项目成员')
     owner = models.CharField(max_length=150, verbose_name='负责人', help_text='负责人', db_index=True)
+    owner_user = models.ForeignKey(User, null=True, blank=True, editable=False, on_delete=models.SET_NULL,
+                                   related_name='+', verbose_name='负责人(用户)', help_text='负责人(用户)')
     project_status = models.PositiveSmallIntegerField(choices=PROJECT_STATUS_CHOICES, default=0,
                                                       verbose_name='项目状态', help_text='项目状态', db_index=True)
 
@@ -27,11 +31,14 @@ class Sprint(BaseModel):
     """
     迭代
     """
+    USER_FOREIGN_KEY_FIELDS = {**BaseModel.USER_FOREIGN_KEY_FIELDS, 'owner': 'owner_user'}
     SPRINT_STATUS_CHOICES = [(0, '未开始'), (1, '进行中'), (2, '已完成')]
     name = models.CharField(max_length=64, verbose_name="迭代名称", help_text='迭代名称', db_index=True)
     project = models.ForeignKey(Project, null=True, blank=True, on_delete=models.SET_NULL, verbose_name="所属项目",
                                 help_text='所属项目')
     owner = models.CharField(max_length=150, verbose_name='负责人', help_text='负责人', db_index=True)
+    owner_user = models.ForeignKey(User, null=True, blank=True, editable=False, on_delete=models.SET_NULL,
+                                   related_name='+', verbose_name='负责人(用户)', help_text='负责人(用户)')
     start_time = models.DateTimeField(null=True, blank=True, verbose_name="开始时间", help_text='开始时间')
     finish_time = models.DateTimeField(null=True, blank=True, verbose_name="完成时间", help_text='完成时间')
     sprint_status = models.PositiveSmallIntegerField(choices=SPRINT_STATUS_CHOICES, default=0, verbose_name='迭代状态',
@@ -50,6 +57,7 @@ class WorkItem(BaseModel):
     """
     工作项
     """
+    USER_FOREIGN_KEY_FIELDS = {**BaseModel.USER_FOREIGN_KEY_FIELDS, 'owner': 'owner_user'}
     WORK_ITEM_TYPE_CHOICES = [(0, '需求'), (1, '任务'), (2, '缺陷')]
     BUG_TYPE_CHOICES = [
         (0, '功能问题'), (1, '性能问题'), (2, '接口问题'), (3, '安全问题'), (4, 'UI界面问题'), (5, '易用性问题'),
@@ -65,8 +73,15 @@ class WorkItem(BaseModel):
         (0, '未开始'), (1, '待处理'), (2, '重新打开'), (3, '进行中'), (4, '实现中'), (5, '已完成'), (6, '修复中'),
         (7, '已实现'), (8, '关闭'), (9, '已修复'), (10, '已验证'), (11, '已拒绝')
     ]
+    # 视为已完成的状态: 已完成、已实现、关闭、已修复、已验证、已拒绝
+    DONE_STATUSES = (5, 7, 8, 9, 10, 11)
+    # 视为尚未开始处理的状态: 未开始、待处理、重新打开
+    WAITING_STATUSES = (0, 1, 2)
+    BUG_WORK_ITEM_TYPE = 2
     name = models.CharField(max_length=64, verbose_name="工作项名称", help_text='工作项名称', db_index=True)
     owner = models.CharField(max_length=150, verbose_name='负责人', help_text='负责人', db_index=True)
+    owner_user = models.ForeignKey(User, null=True, blank=True, editable=False, on_delete=models.SET_NULL,
+                                   related_name='+', verbose_name='负责人(用户)', help_text='负责人(用户)')
     work_item_type = models.PositiveSmallIntegerField(choices=WORK_ITEM_TYPE_CHOICES, verbose_name='工作项类型',
                                                       help_text='工作项类型', db_index=True)
     priority = models.PositiveSmallIntegerField(choices=PRIORITY_CHOICES, verbose_name='优先级', help_text='优先级',
@@ -86,6 +101,14 @@ class WorkItem(BaseModel):
     followers = models.ManyToManyField(User, blank=True, verbose_name="关注人", help_text='关注人')
     parent = models.ForeignKey("self", null=True, blank=True, on_delete=models.SET_NULL, verbose_name="父工作项",
                                help_text='父工作项')
+    # 反规范化的计数字段, 由pm.counter_caches维护
+    comment_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='评论数', help_text='评论数')
+    file_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='附件数', help_text='附件数')
+    child_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='子工作项数',
+                                              help_text='子工作项数')
+    # 拖拽排序的字典序排序值, 由pm.work_item_rank维护, 移动工作项时只修改被移动的一条数据
+    rank = models.CharField(max_length=64, default='', editable=False, db_index=True, verbose_name='排序值',
+                            help_text='排序值')
 
     class Meta:
         db_table = 'pm_work_item'
@@ -142,6 +165,9 @@ class Changelog(BaseModel):
     """
     工作项变更记录
     """
+    # 异步批量写入时使用变更发生时的时间(事件的timestamp)而不是写入时的时间, 因此不使用auto_now_add
+    create_time = models.DateTimeField(default=timezone.now, editable=False, verbose_name='创建时间',
+                                       help_text='创建时间')
     changelog = models.JSONField(verbose_name='变更记录内容', help_text='变更记录内容')
     work_item = models.ForeignKey(WorkItem, null=True, blank=True, on_delete=models.SET_NULL, verbose_name="所属工作项",
                                   help_text='所属工作项')
@@ -153,3 +179,63 @@ class Changelog(BaseModel):
 
     def __str__(self):
         return self.changelog[:10]
+
+
+class SprintSnapshot(models.Model):
+    """
+    迭代每日快照: 每个迭代每天一行, 记录当天结束时各状态/类型的工作项数量, 供燃尽图、累积流图使用
+    由pm.sprint_snapshot写入(定时任务及从变更记录回填), 同一迭代同一天重复写入时覆盖
+    """
+    sprint = models.ForeignKey(Sprint, on_delete=models.CASCADE, related_name='+',
+                               verbose_name='所属迭代', help_text='所属迭代')
+    snapshot_date = models.DateField(verbose_name='快照日期', help_text='快照日期')
+    total = models.PositiveIntegerField(default=0, verbose_name='工作项总数', help_text='工作项总数')
+    remaining = models.PositiveIntegerField(default=0, verbose_name='未完成的工作项数', help_text='未完成的工作项数')
+    status_counts = models.JSONField(default=dict, verbose_name='各状态的工作项数量',
+                                     help_text='各状态的工作项数量 {状态: 数量}, 不包含数量为0的状态')
+    type_counts = models.JSONField(default=dict, verbose_name='各类型的工作项数量',
+                                   help_text='各类型的工作项数量 {工作项类型: 数量}, 不包含数量为0的类型')
+    update_time = models.DateTimeField(auto_now=True, verbose_name='更新时间', help_text='更新时间')
+
+    class Meta:
+        db_table = 'pm_sprint_snapshot'
+        verbose_name = '迭代每日快照'
+        verbose_name_plural = verbose_name
+        constraints = [
+            models.UniqueConstraint(fields=['sprint', 'snapshot_date'], name='sprint_snapshot_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.sprint_id}: {self.snapshot_date}'
+
+
+class WorkItemStatusTransition(models.Model):
+    """
+    工作项状态变化事件: 由变更记录中的状态修改派生(写入变更记录时同时写入, 历史数据从变更记录回填), 供周期时间统计使用
+    transition_time与对应变更记录的create_time一致, 同一工作项同一时间只有一次状态变化, 重复回填时忽略已存在的数据
+    """
+    work_item = models.ForeignKey(WorkItem, on_delete=models.CASCADE, related_name='+', verbose_name='所属工作项',
+                                  help_text='所属工作项')
+    from_status = models.PositiveSmallIntegerField(choices=WorkItem.WORK_ITEM_STATUS_CHOICES, verbose_name='修改前的状态',
+                                                   help_text='修改前的状态')
+    to_status = models.PositiveSmallIntegerField(choices=WorkItem.WORK_ITEM_STATUS_CHOICES, verbose_name='修改后的状态',
+                                                 help_text='修改后的状态')
+    transition_time = models.DateTimeField(verbose_name='修改时间', help_text='修改时间')
+    actor = models.CharField(max_length=150, verbose_name='修改人', help_text='修改人')
+
+    class Meta:
+        db_table = 'pm_work_item_status_transition'
+        verbose_name = '工作项状态变化'
+        verbose_name_plural = verbose_name
+        constraints = [
+            # 按工作项查询状态变化的时间线
+            models.UniqueConstraint(fields=['work_item', 'transition_time', 'to_status'],
+                                    name='work_item_status_transition_unique'),
+        ]
+        indexes = [
+            # 按时间范围统计
+            models.Index(fields=['transition_time', 'to_status'], name='status_transition_time'),
+        ]
+
+    def __str__(self):
+        return f'{self.work_item_id}: {self.from_status} -> {self.to_status}'
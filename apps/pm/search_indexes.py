@@ -0,0 +1,33 @@
+from django.db.models import Q
+
+from pm.models import Project, Sprint, WorkItem
+from utils.django_utils.search_index import SearchIndex
+
+
+def get_member_projects(user):
+    """
+    用户是项目成员的项目
+    """
+    return Project.objects.filter(members=user)
+
+
+def get_member_sprints(user):
+    return Sprint.objects.filter(project__members=user)
+
+
+def get_member_work_items(user):
+    """
+    用户是项目成员的项目中的工作项, 以及未关联迭代但用户是负责人/创建人的工作项
+    """
+    return WorkItem.objects.filter(Q(sprint__project__members=user) | Q(owner=user.username) |
+                                   Q(creator=user.username))
+
+
+project_search_index = SearchIndex(Project, {'name': 1}, result_fields=('id', 'name', 'owner', 'project_status'),
+                                   scope=get_member_projects, route_name='project-list')
+sprint_search_index = SearchIndex(Sprint, {'name': 1}, result_fields=('id', 'name', 'project', 'sprint_status'),
+                                  scope=get_member_sprints, route_name='sprint-list')
+# 工作项的标题及描述, 标题的权重更高
+work_item_search_index = SearchIndex(WorkItem, {'name': 3, 'desc': 1},
+                                     result_fields=('id', 'name', 'sprint', 'work_item_type', 'work_item_status'),
+                                     scope=get_member_work_items, route_name='work-item-list')
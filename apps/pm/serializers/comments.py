@@ -1,10 +1,8 @@
 from rest_framework import serializers
-from drf_spectacular.utils import extend_schema_field
-from drf_spectacular.types import OpenApiTypes
 
 from pm.models import Comment
-from system.models import User
 from utils.drf_utils.base_model_serializer import BaseModelSerializer
+from utils.drf_utils.user_name_resolver import UserNameField
 
 
 class CommentCreateUpdateSerializer(BaseModelSerializer):
@@ -15,12 +13,26 @@ class CommentCreateUpdateSerializer(BaseModelSerializer):
 
 
 class CommentRetrieveSerializer(BaseModelSerializer):
-    creator_name = serializers.SerializerMethodField(help_text='创建人姓名')
+    creator_name = UserNameField(source='creator', help_text='创建人姓名')
 
     class Meta:
         model = Comment
         fields = '__all__'
 
-    @extend_schema_field(OpenApiTypes.STR)
-    def get_creator_name(self, obj: Comment):
-        return User.objects.filter(username=obj.creator).first().name
+
+class CommentThreadQuerySerializer(serializers.Serializer):
+    work_item_id = serializers.IntegerField(min_value=1, help_text='所属工作项ID')
+    cursor = serializers.CharField(required=False, allow_blank=True,
+                                   help_text='游标(第一页不传, 之后传响应中next链接里的值)')
+    size = serializers.IntegerField(required=False, min_value=1, max_value=50, help_text='每页的顶层评论数')
+
+
+class CommentThreadSerializer(CommentRetrieveSerializer):
+    children = serializers.ListField(child=serializers.DictField(), help_text='回复(结构与当前评论相同, 按时间正序)')
+
+
+class CommentThreadListSerializer(serializers.Serializer):
+    count = serializers.IntegerField(help_text='顶层评论数')
+    comment_count = serializers.IntegerField(help_text='评论总数(包含回复)')
+    next = serializers.CharField(allow_null=True, help_text='下一页的链接')
+    results = CommentThreadSerializer(many=True, help_text='评论线程(按时间倒序)')
@@ -1,11 +1,12 @@
+from django.db.models import Count
 from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_field
 from drf_spectacular.types import OpenApiTypes
 
-from system.models import User
 from pm.models import Project
 from system.serializers.users import UserThinRetrieveSerializer
 from utils.drf_utils.base_model_serializer import BaseModelSerializer
+from utils.drf_utils.user_name_resolver import UserNameField
 
 
 class ProjectCreateUpdateSerializer(BaseModelSerializer):
@@ -17,17 +18,29 @@ class ProjectCreateUpdateSerializer(BaseModelSerializer):
 
 class ProjectRetrieveSerializer(BaseModelSerializer):
     members = UserThinRetrieveSerializer(many=True, read_only=True, help_text='项目成员')
-    owner_name = serializers.SerializerMethodField(help_text='负责人姓名')
+    owner_name = UserNameField(source='owner', help_text='负责人姓名')
     sprint_count = serializers.SerializerMethodField(help_text='迭代数量')
+    sparse_method_field_sources = {'sprint_count': ()}
 
     class Meta:
         model = Project
         fields = '__all__'
 
-    @extend_schema_field(OpenApiTypes.STR)
-    def get_owner_name(self, obj: Project):
-        return User.objects.filter(username=obj.owner).first().name
+    @staticmethod
+    def setup_eager_loading(queryset, field_names=None):
+        """
+        一次分组查询统计出每个项目下的迭代数量, 并预加载项目成员
+        @param field_names: 需要返回的字段(按fields/omit参数裁剪后), 为None时全部返回, 只统计/预加载需要返回的数据
+        """
+        if field_names is None or 'members' in field_names:
+            queryset = queryset.prefetch_related('members')
+        if field_names is None or 'sprint_count' in field_names:
+            queryset = queryset.annotate(sprint_count=Count('sprint', distinct=True))
+        return queryset
 
     @extend_schema_field(OpenApiTypes.INT)
     def get_sprint_count(self, obj: Project):
+        # queryset未经过setup_eager_loading处理时, 退化为单独查询
+        if hasattr(obj, 'sprint_count'):
+            return obj.sprint_count
         return obj.sprint_set.count()
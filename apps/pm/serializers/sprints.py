@@ -1,10 +1,12 @@
+from django.db.models import Count, Q
 from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_field
 from drf_spectacular.types import OpenApiTypes
 
-from pm.models import Sprint
-from system.models import User
+from pm.models import Sprint, WorkItem, SprintSnapshot
+from pm.serializers.work_items import WorkItemBoardCardSerializer
 from utils.drf_utils.base_model_serializer import BaseModelSerializer
+from utils.drf_utils.user_name_resolver import UserNameField
 
 
 class SprintCreateUpdateSerializer(BaseModelSerializer):
@@ -17,29 +19,89 @@ class SprintCreateUpdateSerializer(BaseModelSerializer):
 class SprintRetrieveSerializer(BaseModelSerializer):
     start_time = serializers.DateTimeField(format='%Y-%m-%d %H:%M:%S', read_only=True, help_text='开始时间')
     finish_time = serializers.DateTimeField(format='%Y-%m-%d %H:%M:%S', read_only=True, help_text='完成时间')
-    owner_name = serializers.SerializerMethodField(help_text='负责人姓名')
+    owner_name = UserNameField(source='owner', help_text='负责人姓名')
     project_name = serializers.CharField(source='project.name', help_text='所属项目的名称')
     project_id = serializers.IntegerField(source='project.id', help_text='所属项目的ID')
     feature_count = serializers.SerializerMethodField(help_text='需求数量')
     task_count = serializers.SerializerMethodField(help_text='任务数量')
     bug_count = serializers.SerializerMethodField(help_text='缺陷数量')
+    sparse_method_field_sources = {'feature_count': (), 'task_count': (), 'bug_count': ()}
+    # {数量字段: 工作项类型}
+    work_item_count_types = {'feature_count': 0, 'task_count': 1, 'bug_count': 2}
 
     class Meta:
         model = Sprint
         fields = '__all__'
 
-    @extend_schema_field(OpenApiTypes.STR)
-    def get_owner_name(self, obj: Sprint):
-        return User.objects.filter(username=obj.owner).first().name
+    @classmethod
+    def setup_eager_loading(cls, queryset, field_names=None):
+        """
+        一次分组查询统计出每个迭代下各类型工作项的数量, 序列化时直接读取, 避免每个迭代再查询3次
+        @param field_names: 需要返回的字段(按fields/omit参数裁剪后), 为None时全部返回, 只统计需要返回的数量
+        """
+        return queryset.select_related('project').annotate(**{
+            field_name: Count('workitem', filter=Q(workitem__work_item_type=work_item_type))
+            for field_name, work_item_type in cls.work_item_count_types.items()
+            if field_names is None or field_name in field_names})
+
+    @staticmethod
+    def get_work_item_count(obj: Sprint, field_name: str, work_item_type: int):
+        # queryset未经过setup_eager_loading处理时, 退化为单独查询
+        if hasattr(obj, field_name):
+            return getattr(obj, field_name)
+        return obj.workitem_set.filter(work_item_type=work_item_type).count()
 
     @extend_schema_field(OpenApiTypes.INT)
     def get_feature_count(self, obj: Sprint):
-        return obj.workitem_set.filter(work_item_type=0).count()
+        return self.get_work_item_count(obj, 'feature_count', 0)
 
     @extend_schema_field(OpenApiTypes.INT)
     def get_task_count(self, obj: Sprint):
-        return obj.workitem_set.filter(work_item_type=1).count()
+        return self.get_work_item_count(obj, 'task_count', 1)
 
     @extend_schema_field(OpenApiTypes.INT)
     def get_bug_count(self, obj: Sprint):
-        return obj.workitem_set.filter(work_item_type=2).count()
+        return self.get_work_item_count(obj, 'bug_count', 2)
+
+
+class SprintBoardQuerySerializer(serializers.Serializer):
+    size = serializers.IntegerField(min_value=1, max_value=50, default=20, help_text='每列返回的卡片数')
+    work_item_type = serializers.ChoiceField(choices=WorkItem.WORK_ITEM_TYPE_CHOICES, required=False,
+                                             help_text='只看该类型的工作项')
+    owner = serializers.CharField(required=False, help_text='只看该负责人的工作项')
+
+
+class SprintBoardColumnSerializer(serializers.Serializer):
+    status = serializers.IntegerField(help_text='工作项状态')
+    status_name = serializers.CharField(help_text='工作项状态名称')
+    count = serializers.IntegerField(help_text='该状态的工作项数量')
+    cards = WorkItemBoardCardSerializer(many=True, help_text='该状态的前size个工作项')
+
+
+class SprintBoardSerializer(serializers.Serializer):
+    count = serializers.IntegerField(help_text='工作项总数')
+    columns = SprintBoardColumnSerializer(many=True, help_text='看板列(每个工作项状态一列)')
+
+
+class SprintBurndownQuerySerializer(serializers.Serializer):
+    start_date = serializers.DateField(required=False, help_text='开始日期(e.g. 2023-01-01), 默认为最早的快照日期')
+    end_date = serializers.DateField(required=False, help_text='结束日期(e.g. 2023-01-31), 默认为最近的快照日期')
+
+    def validate(self, attrs):
+        if attrs.get('start_date') and attrs.get('end_date') and attrs.get('start_date') > attrs.get('end_date'):
+            raise serializers.ValidationError('开始日期不能晚于结束日期.', code=40000)
+        return attrs
+
+
+class SprintSnapshotSerializer(serializers.ModelSerializer):
+    status_counts = serializers.DictField(child=serializers.IntegerField(), help_text='各状态的工作项数量 {状态: 数量}')
+    type_counts = serializers.DictField(child=serializers.IntegerField(), help_text='各类型的工作项数量 {工作项类型: 数量}')
+
+    class Meta:
+        model = SprintSnapshot
+        fields = ('snapshot_date', 'total', 'remaining', 'status_counts', 'type_counts')
+
+
+class SprintBurndownSerializer(serializers.Serializer):
+    count = serializers.IntegerField(help_text='快照天数')
+    results = SprintSnapshotSerializer(many=True, help_text='按日期排列的每日快照')
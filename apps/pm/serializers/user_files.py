@@ -3,8 +3,8 @@ from drf_spectacular.utils import extend_schema_field
 from drf_spectacular.types import OpenApiTypes
 
 from pm.models import UserFile
-from system.models import User
 from utils.drf_utils.base_model_serializer import BaseModelSerializer
+from utils.drf_utils.user_name_resolver import UserNameField
 
 
 class UserFileCreateUpdateSerializer(BaseModelSerializer):
@@ -21,7 +21,7 @@ class UserFileCreateUpdateSerializer(BaseModelSerializer):
 
 
 class UserFileRetrieveSerializer(BaseModelSerializer):
-    creator_name = serializers.SerializerMethodField(help_text='创建人姓名')
+    creator_name = UserNameField(source='creator', help_text='创建人姓名')
     file_name = serializers.SerializerMethodField(help_text='文件名称')
     size = serializers.SerializerMethodField(help_text='文件大小')
 
@@ -29,10 +29,6 @@ class UserFileRetrieveSerializer(BaseModelSerializer):
         model = UserFile
         fields = '__all__'
 
-    @extend_schema_field(OpenApiTypes.STR)
-    def get_creator_name(self, obj: UserFile):
-        return User.objects.filter(username=obj.creator).first().name
-
     @extend_schema_field(OpenApiTypes.STR)
     def get_file_name(self, obj: UserFile):
         return obj.file.name
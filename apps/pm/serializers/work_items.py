@@ -1,10 +1,12 @@
+import datetime
+
 from rest_framework import serializers
-from drf_spectacular.utils import extend_schema_field
-from drf_spectacular.types import OpenApiTypes
 
 from pm.models import WorkItem
-from system.models import User
+from sugar.settings import BULK_OPERATION_MAX_SIZE
 from utils.drf_utils.base_model_serializer import BaseModelSerializer
+from utils.drf_utils.bulk_serializer import BulkListSerializer, PreloadedPrimaryKeyRelatedField
+from utils.drf_utils.user_name_resolver import UserNameField
 
 
 class WorkItemCreateUpdateSerializer(BaseModelSerializer):
@@ -16,13 +18,129 @@ class WorkItemCreateUpdateSerializer(BaseModelSerializer):
 
 class WorkItemRetrieveSerializer(BaseModelSerializer):
     deadline = serializers.DateTimeField(format='%Y-%m-%d %H:%M:%S', read_only=True, help_text='截止日期')
-    owner_name = serializers.SerializerMethodField(help_text='负责人姓名')
+    owner_name = UserNameField(source='owner', help_text='负责人姓名')
     sprint_name = serializers.CharField(source='sprint.name', help_text='所属迭代的名称')
 
     class Meta:
         model = WorkItem
         fields = '__all__'
 
-    @extend_schema_field(OpenApiTypes.STR)
-    def get_owner_name(self, obj: WorkItem):
-        return User.objects.filter(username=obj.owner).first().name
+
+class WorkItemBulkCreateUpdateSerializer(WorkItemCreateUpdateSerializer):
+    serializer_related_field = PreloadedPrimaryKeyRelatedField
+
+    class Meta(WorkItemCreateUpdateSerializer.Meta):
+        list_serializer_class = BulkListSerializer
+        # 批量新增时在锁中依次分配排序值(见WorkItemViewSet.bulk_create), 与已有数据不重复, MySQL中bulk_create后按排序值查询回主键
+        bulk_create_natural_key = 'rank'
+
+
+class WorkItemBulkResultSerializer(serializers.Serializer):
+    results = WorkItemRetrieveSerializer(many=True, help_text='工作项列表')
+
+
+class WorkItemBulkDestroySerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False,
+                                max_length=BULK_OPERATION_MAX_SIZE, help_text='工作项ID列表')
+
+
+class WorkItemBulkDestroyResultSerializer(serializers.Serializer):
+    deleted = serializers.IntegerField(help_text='删除的工作项数量')
+
+
+class WorkItemMoveSerializer(serializers.Serializer):
+    prev_id = serializers.IntegerField(min_value=1, required=False, allow_null=True,
+                                       help_text='移动后上方相邻的工作项ID, 为空时移动到next_id之前')
+    next_id = serializers.IntegerField(min_value=1, required=False, allow_null=True,
+                                       help_text='移动后下方相邻的工作项ID, 为空时移动到prev_id之后')
+
+    def validate(self, attrs):
+        if attrs.get('prev_id') is None and attrs.get('next_id') is None:
+            raise serializers.ValidationError('prev_id与next_id至少需要传入一个.', code=40000)
+        return attrs
+
+
+class WorkItemMoveResultSerializer(serializers.Serializer):
+    id = serializers.IntegerField(help_text='工作项ID')
+    rank = serializers.CharField(help_text='新的排序值')
+
+
+class WorkItemTreeNodeSerializer(serializers.ModelSerializer):
+    deadline = serializers.DateTimeField(format='%Y-%m-%d %H:%M:%S', read_only=True, help_text='截止日期')
+    owner_name = UserNameField(source='owner', help_text='负责人姓名')
+
+    class Meta:
+        model = WorkItem
+        fields = ('id', 'name', 'work_item_type', 'work_item_status', 'priority', 'owner', 'owner_name', 'sprint',
+                  'parent', 'deadline')
+
+
+class WorkItemTreeRollupSerializer(serializers.Serializer):
+    total = serializers.IntegerField(help_text='子树中的工作项数量(包含当前工作项)')
+    done_count = serializers.IntegerField(help_text='子树中已完成的工作项数量')
+    done_ratio = serializers.FloatField(help_text='子树的完成率')
+    open_bug_count = serializers.IntegerField(help_text='子树中未完成的缺陷数量')
+    open_priority_counts = serializers.ListField(child=serializers.IntegerField(),
+                                                 help_text='子树中各优先级未完成的工作项数量, 下标为优先级')
+
+
+class WorkItemTreeSerializer(WorkItemTreeNodeSerializer):
+    depth = serializers.IntegerField(help_text='深度, 根节点为0')
+    rollup = WorkItemTreeRollupSerializer(help_text='子树汇总数据')
+    children = serializers.ListField(child=serializers.DictField(), help_text='子工作项, 结构与当前节点相同')
+
+    class Meta(WorkItemTreeNodeSerializer.Meta):
+        fields = WorkItemTreeNodeSerializer.Meta.fields + ('depth', 'rollup', 'children')
+
+
+class WorkItemTreeResultSerializer(serializers.Serializer):
+    count = serializers.IntegerField(help_text='子树中的工作项数量')
+    root = WorkItemTreeSerializer(help_text='根节点')
+
+
+class WorkItemBoardCardSerializer(serializers.ModelSerializer):
+    deadline = serializers.DateTimeField(format='%Y-%m-%d %H:%M:%S', read_only=True, help_text='截止日期')
+    owner_name = UserNameField(source='owner', help_text='负责人姓名')
+
+    class Meta:
+        model = WorkItem
+        fields = ('id', 'name', 'work_item_type', 'work_item_status', 'priority', 'severity', 'owner', 'owner_name',
+                  'deadline', 'parent', 'comment_count', 'file_count', 'child_count')
+
+
+class WorkItemAnalyticsQuerySerializer(serializers.Serializer):
+    start_date = serializers.DateField(required=False, help_text='开始日期(e.g. 2023-01-01), 默认为结束日期前29天')
+    end_date = serializers.DateField(required=False, help_text='结束日期(e.g. 2023-01-31), 默认为今天')
+    sprint_id = serializers.IntegerField(required=False, help_text='只统计该迭代的工作项')
+    project_id = serializers.IntegerField(required=False, help_text='只统计该项目下各迭代的工作项')
+    work_item_type = serializers.ChoiceField(choices=WorkItem.WORK_ITEM_TYPE_CHOICES, required=False,
+                                             help_text='只统计该类型的工作项')
+    owner = serializers.CharField(required=False, help_text='只统计该负责人的工作项')
+
+    def validate(self, attrs):
+        attrs.setdefault('end_date', datetime.date.today())
+        attrs.setdefault('start_date', attrs.get('end_date') - datetime.timedelta(days=29))
+        if attrs.get('start_date') > attrs.get('end_date'):
+            raise serializers.ValidationError('开始日期不能晚于结束日期.', code=40000)
+        return attrs
+
+
+class WorkItemDurationStatsSerializer(serializers.Serializer):
+    count = serializers.IntegerField(help_text='数量')
+    mean = serializers.FloatField(allow_null=True, help_text='平均值(小时)')
+    p50 = serializers.FloatField(allow_null=True, help_text='50百分位数(小时)')
+    p85 = serializers.FloatField(allow_null=True, help_text='85百分位数(小时)')
+    p95 = serializers.FloatField(allow_null=True, help_text='95百分位数(小时)')
+
+
+class WorkItemStatusDwellSerializer(WorkItemDurationStatsSerializer):
+    status = serializers.IntegerField(help_text='工作项状态')
+    status_name = serializers.CharField(help_text='工作项状态名称')
+
+
+class WorkItemAnalyticsSerializer(serializers.Serializer):
+    start_date = serializers.DateField(help_text='开始日期')
+    end_date = serializers.DateField(help_text='结束日期')
+    lead_time = WorkItemDurationStatsSerializer(help_text='前置时间: 创建 -> 完成(该时间段内完成的工作项)')
+    cycle_time = WorkItemDurationStatsSerializer(help_text='周期时间: 开始处理 -> 完成(该时间段内完成的工作项)')
+    status_dwell = WorkItemStatusDwellSerializer(many=True, help_text='各状态的停留时间(该时间段内离开该状态的状态变化)')
@@ -0,0 +1,127 @@
+import datetime
+from collections import Counter, defaultdict
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, Max, Q
+
+from pm.changelog_writer import get_status_change
+from pm.models import Sprint, SprintSnapshot, WorkItem, Changelog
+
+ONE_DAY = datetime.timedelta(days=1)
+
+
+def build_snapshot(sprint_id: int, snapshot_date: datetime.date, counts: Counter):
+    """
+    @param counts: {(状态, 工作项类型): 数量}
+    """
+    status_counts, type_counts = Counter(), Counter()
+    for (work_item_status, work_item_type), count in counts.items():
+        if count > 0:
+            status_counts[work_item_status] += count
+            type_counts[work_item_type] += count
+    total = sum(status_counts.values())
+    remaining = total - sum(status_counts.get(done_status, 0) for done_status in WorkItem.DONE_STATUSES)
+    return SprintSnapshot(sprint_id=sprint_id, snapshot_date=snapshot_date, total=total, remaining=remaining,
+                          status_counts={str(key): value for key, value in sorted(status_counts.items())},
+                          type_counts={str(key): value for key, value in sorted(type_counts.items())})
+
+
+def save_snapshots(snapshots: list):
+    """
+    覆盖写入: 在同一事务中删除同一迭代同一天已有的快照后批量插入, 重复执行的结果一致
+    """
+    if not snapshots:
+        return 0
+    dates = defaultdict(set)
+    for snapshot in snapshots:
+        dates[snapshot.sprint_id].add(snapshot.snapshot_date)
+    with transaction.atomic():
+        SprintSnapshot.objects.filter(reduce(or_, [Q(sprint_id=sprint_id, snapshot_date__in=sprint_dates)
+                                                   for sprint_id, sprint_dates in dates.items()])).delete()
+        SprintSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+    return len(snapshots)
+
+
+def take_sprint_snapshots(sprint_ids: list, snapshot_date: datetime.date):
+    """
+    按工作项的当前状态写入迭代在snapshot_date的快照, 一次分组查询统计所有迭代
+    """
+    counts = defaultdict(Counter)
+    for sprint_id, work_item_status, work_item_type, count in WorkItem.objects.filter(
+            sprint_id__in=sprint_ids).order_by().values_list('sprint', 'work_item_status', 'work_item_type').annotate(
+            count=Count('id')):
+        counts[sprint_id][(work_item_status, work_item_type)] = count
+    return save_snapshots([build_snapshot(sprint_id, snapshot_date, counts[sprint_id]) for sprint_id in sprint_ids])
+
+
+def replay_sprint_snapshots(sprint_id: int, start_date: datetime.date, end_date: datetime.date):
+    """
+    从变更记录回放迭代在[start_date, end_date]内每天结束时的状态, 写入每天的快照
+    1.以工作项的当前状态为准, 从后往前由每次状态变化的修改前的状态推算历史状态, 变更记录缺失时也不会出现负数
+    2.变更记录中没有记录所属迭代及工作项类型的修改, 按工作项当前所属的迭代及类型统计, 已删除的工作项无法还原
+    @return: 写入的快照数量
+    """
+    days = (end_date - start_date).days + 1
+    if days <= 0:
+        return 0
+    work_items = {pk: values for pk, *values in WorkItem.objects.filter(sprint_id=sprint_id).values_list(
+        'id', 'work_item_status', 'work_item_type', 'create_time')}
+    status_changes = defaultdict(list)
+    for work_item_id, create_time, changelog in Changelog.objects.filter(work_item_id__in=list(work_items)).order_by(
+            'create_time', 'id').values_list('work_item_id', 'create_time', 'changelog').iterator(chunk_size=1000):
+        status_change = get_status_change(changelog)
+        if status_change is not None:
+            status_changes[work_item_id].append((create_time, status_change[0]))
+    # start_date之前的数量, 及每天的变化量
+    initial_counts = Counter()
+    daily_changes = [Counter() for _ in range(days)]
+
+    def add(changed_time, key, delta):
+        day = (changed_time.date() - start_date).days
+        if day < 0:
+            initial_counts[key] += delta
+        elif day < days:
+            daily_changes[day][key] += delta
+
+    for pk, (work_item_status, work_item_type, create_time) in work_items.items():
+        # 工作项在times[i]之后处于statuses[i]
+        times = [create_time] + [change_time for change_time, _ in status_changes.get(pk, [])]
+        statuses = [origin for _, origin in status_changes.get(pk, [])] + [work_item_status]
+        add(times[0], (statuses[0], work_item_type), 1)
+        for i in range(1, len(times)):
+            add(times[i], (statuses[i - 1], work_item_type), -1)
+            add(times[i], (statuses[i], work_item_type), 1)
+    snapshots = []
+    counts = initial_counts
+    for day in range(days):
+        counts.update(daily_changes[day])
+        snapshots.append(build_snapshot(sprint_id, start_date + day * ONE_DAY, counts))
+    return save_snapshots(snapshots)
+
+
+def get_snapshot_sprint_ids(snapshot_date: datetime.date):
+    """
+    需要写入每日快照的迭代: 未完成的迭代, 及当天修改过的迭代(e.g. 当天完成的迭代)
+    """
+    return list(Sprint.objects.filter(
+        Q(sprint_status__in=[0, 1]) | Q(update_time__gte=datetime.datetime.combine(snapshot_date, datetime.time.min))
+    ).values_list('id', flat=True))
+
+
+def take_daily_snapshots(snapshot_date: datetime.date = None):
+    """
+    定时任务: 增量写入当天的快照
+    定时任务未执行的日期(上次快照之后到前一天)从变更记录回放补齐, 从未写入过快照的迭代需执行backfill_sprint_snapshots
+    @return: 写入的快照数量
+    """
+    snapshot_date = snapshot_date or datetime.date.today()
+    sprint_ids = get_snapshot_sprint_ids(snapshot_date)
+    count = 0
+    for sprint_id, last_date in SprintSnapshot.objects.filter(
+            sprint_id__in=sprint_ids, snapshot_date__lt=snapshot_date).order_by().values_list('sprint').annotate(
+            last_date=Max('snapshot_date')):
+        if last_date < snapshot_date - ONE_DAY:
+            count += replay_sprint_snapshots(sprint_id, last_date + ONE_DAY, snapshot_date - ONE_DAY)
+    return count + take_sprint_snapshots(sprint_ids, snapshot_date)
@@ -0,0 +1,32 @@
+import logging
+
+from celery import shared_task
+from django.core.cache import cache
+
+from pm.sprint_snapshot import take_daily_snapshots
+from pm.work_item_rank import RANK_REBALANCE_LOCK_KEY, rebalance_ranks
+
+logger = logging.getLogger('my_debug_logger')
+
+
+@shared_task
+def rebalance_work_item_ranks():
+    """
+    重新平衡所有工作项的排序值(排序值过长或冲突时由pm.work_item_rank.schedule_rank_rebalance()发送)
+    """
+    try:
+        count = rebalance_ranks()
+    finally:
+        cache.delete(RANK_REBALANCE_LOCK_KEY)
+    logger.info(f'重新平衡{count}个工作项的排序值')
+    return count
+
+
+@shared_task
+def snapshot_sprints():
+    """
+    写入迭代每日快照(由celery beat每小时执行一次, 同一天重复写入时覆盖)
+    """
+    count = take_daily_snapshots()
+    logger.info(f'写入{count}条迭代快照')
+    return count
@@ -1,10 +1,15 @@
 from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.viewsets import ModelViewSet
 from drf_spectacular.utils import extend_schema
 from django_filters import rest_framework as filters
 
 from utils.drf_utils.custom_json_response import JsonResponse, unite_response_format_schema
-from pm.serializers.comments import CommentCreateUpdateSerializer, CommentRetrieveSerializer
+from utils.drf_utils.values_serializer import compile_values_projection
+from pm.serializers.comments import CommentCreateUpdateSerializer, CommentRetrieveSerializer, \
+    CommentThreadQuerySerializer, CommentThreadListSerializer
 from pm.models import Comment
 
 
@@ -26,6 +31,8 @@ class CommentViewSet(ModelViewSet):
             return CommentCreateUpdateSerializer
         elif self.action in ['retrieve', 'destroy', 'list']:
             return CommentRetrieveSerializer
+        elif self.action == 'thread':
+            return CommentThreadQuerySerializer
 
     def perform_create(self, serializer):
         serializer.save(creator=self.request.user.username, modifier=self.request.user.username)
@@ -80,3 +87,67 @@ class CommentViewSet(ModelViewSet):
         delete comment
         """
         return super().destroy(request, *args, **kwargs)
+
+    @staticmethod
+    def build_comment_threads(rows: list):
+        """
+        把评论组装为评论线程, 父评论不属于当前工作项(或已删除)的评论作为顶层评论
+        父子关系成环时(e.g. A的父评论为B, B的父评论为A), 环中id最小的评论作为顶层评论, 避免整个环从线程中消失
+        @param rows: 按id正序排列的评论数据
+        @return: 按id倒序排列的顶层评论列表, 回复按id正序放在children中
+        """
+        nodes = {row.get('id'): {**row, 'children': []} for row in rows}
+        threads = []
+        for node_id, node in nodes.items():
+            parent_node = nodes.get(node.get('parent'))
+            if parent_node is not None and node.get('parent') != node_id:
+                parent_node.get('children').append(node)
+            else:
+                threads.append(node)
+        # 先从顶层评论出发遍历, 无法到达的评论都在环中或挂在环上, 按id正序把每个环中第一个遇到的评论提升为顶层评论
+        visited = set()
+        root_count = len(threads)
+        for index, node in enumerate(threads + list(nodes.values())):
+            if node.get('id') in visited:
+                continue
+            if index >= root_count:
+                nodes.get(node.get('parent')).get('children').remove(node)
+                threads.append(node)
+            pending_nodes = [node]
+            while pending_nodes:
+                pending_node = pending_nodes.pop()
+                visited.add(pending_node.get('id'))
+                pending_nodes.extend(pending_node.get('children'))
+        threads.sort(key=lambda thread: thread.get('id'), reverse=True)
+        return threads
+
+    @extend_schema(parameters=[CommentThreadQuerySerializer],
+                   responses=unite_response_format_schema('select-comment-thread', CommentThreadListSerializer))
+    @action(methods=['get'], detail=False, url_path='thread')
+    def thread(self, request, *args, **kwargs):
+        """
+        select comment thread, 一次查询出工作项的所有评论并组装为评论线程, 按顶层评论游标分页
+        """
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        projection = compile_values_projection(CommentRetrieveSerializer)
+        queryset = Comment.objects.filter(work_item=serializer.validated_data.get('work_item_id')).order_by('id')
+        rows = projection.serialize(projection.get_values_queryset(queryset), self.get_serializer_context())
+        threads = self.build_comment_threads(rows)
+        # 游标为上一页最后一个顶层评论的id
+        threads_after = threads
+        position = self.paginator.decode_cursor(serializer.validated_data.get('cursor'))
+        if position is not None:
+            values = position.get('values')
+            if len(values) != 1 or not isinstance(values[0], int):
+                raise NotFound(self.paginator.invalid_cursor_message)
+            threads_after = [thread for thread in threads if thread.get('id') < values[0]]
+        size = serializer.validated_data.get('size') or self.paginator.get_page_size(request)
+        results = threads_after[:size]
+        next_link = None
+        if len(threads_after) > size:
+            next_link = replace_query_param(request.build_absolute_uri(), self.paginator.cursor_query_param,
+                                            self.paginator.encode_cursor({'values': [results[-1].get('id')],
+                                                                          'reverse': False}))
+        return JsonResponse(data={'count': len(threads), 'comment_count': len(rows), 'next': next_link,
+                                  'results': results}, msg='success', code=20000)
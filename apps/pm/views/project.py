@@ -31,6 +31,12 @@ class ProjectViewSet(ModelViewSet):
         elif self.action in ['retrieve', 'destroy', 'list']:
             return ProjectRetrieveSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            queryset = ProjectRetrieveSerializer.setup_eager_loading(queryset, self.get_serializer().fields)
+        return queryset
+
     @staticmethod
     def init_project_members(request):
         # 新建项目时初始化项目成员，默认添加 项目负责人 和 发起当前请求的用户
@@ -75,8 +81,8 @@ class ProjectViewSet(ModelViewSet):
         select project list
         """
         # 只返回 当前请求的用户在项目的成员中 的数据
-        queryset = self.filter_queryset(
-            Project.objects.filter(members__username__contains=self.request.user.username).all().order_by('-id'))
+        queryset = self.filter_queryset(ProjectRetrieveSerializer.setup_eager_loading(
+            Project.objects.filter(members=self.request.user).all().order_by('-id'), self.get_serializer().fields))
         page = self.paginate_queryset(queryset)
         if page is not None:
             # 分页
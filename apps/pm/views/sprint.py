@@ -1,11 +1,18 @@
+from django.db.models import Count
 from rest_framework import status
+from rest_framework.decorators import action
 from rest_framework.viewsets import ModelViewSet
 from drf_spectacular.utils import extend_schema
 from django_filters import rest_framework as filters
 
+from utils.django_utils.window_query import get_top_n_per_group
 from utils.drf_utils.custom_json_response import JsonResponse, unite_response_format_schema
-from pm.serializers.sprints import SprintCreateUpdateSerializer, SprintRetrieveSerializer
-from pm.models import Sprint
+from utils.drf_utils.values_serializer import compile_values_projection
+from pm.serializers.sprints import SprintCreateUpdateSerializer, SprintRetrieveSerializer, \
+    SprintBoardQuerySerializer, SprintBoardSerializer, SprintBurndownQuerySerializer, SprintBurndownSerializer, \
+    SprintSnapshotSerializer
+from pm.serializers.work_items import WorkItemBoardCardSerializer
+from pm.models import Sprint, WorkItem, SprintSnapshot
 
 
 class SprintFilter(filters.FilterSet):
@@ -29,6 +36,16 @@ class SprintViewSet(ModelViewSet):
             return SprintCreateUpdateSerializer
         elif self.action in ['retrieve', 'destroy', 'list']:
             return SprintRetrieveSerializer
+        elif self.action == 'board':
+            return SprintBoardQuerySerializer
+        elif self.action == 'burndown':
+            return SprintBurndownQuerySerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ['retrieve', 'list']:
+            queryset = SprintRetrieveSerializer.setup_eager_loading(queryset, self.get_serializer().fields)
+        return queryset
 
     def perform_create(self, serializer):
         serializer.save(creator=self.request.user.username, modifier=self.request.user.username)
@@ -83,3 +100,53 @@ class SprintViewSet(ModelViewSet):
         delete sprint
         """
         return super().destroy(request, *args, **kwargs)
+
+    @extend_schema(parameters=[SprintBoardQuerySerializer],
+                   responses=unite_response_format_schema('select-sprint-board', SprintBoardSerializer))
+    @action(methods=['get'], detail=True, url_path='board')
+    def board(self, request, *args, **kwargs):
+        """
+        select sprint board, 按工作项状态分列, 返回每列的数量及前size个工作项
+        一次分组查询统计每列的数量, 一次查询取出每列的前size个工作项(窗口函数), 负责人姓名批量解析
+        """
+        sprint = self.get_object()
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        queryset = WorkItem.objects.filter(sprint=sprint)
+        for field_name in ('work_item_type', 'owner'):
+            if field_name in serializer.validated_data:
+                queryset = queryset.filter(**{field_name: serializer.validated_data.get(field_name)})
+        counts = dict(queryset.order_by().values_list('work_item_status').annotate(count=Count('id')))
+        columns = {status_value: {'status': status_value, 'status_name': status_name,
+                                  'count': counts.get(status_value, 0), 'cards': []}
+                   for status_value, status_name in WorkItem.WORK_ITEM_STATUS_CHOICES}
+        if counts:
+            # 列内按拖拽排序的顺序排列
+            ordering = ['rank', 'id']
+            projection = compile_values_projection(WorkItemBoardCardSerializer)
+            cards_queryset = get_top_n_per_group(queryset, 'work_item_status', ordering,
+                                                 serializer.validated_data.get('size'))
+            cards = projection.serialize(projection.get_values_queryset(
+                cards_queryset.order_by('work_item_status', *ordering)), self.get_serializer_context())
+            for card in cards:
+                columns.get(card.get('work_item_status')).get('cards').append(card)
+        return JsonResponse(data={'count': sum(counts.values()), 'columns': list(columns.values())}, msg='success',
+                            code=20000)
+
+    @extend_schema(parameters=[SprintBurndownQuerySerializer],
+                   responses=unite_response_format_schema('select-sprint-burndown', SprintBurndownSerializer))
+    @action(methods=['get'], detail=True, url_path='burndown')
+    def burndown(self, request, *args, **kwargs):
+        """
+        select sprint burndown, 燃尽图/累积流图数据: 只读取迭代的每日快照(由定时任务写入), 不扫描工作项及变更记录
+        """
+        sprint = self.get_object()
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        queryset = SprintSnapshot.objects.filter(sprint=sprint).order_by('snapshot_date')
+        if serializer.validated_data.get('start_date'):
+            queryset = queryset.filter(snapshot_date__gte=serializer.validated_data.get('start_date'))
+        if serializer.validated_data.get('end_date'):
+            queryset = queryset.filter(snapshot_date__lte=serializer.validated_data.get('end_date'))
+        results = SprintSnapshotSerializer(queryset, many=True).data
+        return JsonResponse(data={'count': len(results), 'results': results}, msg='success', code=20000)
@@ -1,11 +1,26 @@
-from rest_framework import status
+from django.db import transaction
+from rest_framework import status, serializers
+from rest_framework.decorators import action
 from rest_framework.viewsets import ModelViewSet
 from drf_spectacular.utils import extend_schema
 from django_filters import rest_framework as filters
 
+from utils.django_utils.change_tracker import FieldChangeTracker
 from utils.drf_utils.custom_json_response import JsonResponse, unite_response_format_schema
-from pm.serializers.work_items import WorkItemCreateUpdateSerializer, WorkItemRetrieveSerializer
-from pm.models import WorkItem, Changelog
+from utils.drf_utils.conditional_get import ConditionalGetMixin
+from utils.drf_utils.values_serializer import ValuesListModelMixin, compile_values_projection
+from pm.serializers.work_items import WorkItemCreateUpdateSerializer, WorkItemRetrieveSerializer, \
+    WorkItemBulkCreateUpdateSerializer, WorkItemBulkResultSerializer, WorkItemBulkDestroySerializer, \
+    WorkItemBulkDestroyResultSerializer, WorkItemTreeResultSerializer, WorkItemMoveSerializer, \
+    WorkItemMoveResultSerializer, WorkItemAnalyticsQuerySerializer, WorkItemAnalyticsSerializer
+from pm.models import WorkItem
+from pm.changelog_writer import build_changelog_event, emit_changelogs
+from pm.counter_caches import child_counter
+from pm.search_indexes import work_item_search_index
+from pm.work_item_tree import get_work_item_tree
+from pm.work_item_rank import get_append_ranks, move_work_item, rank_append_lock
+from pm.work_item_analytics import compute_status_analytics
+from sugar.settings import BULK_OPERATION_MAX_SIZE
 
 
 class WorkItemFilter(filters.FilterSet):
@@ -14,65 +29,62 @@ class WorkItemFilter(filters.FilterSet):
     desc = filters.CharFilter(field_name='desc', lookup_expr='icontains', label='描述(模糊搜索且不区分大小写)')
     creator = filters.CharFilter(field_name='creator', lookup_expr='icontains', label='创建人(模糊搜索且不区分大小写)')
     sprint_id = filters.NumberFilter(field_name='sprint', label='所属迭代ID')
+    q = filters.CharFilter(method='filter_search', label='全文搜索(标题及描述), 结果按相关度排序')
+    ordering = filters.OrderingFilter(fields=(('rank', 'rank'), ('id', 'id')),
+                                      label='排序, rank: 按拖拽排序的顺序, 默认按ID倒序')
 
     class Meta:
         model = WorkItem
         fields = ['sprint_id', 'name', 'work_item_status', 'owner', 'work_item_type', 'priority', 'severity',
                   'bug_type', 'process_result', 'desc', 'creator']
 
+    def filter_search(self, queryset, name, value):
+        return work_item_search_index.filter_queryset(queryset, value)
+
 
 @extend_schema(tags=['工作项管理'])
-class WorkItemViewSet(ModelViewSet):
-    queryset = WorkItem.objects.all().order_by('-id')
+class WorkItemViewSet(ConditionalGetMixin, ValuesListModelMixin, ModelViewSet):
+    queryset = WorkItem.objects.select_related('sprint').order_by('-id')
     filterset_class = WorkItemFilter
+    # 列表接口使用values()快速序列化
+    values_serializer_actions = ['list']
+    # 响应中包含sprint_name, 迭代的更新时间也参与ETag计算
+    conditional_get_related = ['sprint']
+    # 负责人等用户姓名、删除迭代后被置为NULL的外键不会修改工作项的update_time
+    conditional_get_versions = ['system.user', 'pm.sprint']
+    # 变更记录: 需要追踪的字段及其描述
+    changelog_tracker = FieldChangeTracker(WorkItem, {
+        'name': '标题', 'owner': '负责人', 'priority': '优先级', 'work_item_status': '状态', 'severity': '严重程度',
+        'bug_type': '缺陷类型', 'process_result': '处理结果', 'desc': '描述', 'deadline': '截止日期'})
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return WorkItemCreateUpdateSerializer
         elif self.action in ['retrieve', 'destroy', 'list']:
             return WorkItemRetrieveSerializer
+        elif self.action in ['bulk_create', 'bulk_update', 'bulk_partial_update']:
+            return WorkItemBulkCreateUpdateSerializer
+        elif self.action == 'bulk_destroy':
+            return WorkItemBulkDestroySerializer
+        elif self.action == 'tree':
+            return WorkItemTreeResultSerializer
+        elif self.action == 'move':
+            return WorkItemMoveSerializer
+        elif self.action == 'analytics':
+            return WorkItemAnalyticsQuerySerializer
 
     def perform_create(self, serializer):
-        serializer.save(creator=self.request.user.username, modifier=self.request.user.username)
+        # 新增的工作项排在最后
+        with rank_append_lock():
+            serializer.save(creator=self.request.user.username, modifier=self.request.user.username,
+                            rank=get_append_ranks(1)[0])
 
     def perform_update(self, serializer):
-        origin_work_item_obj = WorkItem.objects.get(id=self.kwargs.get('pk'))
-        origin_data: dict = WorkItemCreateUpdateSerializer(instance=origin_work_item_obj).data
-        serializer.save(modifier=self.request.user.username)  # 更新数据并入库
-        current_data: dict = serializer.data
-        ignore_columns = ['id', 'create_time', 'update_time', 'creator', 'modifier', 'sprint', 'parent',
-                          'work_item_type', 'followers']
-        mapping_columns_data = {'priority': dict(WorkItem.PRIORITY_CHOICES),
-                                'work_item_status': dict(WorkItem.WORK_ITEM_STATUS_CHOICES),
-                                'severity': dict(WorkItem.SEVERITY_CHOICES),
-                                'bug_type': dict(WorkItem.BUG_TYPE_CHOICES),
-                                'process_result': dict(WorkItem.PROCESS_RESULT_CHOICES)}
-        columns_desc = {'name': '标题', 'owner': '负责人', 'priority': '优先级', 'work_item_status': '状态',
-                        'severity': '严重程度', 'bug_type': '缺陷类型', 'process_result': '处理结果', 'desc': '描述',
-                        'deadline': '截止日期', 'followers': '关注者'}
-        diff_results = []
-        for key, value in current_data.items():
-            if key not in ignore_columns:
-                if value != origin_data.get(key):
-                    # 当前值与历史值不同时
-                    if key in mapping_columns_data.keys():
-                        diff_results.append({'key': key, 'desc': columns_desc.get(key),
-                                             'origin': self.check_is_value_null(
-                                                 mapping_columns_data.get(key).get(origin_data.get(key))),
-                                             'current': self.check_is_value_null(
-                                                 mapping_columns_data.get(key).get(value))})
-                    else:
-                        diff_results.append({'key': key, 'desc': columns_desc.get(key),
-                                             'origin': self.check_is_value_null(origin_data.get(key)),
-                                             'current': self.check_is_value_null(value)})
-        Changelog.objects.create(changelog=diff_results, work_item=WorkItem.objects.get(id=self.kwargs.get('pk')),
-                                 creator=self.request.user.username)
-
-    @staticmethod
-    def check_is_value_null(value):
-        if value is None:
-            return 'null'
-        return value
+        # serializer.instance为get_object()已加载的工作项, 保存前快照需要追踪的字段
+        snapshot = self.changelog_tracker.snapshot(serializer.instance)
+        diff_results = self.changelog_tracker.diff(snapshot, serializer.validated_data)
+        work_item = serializer.save(modifier=self.request.user.username)  # 更新数据并入库
+        emit_changelogs([build_changelog_event(work_item.id, diff_results, self.request.user.username)])
 
     @extend_schema(responses=unite_response_format_schema('create-work-item', WorkItemCreateUpdateSerializer))
     def create(self, request, *args, **kwargs):
@@ -121,3 +133,147 @@ class WorkItemViewSet(ModelViewSet):
         delete work-item
         """
         return super().destroy(request, *args, **kwargs)
+
+    @extend_schema(responses=unite_response_format_schema('select-work-item-tree', WorkItemTreeResultSerializer))
+    @action(methods=['get'], detail=True, url_path='tree')
+    def tree(self, request, *args, **kwargs):
+        """
+        select work-item subtree, 一次查询出整棵子树, 每个节点附带子树的汇总数据(完成率、未完成缺陷数等)
+        """
+        instance = self.get_object()
+        root, count = get_work_item_tree(instance.id, self.get_serializer_context())
+        return JsonResponse(data={'count': count, 'root': root}, msg='success', code=20000)
+
+    @extend_schema(request=WorkItemMoveSerializer,
+                   responses=unite_response_format_schema('move-work-item', WorkItemMoveResultSerializer))
+    @action(methods=['post'], detail=True, url_path='move')
+    def move(self, request, *args, **kwargs):
+        """
+        move work-item, 拖拽排序: 把工作项移动到两个相邻的工作项之间, 只修改被移动的工作项的排序值
+        排序值过长或冲突时在后台重新平衡所有工作项的排序值
+        """
+        instance = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        rank = move_work_item(instance, serializer.validated_data.get('prev_id'),
+                              serializer.validated_data.get('next_id'))
+        return JsonResponse(data={'id': instance.id, 'rank': rank}, msg='success', code=20000)
+
+    @extend_schema(parameters=[WorkItemAnalyticsQuerySerializer],
+                   responses=unite_response_format_schema('select-work-item-analytics', WorkItemAnalyticsSerializer))
+    @action(methods=['get'], detail=False, url_path='analytics')
+    def analytics(self, request, *args, **kwargs):
+        """
+        select work-item analytics, 前置时间、周期时间及各状态停留时间的百分位数, 数据来自工作项状态变化事件
+        """
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        work_items = WorkItem.objects.all()
+        for param_name, lookup in (('sprint_id', 'sprint_id'), ('project_id', 'sprint__project_id'),
+                                   ('work_item_type', 'work_item_type'), ('owner', 'owner')):
+            if param_name in serializer.validated_data:
+                work_items = work_items.filter(**{lookup: serializer.validated_data.get(param_name)})
+        start_date, end_date = serializer.validated_data.get('start_date'), serializer.validated_data.get('end_date')
+        return JsonResponse(data={'start_date': start_date, 'end_date': end_date,
+                                  **compute_status_analytics(work_items, start_date, end_date)},
+                            msg='success', code=20000)
+
+    def get_bulk_results(self, ids: list):
+        """
+        按ids的顺序返回工作项详情(values()快速序列化)
+        """
+        projection = compile_values_projection(WorkItemRetrieveSerializer)
+        rows = projection.serialize(projection.get_values_queryset(self.get_queryset().filter(pk__in=ids)),
+                                    self.get_serializer_context())
+        results = {row.get('id'): row for row in rows}
+        return [results.get(pk) for pk in ids if pk in results]
+
+    def get_bulk_update_instances(self, data):
+        """
+        校验批量修改的数据并一次查询出所有需要修改的工作项
+        @return: 与data顺序一致的工作项列表
+        """
+        if not isinstance(data, list) or not data:
+            raise serializers.ValidationError('请求数据必须为非空列表.', code=40000)
+        if len(data) > BULK_OPERATION_MAX_SIZE:
+            raise serializers.ValidationError(f'单次最多修改{BULK_OPERATION_MAX_SIZE}条数据.', code=40000)
+        ids = [item.get('id') if isinstance(item, dict) else None for item in data]
+        if not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+            raise serializers.ValidationError('每条数据都必须包含整数类型的id.', code=40000)
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError('id不能重复.', code=40000)
+        instances = self.get_queryset().in_bulk(ids)
+        missing_ids = [pk for pk in ids if pk not in instances]
+        if missing_ids:
+            raise serializers.ValidationError(f'工作项不存在: {missing_ids}', code=40000)
+        return [instances.get(pk) for pk in ids]
+
+    @extend_schema(request=WorkItemBulkCreateUpdateSerializer(many=True),
+                   responses=unite_response_format_schema('bulk-create-work-item', WorkItemBulkResultSerializer))
+    @action(methods=['post'], detail=False, url_path='bulk')
+    def bulk_create(self, request, *args, **kwargs):
+        """
+        bulk create work-item
+        """
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        # 锁包住整个事务, 事务提交后其他请求才能读取最后一个排序值
+        with rank_append_lock(), transaction.atomic():
+            # 新增的工作项按提交的顺序依次排在最后
+            for attrs, rank in zip(serializer.validated_data, get_append_ranks(len(serializer.validated_data))):
+                attrs['rank'] = rank
+            instances = serializer.save(creator=request.user.username, modifier=request.user.username)
+            # bulk_create不会触发post_save信号
+            if not serializer.saved_individually:
+                work_item_search_index.update(instances)
+                child_counter.sync(instances, created=True)
+        return JsonResponse(data={'results': self.get_bulk_results([instance.pk for instance in instances])},
+                            msg='success', code=20000, status=status.HTTP_201_CREATED)
+
+    @extend_schema(request=WorkItemBulkCreateUpdateSerializer(many=True),
+                   responses=unite_response_format_schema('bulk-update-work-item', WorkItemBulkResultSerializer))
+    @bulk_create.mapping.put
+    def bulk_update(self, request, *args, **kwargs):
+        """
+        bulk update work-item, 每条数据都需要包含id
+        """
+        instances = self.get_bulk_update_instances(request.data)
+        serializer = self.get_serializer(instance=instances, data=request.data, many=True,
+                                         partial=kwargs.pop('partial', False))
+        serializer.is_valid(raise_exception=True)
+        # 变更记录在保存前由快照与validated_data计算, 与数据更新在同一事务中一次性写入(或在事务提交后发送到队列)
+        diff_results_list = [self.changelog_tracker.diff(self.changelog_tracker.snapshot(instance), validated_data)
+                             for instance, validated_data in zip(instances, serializer.validated_data)]
+        with transaction.atomic():
+            serializer.save(modifier=request.user.username)
+            # bulk_update不会触发post_save信号
+            work_item_search_index.update(instances)
+            child_counter.sync(instances)
+            emit_changelogs([build_changelog_event(instance.id, diff_results, request.user.username)
+                             for diff_results, instance in zip(diff_results_list, instances)])
+        return JsonResponse(data={'results': self.get_bulk_results([instance.pk for instance in instances])},
+                            msg='success', code=20000)
+
+    @extend_schema(request=WorkItemBulkCreateUpdateSerializer(many=True),
+                   responses=unite_response_format_schema('bulk-partial-update-work-item',
+                                                          WorkItemBulkResultSerializer))
+    @bulk_create.mapping.patch
+    def bulk_partial_update(self, request, *args, **kwargs):
+        """
+        bulk partial update work-item, 每条数据都需要包含id
+        """
+        kwargs['partial'] = True
+        return self.bulk_update(request, *args, **kwargs)
+
+    @extend_schema(request=WorkItemBulkDestroySerializer,
+                   responses=unite_response_format_schema('bulk-delete-work-item', WorkItemBulkDestroyResultSerializer))
+    @bulk_create.mapping.delete
+    def bulk_destroy(self, request, *args, **kwargs):
+        """
+        bulk delete work-item
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            _, deleted_rows = self.get_queryset().filter(id__in=serializer.validated_data.get('ids')).delete()
+        return JsonResponse(data={'deleted': deleted_rows.get(WorkItem._meta.label, 0)}, msg='success', code=20000)
@@ -0,0 +1,100 @@
+import datetime
+
+import numpy as np
+
+from pm.models import WorkItem, WorkItemStatusTransition
+
+# 统计的百分位数
+PERCENTILES = (50, 85, 95)
+MICROSECONDS_PER_HOUR = 3600 * 10 ** 6
+
+
+def to_hours(times: list):
+    """
+    把datetime列表转换为小时数数组(相对于1970-01-01)
+    """
+    return np.array(times, dtype='datetime64[us]').astype(np.int64) / MICROSECONDS_PER_HOUR
+
+
+def summarize_durations(durations: np.ndarray):
+    """
+    @return: {'count': 数量, 'mean': 平均值, 'p50': 50百分位数, ...}, 单位为小时
+    """
+    if durations.size == 0:
+        return {'count': 0, 'mean': None, **{f'p{percentile}': None for percentile in PERCENTILES}}
+    values = np.percentile(durations, PERCENTILES)
+    return {'count': int(durations.size), 'mean': round(float(durations.mean()), 2),
+            **{f'p{percentile}': round(float(value), 2) for percentile, value in zip(PERCENTILES, values)}}
+
+
+def first_of_groups(group_ids: np.ndarray, indexes: np.ndarray, last: bool = False):
+    """
+    indexes按group_ids有序时, 取每组的第一个(或最后一个)
+    """
+    if indexes.size == 0:
+        return indexes
+    boundaries = np.ones(indexes.size, dtype=bool)
+    if last:
+        boundaries[:-1] = group_ids[indexes[1:]] != group_ids[indexes[:-1]]
+    else:
+        boundaries[1:] = group_ids[indexes[1:]] != group_ids[indexes[:-1]]
+    return indexes[boundaries]
+
+
+def compute_status_analytics(work_items, start_date: datetime.date, end_date: datetime.date):
+    """
+    统计工作项在[start_date, end_date]内的周期时间, 两次查询取出数据后在NumPy中按列计算
+    1.前置时间(lead time): 创建 -> 完成, 完成时间为该时间段内最后一次从未完成状态变为已完成状态的时间
+    2.周期时间(cycle time): 第一次开始处理(从等待状态变为其他状态) -> 完成
+    3.各状态的停留时间: 该时间段内离开该状态的每次状态变化, 停留时间为距上一次状态变化(或创建)的时间
+    @param work_items: 需要统计的工作项queryset
+    """
+    start_time = datetime.datetime.combine(start_date, datetime.time.min)
+    end_time = datetime.datetime.combine(end_date + datetime.timedelta(days=1), datetime.time.min)
+    # 该时间段内有状态变化的工作项在end_time之前的所有状态变化(计算停留时间及周期时间需要之前的状态变化)
+    touched_work_items = WorkItemStatusTransition.objects.filter(
+        work_item__in=work_items, transition_time__gte=start_time, transition_time__lt=end_time).values('work_item_id')
+    rows = list(WorkItemStatusTransition.objects.filter(
+        work_item_id__in=touched_work_items, transition_time__lt=end_time).order_by(
+        'work_item_id', 'transition_time').values_list('work_item_id', 'transition_time', 'from_status', 'to_status'))
+    results = {'lead_time': summarize_durations(np.empty(0)), 'cycle_time': summarize_durations(np.empty(0)),
+               'status_dwell': []}
+    if rows:
+        work_item_ids, transition_times, from_statuses, to_statuses = zip(*rows)
+        ids = np.array(work_item_ids, dtype=np.int64)
+        hours = to_hours(transition_times)
+        from_statuses = np.array(from_statuses, dtype=np.int16)
+        to_statuses = np.array(to_statuses, dtype=np.int16)
+        unique_ids = np.unique(ids)
+        create_times = dict(WorkItem.objects.filter(id__in=unique_ids.tolist()).values_list('id', 'create_time'))
+        create_hours = to_hours([create_times.get(pk) for pk in unique_ids.tolist()])
+        # 每个状态变化所属的工作项在unique_ids中的位置
+        positions = np.searchsorted(unique_ids, ids)
+        in_range = hours >= to_hours([start_time])[0]
+
+        # 停留时间
+        previous_hours = np.empty_like(hours)
+        previous_hours[1:] = hours[:-1]
+        is_first = np.ones(ids.size, dtype=bool)
+        is_first[1:] = ids[1:] != ids[:-1]
+        previous_hours[is_first] = create_hours[positions[is_first]]
+        dwell_hours = np.maximum(hours - previous_hours, 0)
+        for status_value, status_name in WorkItem.WORK_ITEM_STATUS_CHOICES:
+            mask = in_range & (from_statuses == status_value)
+            if mask.any():
+                results['status_dwell'].append(
+                    {'status': status_value, 'status_name': status_name, **summarize_durations(dwell_hours[mask])})
+
+        # 前置时间及周期时间
+        done_statuses = np.array(WorkItem.DONE_STATUSES, dtype=np.int16)
+        completions = first_of_groups(ids, np.flatnonzero(
+            in_range & np.isin(to_statuses, done_statuses) & ~np.isin(from_statuses, done_statuses)), last=True)
+        starts = first_of_groups(ids, np.flatnonzero(~np.isin(to_statuses, WorkItem.WAITING_STATUSES)))
+        start_hours = np.full(unique_ids.size, np.nan)
+        start_hours[positions[starts]] = hours[starts]
+        completed_positions = positions[completions]
+        results['lead_time'] = summarize_durations(
+            np.maximum(hours[completions] - create_hours[completed_positions], 0))
+        cycle_hours = hours[completions] - start_hours[completed_positions]
+        results['cycle_time'] = summarize_durations(np.maximum(cycle_hours[~np.isnan(cycle_hours)], 0))
+    return results
@@ -0,0 +1,132 @@
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, When, Value, IntegerField, Max
+from django.utils import timezone
+from rest_framework import serializers
+
+from pm.models import WorkItem
+from sugar.settings import WORK_ITEM_RANK_REBALANCE_LENGTH
+from utils.django_utils.lexorank import rank_between, rank_after, spread_ranks
+
+logger = logging.getLogger('my_debug_logger')
+
+# 重新平衡任务的锁, 保证同一时间只有一个重新平衡任务在排队或执行
+RANK_REBALANCE_LOCK_KEY = 'pm:work_item_rank:rebalance'
+RANK_REBALANCE_LOCK_TIMEOUT = 10 * 60
+RANK_MAX_LENGTH = WorkItem._meta.get_field('rank').max_length
+# 新增工作项分配排序值的锁, 超时时间用于防止持有锁的进程异常退出后锁无法释放
+RANK_APPEND_LOCK_KEY = 'pm:work_item_rank:append'
+RANK_APPEND_LOCK_TIMEOUT = 60
+# 等待锁的最长时间(秒)
+RANK_APPEND_LOCK_WAIT = 10
+
+
+@contextmanager
+def rank_append_lock():
+    """
+    新增工作项时, 从读取最后一个排序值到新增的数据提交期间持有的锁, 保证并发新增的工作项不会分配到相同的排序值
+    需要包住整个事务, 在事务内释放时其他请求仍可能在提交前读取到相同的最后一个排序值
+    """
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + RANK_APPEND_LOCK_WAIT
+    while not cache.add(RANK_APPEND_LOCK_KEY, token, RANK_APPEND_LOCK_TIMEOUT):
+        if time.monotonic() > deadline:
+            raise serializers.ValidationError('新增工作项的请求较多, 请稍后重试.', code=40000)
+        time.sleep(0.05)
+    try:
+        yield
+    finally:
+        # 只释放自己持有的锁(锁超时后可能已被其他请求获取)
+        if cache.get(RANK_APPEND_LOCK_KEY) == token:
+            cache.delete(RANK_APPEND_LOCK_KEY)
+
+
+def get_append_ranks(count: int):
+    """
+    新增工作项的排序值: 依次排在当前最后一个工作项之后, 只需一次聚合查询(rank字段有索引)
+    需要在rank_append_lock()中调用, 并在释放锁之前提交新增的工作项
+    """
+    last_rank = WorkItem.objects.aggregate(last_rank=Max('rank')).get('last_rank')
+    ranks = []
+    for _ in range(count):
+        last_rank = rank_after(last_rank)
+        ranks.append(last_rank)
+    if ranks and len(ranks[-1]) > WORK_ITEM_RANK_REBALANCE_LENGTH:
+        schedule_rank_rebalance()
+    return ranks
+
+
+def send_rank_rebalance_task():
+    from pm.tasks import rebalance_work_item_ranks
+    try:
+        rebalance_work_item_ranks.apply_async(retry=False)
+    except Exception as e:
+        logger.warning(f'发送工作项排序值重新平衡任务失败: {e}')
+        cache.delete(RANK_REBALANCE_LOCK_KEY)
+
+
+def schedule_rank_rebalance():
+    """
+    在当前事务提交后发送重新平衡任务, 已有任务在排队或执行时不重复发送
+    """
+    if cache.add(RANK_REBALANCE_LOCK_KEY, 1, RANK_REBALANCE_LOCK_TIMEOUT):
+        transaction.on_commit(send_rank_rebalance_task)
+
+
+def rebalance_ranks(batch_size: int = 1000):
+    """
+    按当前顺序为所有工作项重新生成等间距的排序值(排序值为空的工作项排在最后)
+    在同一事务中锁定所有工作项, 移动工作项时会等待重新平衡完成后再读取相邻工作项的排序值
+    @return: 处理的工作项数量
+    """
+    with transaction.atomic():
+        ids = list(WorkItem.objects.select_for_update().order_by(
+            Case(When(rank='', then=Value(1)), default=Value(0), output_field=IntegerField()), 'rank', 'id'
+        ).values_list('id', flat=True))
+        WorkItem.objects.bulk_update([WorkItem(id=pk, rank=rank) for pk, rank in zip(ids, spread_ranks(len(ids)))],
+                                     ['rank'], batch_size=batch_size)
+    return len(ids)
+
+
+def move_work_item(work_item: WorkItem, prev_id: int = None, next_id: int = None):
+    """
+    把工作项移动到prev_id与next_id之间: 计算两者之间的排序值, 只修改被移动的一条数据
+    只传入一个相邻工作项时, 另一侧取该工作项在全部工作项中的相邻工作项
+    @return: 新的排序值
+    """
+    neighbour_ids = [pk for pk in (prev_id, next_id) if pk is not None]
+    if work_item.id in neighbour_ids:
+        raise serializers.ValidationError('相邻的工作项不能是被移动的工作项本身.', code=40000)
+    with transaction.atomic():
+        others = WorkItem.objects.exclude(id=work_item.id).select_for_update()
+        ranks = dict(others.filter(id__in=neighbour_ids).values_list('id', 'rank'))
+        missing_ids = [pk for pk in neighbour_ids if pk not in ranks]
+        if missing_ids:
+            raise serializers.ValidationError(f'工作项不存在: {missing_ids}', code=40000)
+        prev_rank, next_rank = ranks.get(prev_id), ranks.get(next_id)
+        if prev_id is None:
+            prev_rank = others.filter(rank__lt=next_rank).order_by('-rank').values_list('rank', flat=True).first()
+        elif next_id is None:
+            next_rank = others.filter(rank__gt=prev_rank).order_by('rank').values_list('rank', flat=True).first()
+        if prev_rank is not None and next_rank is not None and prev_rank > next_rank:
+            raise serializers.ValidationError('prev_id对应的工作项必须排在next_id对应的工作项之前.', code=40000)
+        if prev_rank == next_rank or '' in (prev_rank, next_rank):
+            # 并发新增/移动产生了相同的排序值, 或存在未生成排序值的工作项
+            conflict_message = '工作项排序值冲突, 正在重新整理排序, 请稍后重试.'
+        else:
+            rank = rank_between(prev_rank, next_rank)
+            conflict_message = '工作项排序值过长, 正在重新整理排序, 请稍后重试.' if len(rank) > RANK_MAX_LENGTH else None
+        if conflict_message is None:
+            WorkItem.objects.filter(id=work_item.id).update(rank=rank, update_time=timezone.now())
+    # 在事务之外发送重新平衡任务(事务回滚时on_commit回调会被丢弃)
+    if conflict_message is not None:
+        schedule_rank_rebalance()
+        raise serializers.ValidationError(conflict_message, code=40000)
+    if len(rank) > WORK_ITEM_RANK_REBALANCE_LENGTH:
+        schedule_rank_rebalance()
+    return rank
@@ -0,0 +1,41 @@
+from pm.models import WorkItem
+from pm.serializers.work_items import WorkItemTreeNodeSerializer
+from utils.django_utils.tree_query import get_subtree_queryset, build_subtree
+from utils.drf_utils.values_serializer import compile_values_projection
+
+
+def compute_rollups(ordered_nodes: list):
+    """
+    按从下到上的层级顺序遍历一次, 把每个节点的汇总数据累加到父节点上
+    @param ordered_nodes: build_subtree()返回的按从上到下的层级顺序排列的节点列表
+    """
+    priority_count = len(WorkItem.PRIORITY_CHOICES)
+    for node in reversed(ordered_nodes):
+        is_done = node.get('work_item_status') in WorkItem.DONE_STATUSES
+        total, done_count = 1, int(is_done)
+        open_bug_count = int(not is_done and node.get('work_item_type') == WorkItem.BUG_WORK_ITEM_TYPE)
+        open_priority_counts = [0] * priority_count
+        if not is_done and node.get('priority') is not None:
+            open_priority_counts[node.get('priority')] += 1
+        for child in node.get('children'):
+            child_rollup = child.get('rollup')
+            total += child_rollup.get('total')
+            done_count += child_rollup.get('done_count')
+            open_bug_count += child_rollup.get('open_bug_count')
+            for priority, count in enumerate(child_rollup.get('open_priority_counts')):
+                open_priority_counts[priority] += count
+        node['rollup'] = {'total': total, 'done_count': done_count, 'done_ratio': round(done_count / total, 4),
+                          'open_bug_count': open_bug_count, 'open_priority_counts': open_priority_counts}
+
+
+def get_work_item_tree(root_id: int, context: dict = None):
+    """
+    一次递归CTE查询出工作项的整棵子树, 并计算每个节点的子树汇总数据(完成率、未完成缺陷数等)
+    @return: (根节点, 子树中的工作项数量)
+    """
+    projection = compile_values_projection(WorkItemTreeNodeSerializer)
+    queryset = get_subtree_queryset(WorkItem, root_id).order_by('id')
+    rows = projection.serialize(projection.get_values_queryset(queryset), context)
+    root, ordered_nodes = build_subtree(rows, root_id)
+    compute_rollups(ordered_nodes)
+    return root, len(ordered_nodes)
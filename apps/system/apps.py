@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class SystemConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'system'
+
+    def ready(self):
+        # 注册信号处理函数
+        import system.signals  # noqa: F401
+        # 注册本应用的搜索索引及闭包表, 保存/删除数据时自动维护
+        from system.closure_trees import organization_closure, permission_closure
+        from system.search_indexes import user_search_index
+        for declaration in (user_search_index, organization_closure, permission_closure):
+            declaration.connect_signals()
@@ -0,0 +1,5 @@
+from system.models import Organization, Permission
+from utils.django_utils.closure_table import ClosureTree
+
+organization_closure = ClosureTree(Organization)
+permission_closure = ClosureTree(Permission)
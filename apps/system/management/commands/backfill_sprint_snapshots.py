@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+# @File    : backfill_sprint_snapshots.py
+# @Software: PyCharm
+# @Description: 从工作项变更记录回放, 回填迭代的每日快照
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+
+from pm.models import Sprint, WorkItem
+from pm.sprint_snapshot import replay_sprint_snapshots
+
+
+class Command(BaseCommand):
+    help = '从工作项变更记录回放迭代每天结束时的状态, 回填迭代的每日快照(重复执行时覆盖同一天的快照)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sprint-id', type=int, nargs='*', help='迭代ID, 默认为所有迭代')
+        parser.add_argument('--start-date', type=datetime.date.fromisoformat,
+                            help='开始日期(e.g. 2023-01-01), 默认为迭代的开始时间或其中最早的工作项的创建时间')
+        parser.add_argument('--end-date', type=datetime.date.fromisoformat, help='结束日期, 默认为今天')
+
+    def handle(self, *args, **options):
+        sprints = Sprint.objects.order_by('id')
+        if options.get('sprint_id'):
+            sprints = sprints.filter(id__in=options.get('sprint_id'))
+        end_date = options.get('end_date') or datetime.date.today()
+        start_date = options.get('start_date')
+        if start_date and start_date > end_date:
+            raise CommandError('开始日期不能晚于结束日期')
+        first_create_times = dict(WorkItem.objects.filter(sprint__in=sprints).order_by().values_list(
+            'sprint').annotate(first_create_time=Min('create_time')))
+        for sprint in sprints:
+            sprint_start_time = sprint.start_time or first_create_times.get(sprint.id)
+            sprint_start_date = start_date or (sprint_start_time.date() if sprint_start_time else end_date)
+            count = replay_sprint_snapshots(sprint.id, sprint_start_date, end_date)
+            self.stdout.write(f'{sprint.name}(id={sprint.id}): 回填{count}天的快照')
+        self.stdout.write(self.style.SUCCESS('done'))
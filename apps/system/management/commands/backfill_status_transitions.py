@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# @File    : backfill_status_transitions.py
+# @Software: PyCharm
+# @Description: 分批从工作项变更记录回填工作项状态变化事件
+from django.core.management.base import BaseCommand
+
+from pm.changelog_writer import backfill_status_transitions
+from pm.models import Changelog, WorkItemStatusTransition
+
+
+class Command(BaseCommand):
+    help = '分批从工作项变更记录回填工作项状态变化事件(重复执行时忽略已存在的数据, loaddata导入变更记录后执行)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='每批处理的变更记录条数')
+
+    def handle(self, *args, **options):
+        changelog_count = backfill_status_transitions(Changelog, WorkItemStatusTransition,
+                                                      chunk_size=options.get('chunk_size'))
+        self.stdout.write(self.style.SUCCESS(f'处理{changelog_count}条变更记录'))
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+# @File    : backfill_user_foreign_keys.py
+# @Software: PyCharm
+# @Description: 根据创建人/最后修改人/负责人等用户名字段分批回填用户外键字段
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+
+from utils.django_utils.base_model import BaseModel
+from utils.django_utils.user_foreign_keys import backfill_user_foreign_keys, BACKFILL_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = '分批回填用户外键字段(creator_user/modifier_user/owner_user), 可重复执行, 只处理外键为空的数据'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=BACKFILL_CHUNK_SIZE, help='每批处理的数据条数')
+
+    def handle(self, *args, **options):
+        user_model = get_user_model()
+        for model_class in apps.get_models():
+            if not issubclass(model_class, BaseModel):
+                continue
+            backfill_count = backfill_user_foreign_keys(model_class, user_model, model_class.USER_FOREIGN_KEY_FIELDS,
+                                                        chunk_size=options.get('chunk_size'))
+            self.stdout.write(f'{model_class._meta.db_table}: 回填{backfill_count}个用户外键')
+        self.stdout.write(self.style.SUCCESS('done'))
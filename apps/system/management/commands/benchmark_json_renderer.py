@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# @File    : benchmark_json_renderer.py
+# @Software: PyCharm
+# @Description: 对比DRF默认JSONRenderer与FastJSONRenderer的渲染耗时, 并校验两者输出是否一致
+import datetime
+import decimal
+import timeit
+import uuid
+from collections import OrderedDict
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from utils.drf_utils.custom_json_renderer import FastJSONRenderer
+
+
+def build_user_list_payload(count: int):
+    """
+    模拟 /system/users/all/ 接口的响应数据
+    """
+    results = [OrderedDict([('id', i), ('username', f'user{i}'), ('email', f'user{i}@example.com'),
+                            ('avatar', 'http://127.0.0.1:8000/media/avatars/brave.png'), ('name', f'用户{i}'),
+                            ('position', '测试工程师')]) for i in range(count)]
+    return {'code': 20000, 'message': 'success', 'data': {'results': results, 'count': count}}
+
+
+def build_permission_tree_payload(depth: int, width: int):
+    """
+    模拟 /system/permissions/tree/ 接口的响应数据
+    """
+    now = datetime.datetime.now()
+
+    def build_nodes(level, prefix):
+        nodes = []
+        for i in range(width):
+            node = OrderedDict([('id', hash(f'{prefix}{i}') % 100000), ('create_time', now.strftime('%Y-%m-%d %H:%M:%S')),
+                                ('update_time', now.strftime('%Y-%m-%d %H:%M:%S')), ('creator', 'admin'),
+                                ('modifier', 'admin'), ('title', f'权限{prefix}{i}'), ('is_menu', level < depth - 1),
+                                ('method', 'GET'), ('url_path', f'/system/permissions/{prefix}{i}/'),
+                                ('icon', ''), ('component', ''), ('path', ''), ('redirect', ''), ('is_visible', True),
+                                ('parent', None)])
+            if level < depth - 1:
+                node['children'] = build_nodes(level + 1, f'{prefix}{i}-')
+            nodes.append(node)
+        return nodes
+
+    results = build_nodes(0, '')
+    return {'code': 20000, 'message': 'success',
+            'data': {'count': len(results), 'next': None, 'previous': None, 'results': results, 'total_pages': None,
+                     'current_page': None}}
+
+
+def build_task_result_payload(count: int):
+    """
+    模拟任务执行结果列表(包含UUID、datetime、Decimal、大段日志文本及JSON结果)
+    """
+    now = datetime.datetime.now()
+    log = ''.join(f'{now:%Y-%m-%d %H:%M:%S} -> 第{i}步执行成功, stdout is: ok\n' for i in range(200))
+    results = [OrderedDict([('task_uuid', uuid.uuid4()), ('create_time', now), ('update_time', now),
+                            ('task_status', 3), ('task_type', 0), ('log', log),
+                            ('result', {'status': True, 'cpu_percent': [12.5, 30.25, 8.0], 'memory': 1024,
+                                        'cost': decimal.Decimal('1.25')}),
+                            ('traceback', ''), ('device', i)]) for i in range(count)]
+    return {'code': 20000, 'message': 'success', 'data': {'count': count, 'results': results}}
+
+
+class Command(BaseCommand):
+    help = '对比DRF默认JSONRenderer与FastJSONRenderer的渲染耗时, 并校验两者输出是否一致'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=50, help='每个数据集的渲染次数')
+
+    def handle(self, *args, **options):
+        number = options.get('number')
+        payloads = {
+            'users-all(2000)': build_user_list_payload(2000),
+            'permission-tree(4x6)': build_permission_tree_payload(4, 6),
+            'task-results(50)': build_task_result_payload(50),
+        }
+        default_renderer = JSONRenderer()
+        fast_renderer = FastJSONRenderer()
+        for name, payload in payloads.items():
+            default_output = default_renderer.render(payload)
+            fast_output = fast_renderer.render(payload)
+            default_seconds = timeit.timeit(lambda: default_renderer.render(payload), number=number) / number
+            fast_seconds = timeit.timeit(lambda: fast_renderer.render(payload), number=number) / number
+            self.stdout.write(
+                f'{name}: {len(default_output) / 1024:.1f}KB, JSONRenderer {default_seconds * 1000:.3f}ms, '
+                f'FastJSONRenderer {fast_seconds * 1000:.3f}ms, {default_seconds / fast_seconds:.1f}x, '
+                f'输出一致: {default_output == fast_output}')
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+# @File    : rebalance_work_item_ranks.py
+# @Software: PyCharm
+# @Description: 按当前顺序重新生成所有工作项的拖拽排序值
+from django.core.management.base import BaseCommand
+
+from pm.work_item_rank import rebalance_ranks
+
+
+class Command(BaseCommand):
+    help = '按当前顺序为所有工作项重新生成等间距的排序值(排序值过长或冲突且无法执行后台任务时执行)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批写入的数据条数')
+
+    def handle(self, *args, **options):
+        count = rebalance_ranks(batch_size=options.get('batch_size'))
+        self.stdout.write(self.style.SUCCESS(f'重新平衡{count}个工作项的排序值'))
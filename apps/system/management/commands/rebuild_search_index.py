@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# @File    : rebuild_search_index.py
+# @Software: PyCharm
+# @Description: 分批重建全文搜索索引, 使用MySQL FULLTEXT后端时创建FULLTEXT索引
+from django.core.management.base import BaseCommand
+
+from utils.django_utils.search_index import search_indexes, get_search_backend, MySQLFulltextSearchBackend
+
+
+class Command(BaseCommand):
+    help = '分批重建全文搜索索引(首次部署或索引数据不一致时执行), 使用MySQL FULLTEXT后端时创建FULLTEXT索引'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='每批处理的数据条数')
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        chunk_size = options.get('chunk_size')
+        for doc_type, search_index in search_indexes.items():
+            if isinstance(backend, MySQLFulltextSearchBackend):
+                created = backend.create_fulltext_index(search_index)
+                self.stdout.write(f'{doc_type}: {"创建" if created else "已存在"}FULLTEXT索引')
+                continue
+            backend.get_token_model().objects.filter(doc_type=doc_type).delete()
+            queryset = search_index.model.objects.only('pk', *search_index.fields).order_by('pk')
+            last_pk, count = 0, 0
+            while True:
+                instances = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+                if not instances:
+                    break
+                backend.update(search_index, instances)
+                last_pk = instances[-1].pk
+                count += len(instances)
+            self.stdout.write(f'{doc_type}: 重建{count}条数据的索引')
+        self.stdout.write(self.style.SUCCESS('done'))
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# @File    : rebuild_tree_closure.py
+# @Software: PyCharm
+# @Description: 重建组织架构/权限等树形数据的闭包表
+from django.core.management.base import BaseCommand
+
+from utils.django_utils.closure_table import closure_trees
+
+
+class Command(BaseCommand):
+    help = '重建组织架构/权限等树形数据的闭包表(loaddata导入数据或直接修改数据库中的父节点后执行)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批写入的闭包表数据条数')
+
+    def handle(self, *args, **options):
+        for tree, closure_tree in closure_trees.items():
+            count = closure_tree.rebuild(batch_size=options.get('batch_size'))
+            self.stdout.write(f'{tree}: 写入{count}条闭包表数据')
+        self.stdout.write(self.style.SUCCESS('done'))
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+# @File    : reconcile_counter_caches.py
+# @Software: PyCharm
+# @Description: 分批对账修复反规范化的计数字段(e.g. 工作项的评论数、附件数、子工作项数)
+from django.core.management.base import BaseCommand
+
+from utils.django_utils.counter_cache import counter_caches
+
+
+class Command(BaseCommand):
+    help = '分批重新统计反规范化的计数字段, 只修复与实际数量不一致的数据(loaddata导入数据或直接修改数据库后执行)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='每批处理的数据条数')
+
+    def handle(self, *args, **options):
+        for counter_model, model_counter_caches in counter_caches.items():
+            for counter_cache in model_counter_caches:
+                repaired_count = counter_cache.reconcile(chunk_size=options.get('chunk_size'))
+                self.stdout.write(f'{counter_cache.parent_model._meta.label_lower}.{counter_cache.counter_field}: '
+                                  f'修复{repaired_count}条数据')
+        self.stdout.write(self.style.SUCCESS('done'))
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# @File    : sync_permission_route_names.py
+# @Software: PyCharm
+# @Description: 把已有接口权限的请求路径映射为DRF路由名称
+from django.core.management.base import BaseCommand
+
+from system.models import Permission
+from utils.drf_utils.permission_cache import bump_rbac_version
+from utils.drf_utils.route_utils import resolve_route_name, get_permission_route_key
+
+
+class Command(BaseCommand):
+    help = '根据请求路径为接口权限解析路由名称(e.g. work-item-detail:PATCH), 无法唯一匹配的权限继续使用正则匹配'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='只输出映射结果, 不写入数据库')
+
+    def handle(self, *args, **options):
+        dry_run = options.get('dry_run')
+        changed_permissions = []
+        unresolved_count = 0
+        for permission in Permission.objects.filter(is_menu=False).exclude(url_path='').order_by('id'):
+            route_name = resolve_route_name(permission.url_path)
+            if not route_name:
+                unresolved_count += 1
+                self.stdout.write(self.style.WARNING(
+                    f'[{permission.id}] {permission.method} {permission.url_path} -> 未匹配到唯一路由'))
+            else:
+                self.stdout.write(f'[{permission.id}] {permission.method} {permission.url_path} -> '
+                                  f'{get_permission_route_key(route_name, permission.method)}')
+            if permission.route_name != route_name:
+                permission.route_name = route_name
+                changed_permissions.append(permission)
+        if not dry_run and changed_permissions:
+            # bulk_update不会触发post_save信号, 需要手动使权限缓存失效
+            Permission.objects.bulk_update(changed_permissions, ['route_name'], batch_size=500)
+            bump_rbac_version()
+        self.stdout.write(self.style.SUCCESS(
+            f'共更新{len(changed_permissions)}条权限{"(dry run)" if dry_run else ""}, {unresolved_count}条未匹配到唯一路由'))
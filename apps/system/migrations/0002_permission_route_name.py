@@ -0,0 +1,18 @@
+# Generated by Django 3.2.18 on 2026-10-19 04:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='permission',
+            name='route_name',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='路由名称(根据请求路径自动解析, e.g. work-item-detail)', max_length=128, verbose_name='路由名称'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 3.2.18 on 2026-10-19 04:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system', '0002_permission_route_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organization',
+            name='creator_user',
+            field=models.ForeignKey(blank=True, editable=False, help_text='创建人(用户)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='创建人(用户)'),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='modifier_user',
+            field=models.ForeignKey(blank=True, editable=False, help_text='最后修改人(用户)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='最后修改人(用户)'),
+        ),
+        migrations.AddField(
+            model_name='permission',
+            name='creator_user',
+            field=models.ForeignKey(blank=True, editable=False, help_text='创建人(用户)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='创建人(用户)'),
+        ),
+        migrations.AddField(
+            model_name='permission',
+            name='modifier_user',
+            field=models.ForeignKey(blank=True, editable=False, help_text='最后修改人(用户)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='最后修改人(用户)'),
+        ),
+        migrations.AddField(
+            model_name='role',
+            name='creator_user',
+            field=models.ForeignKey(blank=True, editable=False, help_text='创建人(用户)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='创建人(用户)'),
+        ),
+        migrations.AddField(
+            model_name='role',
+            name='modifier_user',
+            field=models.ForeignKey(blank=True, editable=False, help_text='最后修改人(用户)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='最后修改人(用户)'),
+        ),
+    ]
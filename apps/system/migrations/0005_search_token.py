@@ -0,0 +1,36 @@
+# Generated by Django 3.2.18 on 2026-10-19 04:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system', '0004_backfill_user_foreign_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('doc_type', models.CharField(help_text='数据类型(e.g. pm.workitem)', max_length=32, verbose_name='数据类型')),
+                ('object_id', models.BigIntegerField(help_text='数据ID', verbose_name='数据ID')),
+                ('token', models.CharField(help_text='分词', max_length=32, verbose_name='分词')),
+                ('weight', models.PositiveIntegerField(default=1, help_text='权重(字段权重 * 词频)', verbose_name='权重')),
+            ],
+            options={
+                'verbose_name': '搜索索引',
+                'verbose_name_plural': '搜索索引',
+                'db_table': 'system_search_token',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='searchtoken',
+            index=models.Index(fields=['doc_type', 'token', 'object_id', 'weight'], name='search_token_lookup'),
+        ),
+        migrations.AddIndex(
+            model_name='searchtoken',
+            index=models.Index(fields=['object_id', 'doc_type'], name='search_token_object'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 3.2.18 on 2026-10-19 04:55
+
+from django.db import migrations, models
+
+from utils.django_utils.closure_table import rebuild_closure
+
+# 需要维护闭包表的树形数据
+CLOSURE_TREE_MODELS = ['Organization', 'Permission']
+
+
+def forwards(apps, schema_editor):
+    closure_model = apps.get_model('system', 'TreeClosure')
+    for model_name in CLOSURE_TREE_MODELS:
+        rebuild_closure(apps.get_model('system', model_name), closure_model, f'system.{model_name.lower()}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system', '0005_search_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TreeClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tree', models.CharField(help_text='树形数据类型(e.g. system.organization)', max_length=32, verbose_name='树形数据类型')),
+                ('ancestor_id', models.BigIntegerField(help_text='祖先节点ID', verbose_name='祖先节点ID')),
+                ('descendant_id', models.BigIntegerField(help_text='后代节点ID', verbose_name='后代节点ID')),
+                ('depth', models.PositiveIntegerField(help_text='祖先节点到后代节点的层级距离', verbose_name='层级距离')),
+            ],
+            options={
+                'verbose_name': '树形数据闭包表',
+                'verbose_name_plural': '树形数据闭包表',
+                'db_table': 'system_tree_closure',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='treeclosure',
+            index=models.Index(fields=['tree', 'ancestor_id', 'depth', 'descendant_id'], name='tree_closure_descendants'),
+        ),
+        migrations.AddConstraint(
+            model_name='treeclosure',
+            constraint=models.UniqueConstraint(fields=('tree', 'descendant_id', 'ancestor_id'), name='tree_closure_unique'),
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+from utils.drf_utils.permission_cache import bump_rbac_version
+from utils.drf_utils.route_utils import resolve_route_name
+
+
+def forwards(apps, schema_editor):
+    # 只授权了某个ID的权限(e.g. /pm/work-items/1/)之前会被解析为整个路由, 重新解析后继续使用正则匹配
+    permission_model = apps.get_model('system', 'Permission')
+    changed_permissions = []
+    for permission in permission_model.objects.exclude(route_name='').order_by('id'):
+        route_name = resolve_route_name(permission.url_path)
+        if permission.route_name != route_name:
+            permission.route_name = route_name
+            changed_permissions.append(permission)
+    if changed_permissions:
+        permission_model.objects.bulk_update(changed_permissions, ['route_name'], batch_size=500)
+        bump_rbac_version()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system', '0006_tree_closure'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -24,6 +24,8 @@ class Permission(BaseModel):
     method = models.CharField(max_length=8, blank=True, default='', choices=method_choices, verbose_name='请求方法',
                               help_text='请求方法')
     url_path = models.CharField(max_length=256, blank=True, default='', verbose_name='请求路径', help_text='请求路径')
+    route_name = models.CharField(max_length=128, blank=True, default='', db_index=True, verbose_name='路由名称',
+                                  help_text='路由名称(根据请求路径自动解析, e.g. work-item-detail)')
     icon = models.CharField(max_length=64, blank=True, default='', verbose_name="图标", help_text='图标')
     component = models.CharField(max_length=256, blank=True, default='', verbose_name='组件路径',
                                  help_text='组件路径')
@@ -101,3 +103,53 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.name
+
+
+class SearchToken(models.Model):
+    """
+    全文搜索倒排索引: 每条数据的每个分词一行, 由utils.django_utils.search_index增量维护
+    """
+    doc_type = models.CharField(max_length=32, verbose_name='数据类型', help_text='数据类型(e.g. pm.workitem)')
+    object_id = models.BigIntegerField(verbose_name='数据ID', help_text='数据ID')
+    token = models.CharField(max_length=32, verbose_name='分词', help_text='分词')
+    weight = models.PositiveIntegerField(default=1, verbose_name='权重', help_text='权重(字段权重 * 词频)')
+
+    class Meta:
+        db_table = 'system_search_token'
+        verbose_name = '搜索索引'
+        verbose_name_plural = verbose_name
+        indexes = [
+            # 搜索时只需扫描该索引(覆盖索引)
+            models.Index(fields=['doc_type', 'token', 'object_id', 'weight'], name='search_token_lookup'),
+            # 更新/删除某条数据的索引
+            models.Index(fields=['object_id', 'doc_type'], name='search_token_object'),
+        ]
+
+    def __str__(self):
+        return self.token
+
+
+class TreeClosure(models.Model):
+    """
+    树形数据的闭包表: 每对(祖先, 后代)一行, 包含节点自身(depth为0), 由utils.django_utils.closure_table增量维护
+    """
+    tree = models.CharField(max_length=32, verbose_name='树形数据类型', help_text='树形数据类型(e.g. system.organization)')
+    ancestor_id = models.BigIntegerField(verbose_name='祖先节点ID', help_text='祖先节点ID')
+    descendant_id = models.BigIntegerField(verbose_name='后代节点ID', help_text='后代节点ID')
+    depth = models.PositiveIntegerField(verbose_name='层级距离', help_text='祖先节点到后代节点的层级距离')
+
+    class Meta:
+        db_table = 'system_tree_closure'
+        verbose_name = '树形数据闭包表'
+        verbose_name_plural = verbose_name
+        constraints = [
+            # 查询祖先、深度、父节点
+            models.UniqueConstraint(fields=['tree', 'descendant_id', 'ancestor_id'], name='tree_closure_unique'),
+        ]
+        indexes = [
+            # 查询后代(覆盖索引)
+            models.Index(fields=['tree', 'ancestor_id', 'depth', 'descendant_id'], name='tree_closure_descendants'),
+        ]
+
+    def __str__(self):
+        return f'{self.ancestor_id} -> {self.descendant_id}'
@@ -0,0 +1,5 @@
+from system.models import User
+from utils.django_utils.search_index import SearchIndex
+
+user_search_index = SearchIndex(User, {'username': 2, 'name': 2, 'email': 1},
+                                result_fields=('id', 'username', 'name', 'email'), route_name='user-list')
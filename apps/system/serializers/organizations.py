@@ -1,7 +1,8 @@
+from django.db import transaction
 from rest_framework import serializers
+from system.closure_trees import organization_closure
 from system.models import Organization
 from utils.drf_utils.base_model_serializer import BaseModelSerializer
-from utils.drf_utils.model_utils import get_obj_child_ids
 
 
 class OrganizationCreateUpdateSerializer(BaseModelSerializer):
@@ -15,12 +16,11 @@ class OrganizationCreateUpdateSerializer(BaseModelSerializer):
         if parent:
             if parent.id == instance.id:
                 raise serializers.ValidationError('父部门不能为其本身.', code=40000)
-            ids = set()
-            get_obj_child_ids(instance.id, Organization, ids)
-            # print(ids)
-            if parent.id in ids:
+            if organization_closure.is_descendant(parent.id, instance.id):
                 raise serializers.ValidationError('父部门不能为其子部门.', code=40000)
-        return super().update(instance, validated_data)
+        # 修改父部门时, 闭包表与数据修改在同一事务中更新
+        with transaction.atomic():
+            return super().update(instance, validated_data)
 
 
 class OrganizationBaseRetrieveSerializer(BaseModelSerializer):
@@ -30,6 +30,8 @@ class OrganizationBaseRetrieveSerializer(BaseModelSerializer):
 
 
 class OrganizationTreeListSerializer(OrganizationBaseRetrieveSerializer):
+    # 生成树形数据依赖id和parent字段
+    sparse_required_fields = ('id', 'parent')
     children = OrganizationBaseRetrieveSerializer(many=True, read_only=True)
 
 
@@ -1,14 +1,16 @@
+from django.db import transaction
 from rest_framework import serializers
+from system.closure_trees import permission_closure
 from system.models import Permission
 from utils.drf_utils.base_model_serializer import BaseModelSerializer
-from utils.drf_utils.model_utils import get_obj_child_ids
+from utils.drf_utils.route_utils import resolve_route_name
 
 
 class PermissionCreateUpdateSerializer(BaseModelSerializer):
     class Meta:
         model = Permission
         fields = '__all__'
-        read_only_fields = ('id', 'create_time', 'update_time', 'creator', 'modifier')
+        read_only_fields = ('id', 'create_time', 'update_time', 'creator', 'modifier', 'route_name')
 
     def update(self, instance, validated_data):
         parent = validated_data.get('parent', False)
@@ -18,12 +20,11 @@ class PermissionCreateUpdateSerializer(BaseModelSerializer):
                 raise serializers.ValidationError('菜单父权限必须为菜单权限.')
             if parent.id == instance.id:
                 raise serializers.ValidationError('父权限不能为其本身.', code=40000)
-            ids = set()
-            get_obj_child_ids(instance.id, Permission, ids)
-            # print(ids)
-            if parent.id in ids:
+            if permission_closure.is_descendant(parent.id, instance.id):
                 raise serializers.ValidationError('父权限不能为其子权限.', code=40000)
-        return super().update(instance, validated_data)
+        # 修改父权限时, 闭包表与数据修改在同一事务中更新
+        with transaction.atomic():
+            return super().update(instance, validated_data)
 
     def validate(self, attrs):
         icon: str = attrs.get('icon')
@@ -45,6 +46,8 @@ class PermissionCreateUpdateSerializer(BaseModelSerializer):
                 raise serializers.ValidationError('新增或修改接口权限时, 请求方法和请求路径不能为空.')
             if icon or path:
                 raise serializers.ValidationError('新增或修改接口权限时, 图标和路由path必须为空.')
+        # 根据请求路径解析出路由名称, 用于接口权限校验时的路由索引匹配
+        attrs['route_name'] = resolve_route_name(url_path)
         return attrs
 
     def create(self, validated_data):
@@ -61,6 +64,8 @@ class PermissionBaseRetrieveSerializer(BaseModelSerializer):
 
 
 class PermissionTreeSerializer(PermissionBaseRetrieveSerializer):
+    # 生成树形数据依赖id和parent字段
+    sparse_required_fields = ('id', 'parent')
     children = PermissionBaseRetrieveSerializer(many=True, read_only=True)
 
 
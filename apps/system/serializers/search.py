@@ -0,0 +1,20 @@
+from rest_framework import serializers
+
+
+class GlobalSearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=64, help_text='搜索词')
+    size = serializers.IntegerField(min_value=1, max_value=50, default=10, help_text='每种数据类型最多返回的数据条数')
+    types = serializers.CharField(required=False, allow_blank=True,
+                                  help_text='只搜索指定的数据类型, 多个类型用英文逗号分隔, e.g. pm.project,pm.workitem')
+
+
+class GlobalSearchGroupSerializer(serializers.Serializer):
+    type = serializers.CharField(help_text='数据类型, e.g. pm.workitem')
+    type_name = serializers.CharField(help_text='数据类型名称')
+    count = serializers.IntegerField(help_text='用户可以访问的匹配数据条数, 最多统计SEARCH_MAX_RESULTS(默认1000)条')
+    has_more = serializers.BooleanField(help_text='匹配的数据是否超过SEARCH_MAX_RESULTS条(超过时count不是精确总数)')
+    results = serializers.ListField(child=serializers.DictField(), help_text='匹配的数据(按相关度排序)')
+
+
+class GlobalSearchSerializer(serializers.Serializer):
+    results = GlobalSearchGroupSerializer(many=True, help_text='按数据类型分组的搜索结果')
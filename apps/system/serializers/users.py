@@ -12,6 +12,7 @@ from system.models import User, Role
 from system.serializers.organizations import OrganizationBaseRetrieveSerializer
 from system.serializers.roles import RoleBaseRetrieveSerializer
 from sugar.settings import DEFAULT_USER_PASSWORD
+from utils.drf_utils.sparse_fields import SparseFieldsMixin
 from pm.models import Project, Sprint, WorkItem
 
 
@@ -110,7 +111,7 @@ class UserCreateUpdateSerializer(serializers.ModelSerializer):
         return user
 
 
-class UserListDestroySerializer(serializers.ModelSerializer):
+class UserListDestroySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     date_joined = serializers.DateTimeField(format='%Y-%m-%d %H:%M:%S', read_only=True, help_text='加入时间')
     department = serializers.SlugRelatedField(slug_field='name', many=False, read_only=True)
     roles = serializers.SlugRelatedField(slug_field='name', many=True, read_only=True)
@@ -135,7 +136,7 @@ class GetAllUserSerializer(serializers.ModelSerializer):
         fields = ('results', 'count')
 
 
-class UserRetrieveSerializer(serializers.ModelSerializer):
+class UserRetrieveSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     date_joined = serializers.DateTimeField(format='%Y-%m-%d %H:%M:%S', read_only=True, help_text='加入时间')
     department = OrganizationBaseRetrieveSerializer(many=False, read_only=True)
     roles = RoleBaseRetrieveSerializer(many=True, read_only=True)
@@ -208,28 +209,28 @@ class UserStatisticsSerializer(serializers.Serializer):
 
     @extend_schema_field(OpenApiTypes.INT)
     def get_project_count(self, obj: User):
-        return Project.objects.filter(members__username__contains=obj.username).count()
+        return Project.objects.filter(members=obj).count()
 
     @extend_schema_field(OpenApiTypes.INT)
     def get_sprint_count(self, obj: User):
         return Sprint.objects.filter(
-            project_id__in=Project.objects.filter(members__username__contains=obj.username).values_list('id'),
+            project_id__in=Project.objects.filter(members=obj).values_list('id'),
             creator=obj.username).count()
 
     @extend_schema_field(OpenApiTypes.INT)
     def get_feature_count(self, obj: User):
         return WorkItem.objects.filter(sprint_id__in=Sprint.objects.filter(
-            project_id__in=Project.objects.filter(members__username__contains=obj.username).values_list(
+            project_id__in=Project.objects.filter(members=obj).values_list(
                 'id')).values_list('id'), creator=obj.username, work_item_type=0).count()
 
     @extend_schema_field(OpenApiTypes.INT)
     def get_task_count(self, obj: User):
         return WorkItem.objects.filter(sprint_id__in=Sprint.objects.filter(
-            project_id__in=Project.objects.filter(members__username__contains=obj.username).values_list(
+            project_id__in=Project.objects.filter(members=obj).values_list(
                 'id')).values_list('id'), creator=obj.username, work_item_type=1).count()
 
     @extend_schema_field(OpenApiTypes.INT)
     def get_bug_count(self, obj: User):
         return WorkItem.objects.filter(sprint_id__in=Sprint.objects.filter(
-            project_id__in=Project.objects.filter(members__username__contains=obj.username).values_list(
+            project_id__in=Project.objects.filter(members=obj).values_list(
                 'id')).values_list('id'), creator=obj.username, work_item_type=2).count()
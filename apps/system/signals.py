@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# @File    : signals.py
+# @Software: PyCharm
+# @Description:
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from system.models import Organization, Permission, Role, User
+from utils.drf_utils.conditional_get import bump_data_version
+from utils.drf_utils.permission_cache import bump_rbac_version
+from utils.drf_utils.tree_cache import bump_tree_version
+from utils.drf_utils.user_name_resolver import clear_process_user_name
+
+
+@receiver(m2m_changed, sender=Role.permissions.through)
+@receiver(m2m_changed, sender=User.roles.through)
+def invalidate_rbac_cache_on_m2m_changed(sender, action, **kwargs):
+    """
+    角色的权限、用户的角色发生变化时, 使用户权限缓存失效
+    """
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_rbac_version()
+
+
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+@receiver(post_delete, sender=Role)
+def invalidate_rbac_cache_on_permission_changed(sender, **kwargs):
+    """
+    权限的请求方法/请求路径发生变化或权限、角色被删除时, 使用户权限缓存失效
+    """
+    bump_rbac_version()
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def invalidate_tree_cache(sender, **kwargs):
+    """
+    组织架构/权限发生变化时, 使对应树形数据接口的缓存失效
+    在事务提交后递增版本号, 避免其他请求在提交前按新版本号缓存了旧数据
+    """
+    tree = sender._meta.label_lower
+    transaction.on_commit(lambda: bump_tree_version(tree))
+
+
+@receiver(post_save, sender=User)
+def clear_user_name_cache(sender, instance: User, **kwargs):
+    """
+    用户信息修改后, 清除进程内缓存的用户姓名
+    """
+    clear_process_user_name(instance.username)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_user_data_version(sender, update_fields=None, **kwargs):
+    """
+    用户姓名可能发生变化时, 使序列化结果包含用户姓名(*_name)的接口的ETag失效
+    登录时只更新last_login, 不处理
+    """
+    if update_fields is None or {'username', 'name'} & set(update_fields):
+        transaction.on_commit(lambda: bump_data_version('system.user'))
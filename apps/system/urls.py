@@ -11,6 +11,7 @@ from system.views.user import MyTokenObtainPairView, UserRegisterView, UserViewS
 from system.views.organization import OrganizationViewSet
 from system.views.permission import PermissionViewSet
 from system.views.role import RoleViewSet
+from system.views.search import GlobalSearchView
 
 router = routers.DefaultRouter()
 # 如果视图类中没有指定queryset，则需要手动指定basename
@@ -22,5 +23,6 @@ urlpatterns = [
     path('users/login/', MyTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('users/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('users/register/', UserRegisterView.as_view(), name='user_register'),
+    path('search/', GlobalSearchView.as_view(), name='global-search'),
     path('', include(router.urls)),
 ]
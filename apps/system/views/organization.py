@@ -9,6 +9,7 @@ from system.serializers.organizations import OrganizationCreateUpdateSerializer,
     OrganizationTreeListSerializer, OrganizationBaseRetrieveSerializer
 from system.models import Organization
 from utils.drf_utils.model_utils import generate_object_tree_data
+from utils.drf_utils.tree_cache import get_cached_tree_payload
 
 
 class OrganizationNameFilter(filters.FilterSet):
@@ -96,18 +97,20 @@ class OrganizationViewSet(ModelViewSet):
     @action(methods=['get'], detail=False, url_path='tree')
     def get_organization_tree_list(self, request, *args, **kwargs):
         """
-        select organization tree list
+        select organization tree list, 按查询参数缓存, organization数据变化时缓存失效
         """
+        data = get_cached_tree_payload(Organization._meta.label_lower, request, self.get_tree_list_data)
+        return JsonResponse(data=data, msg='success', code=20000)
+
+    def get_tree_list_data(self):
         queryset = self.filter_queryset(self.get_queryset())
         serializer = self.get_serializer(queryset, many=True)
         results = generate_object_tree_data(serializer.data)
         if results:
-            return JsonResponse(data=results, msg='success', code=20000)
-        else:
-            # 生成tree型数据报错时，按照非tree格式、drf原始分页格式来返回数据
-            page = self.paginate_queryset(queryset)
-            if page is not None:
-                serializer = self.get_serializer(page, many=True)
-                res = self.get_paginated_response(serializer.data)
-                return JsonResponse(data=res.data, msg='success', code=20000)
-            return JsonResponse(data=serializer.data, msg='success', code=20000)
+            return results
+        # 生成tree型数据报错时，按照非tree格式、drf原始分页格式来返回数据
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data).data
+        return serializer.data
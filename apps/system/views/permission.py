@@ -11,6 +11,7 @@ from system.serializers.permissions import PermissionCreateUpdateSerializer, Per
     GetPermissionsWithRoleIdsSerializer, PermissionTreeSerializer, PermissionBaseRetrieveSerializer
 from system.models import Permission, Role
 from utils.drf_utils.model_utils import generate_object_tree_data
+from utils.drf_utils.tree_cache import get_cached_tree_payload
 
 logger = logging.getLogger('my_debug_logger')
 
@@ -122,18 +123,20 @@ class PermissionViewSet(ModelViewSet):
     @action(methods=['get'], detail=False, url_path='tree')
     def get_permission_tree_list(self, request, *args, **kwargs):
         """
-        select permission tree list
+        select permission tree list, 按查询参数缓存, permission数据变化时缓存失效
         """
+        data = get_cached_tree_payload(Permission._meta.label_lower, request, self.get_tree_list_data)
+        return JsonResponse(data=data, msg='success', code=20000)
+
+    def get_tree_list_data(self):
         queryset = self.filter_queryset(self.get_queryset())
         serializer = self.get_serializer(queryset, many=True)
         results = generate_object_tree_data(serializer.data)
         if results:
-            return JsonResponse(data=results, msg='success', code=20000)
-        else:
-            # 生成tree型数据报错时，按照非tree格式、drf原始分页格式来返回数据
-            page = self.paginate_queryset(queryset)
-            if page is not None:
-                serializer = self.get_serializer(page, many=True)
-                res = self.get_paginated_response(serializer.data)
-                return JsonResponse(data=res.data, msg='success', code=20000)
-            return JsonResponse(data=serializer.data, msg='success', code=20000)
+            return results
+        # 生成tree型数据报错时，按照非tree格式、drf原始分页格式来返回数据
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data).data
+        return serializer.data
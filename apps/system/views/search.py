@@ -0,0 +1,45 @@
+from collections import OrderedDict
+
+from drf_spectacular.utils import extend_schema
+from rest_framework.generics import GenericAPIView
+
+from system.serializers.search import GlobalSearchQuerySerializer, GlobalSearchSerializer
+from sugar.settings import SEARCH_MAX_RESULTS
+from utils.django_utils.search_index import search_documents, search_indexes
+from utils.drf_utils.custom_json_response import JsonResponse, unite_response_format_schema
+
+
+@extend_schema(tags=['全局搜索'])
+class GlobalSearchView(GenericAPIView):
+    serializer_class = GlobalSearchQuerySerializer
+    filter_backends = []
+    pagination_class = None
+
+    @extend_schema(parameters=[GlobalSearchQuerySerializer],
+                   responses=unite_response_format_schema('global-search', GlobalSearchSerializer))
+    def get(self, request, *args, **kwargs):
+        """
+        全局搜索
+        * 一次查询在项目、迭代、工作项、用户、设备中搜索, 结果按数据类型分组, 分组按最佳匹配的相关度排序
+        * 只搜索用户拥有列表接口权限的数据类型, 项目/迭代/工作项只返回用户作为项目成员可以访问的数据
+        * 每组的count为用户可以访问的匹配数据的数量, 超过SEARCH_MAX_RESULTS条时count为SEARCH_MAX_RESULTS, has_more为true
+        """
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        size = serializer.validated_data.get('size')
+        types = serializer.validated_data.get('types')
+        doc_types = [doc_type.strip() for doc_type in types.split(',') if doc_type.strip()] if types else None
+        grouped_ids = OrderedDict()
+        # 多取一条用于判断匹配的数据是否超过SEARCH_MAX_RESULTS条
+        for doc_type, object_id in search_documents(request.user, serializer.validated_data.get('q'),
+                                                    limit=SEARCH_MAX_RESULTS + 1, doc_types=doc_types):
+            grouped_ids.setdefault(doc_type, []).append(object_id)
+        results = []
+        for doc_type, ids in grouped_ids.items():
+            search_index = search_indexes.get(doc_type)
+            rows = {row.get('id'): row for row in search_index.model.objects.filter(pk__in=ids[:size]).values(
+                *search_index.result_fields)}
+            results.append({'type': doc_type, 'type_name': search_index.model._meta.verbose_name,
+                            'count': min(len(ids), SEARCH_MAX_RESULTS), 'has_more': len(ids) > SEARCH_MAX_RESULTS,
+                            'results': [rows.get(pk) for pk in ids[:size] if pk in rows]})
+        return JsonResponse(data={'results': results}, msg='success', code=20000)
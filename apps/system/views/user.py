@@ -12,6 +12,7 @@ from system.serializers.users import UserRegisterSerializer, MyTokenObtainPairSe
     UserRetrieveSerializer, UserListDestroySerializer, UserResetPasswordSerializer, UserThinRetrieveSerializer, \
     GetAllUserSerializer, UserStatisticsSerializer
 from system.models import User
+from system.closure_trees import organization_closure
 
 
 # Create your views here.
@@ -83,10 +84,14 @@ class UserRegisterView(CreateAPIView):
 class UserFilter(filters.FilterSet):
     username = filters.CharFilter(field_name='username', lookup_expr='icontains',
                                   label='用户名(模糊搜索且不区分大小写)')
+    department_id = filters.NumberFilter(method='filter_department', label='部门ID(包含其所有子部门的用户)')
 
     class Meta:
         model = User
-        fields = ['username']
+        fields = ['username', 'department_id']
+
+    def filter_department(self, queryset, name, value):
+        return queryset.filter(department__in=organization_closure.descendants(value))
 
 
 @extend_schema(tags=['用户管理'])
@@ -2,9 +2,9 @@ from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_field
 from drf_spectacular.types import OpenApiTypes
 
-from system.models import User
 from task.models import TaskResult
 from utils.drf_utils.base_model_serializer import BaseModelSerializer
+from utils.drf_utils.user_name_resolver import UserNameField
 
 
 class TaskResultCreateUpdateSerializer(BaseModelSerializer):
@@ -15,17 +15,14 @@ class TaskResultCreateUpdateSerializer(BaseModelSerializer):
 
 
 class TaskResultRetrieveSerializer(BaseModelSerializer):
-    creator_name = serializers.SerializerMethodField(help_text='创建人姓名')
+    creator_name = UserNameField(source='creator', help_text='创建人姓名')
     time_duration = serializers.SerializerMethodField(help_text='任务耗时')
+    sparse_method_field_sources = {'time_duration': ('create_time', 'update_time')}
 
     class Meta:
         model = TaskResult
         fields = '__all__'
 
-    @extend_schema_field(OpenApiTypes.STR)
-    def get_creator_name(self, obj: TaskResult):
-        return User.objects.filter(username=obj.creator).first().name
-
     @extend_schema_field(OpenApiTypes.STR)
     def get_time_duration(self, obj: TaskResult):
         if obj.create_time and obj.update_time:
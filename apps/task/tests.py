@@ -1,3 +1,64 @@
+import datetime
+from urllib.parse import parse_qs, urlparse
+
+from django.db.models import F
 from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from task.models import TaskResult
+from utils.drf_utils.my_page_number_pagination import MyPageNumberPagination
+
+
+class TaskResultCursorPaginationTestCase(TestCase):
+    """
+    任务执行结果列表(-create_time)的游标分页
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        base_time = datetime.datetime(2026, 1, 1, 10, 0, 0, 123000)
+        # 同一毫秒内的数据(微秒不同及完全相同), 以及前后各一条
+        create_times = [base_time + datetime.timedelta(microseconds=microseconds)
+                        for microseconds in (456, 456, 456, 789, 789, 789)]
+        create_times += [base_time - datetime.timedelta(seconds=1), base_time + datetime.timedelta(seconds=1)]
+        for create_time in create_times:
+            task_result = TaskResult.objects.create(creator='admin', modifier='admin')
+            TaskResult.objects.filter(pk=task_result.pk).update(create_time=create_time)
+
+    @staticmethod
+    def paginate(queryset, cursor: str = '', size: int = 2):
+        request = Request(APIRequestFactory().get('/api/v1/task-results/', {'cursor': cursor, 'size': size}))
+        paginator = MyPageNumberPagination()
+        results = paginator.paginate_queryset(queryset, request)
+        return paginator, results, paginator.get_paginated_response([]).data
+
+    @staticmethod
+    def get_cursor(link):
+        return parse_qs(urlparse(link).query).get('cursor')[0] if link else None
+
+    def test_walk_cursor_over_tied_timestamps(self):
+        queryset = TaskResult.objects.order_by('-create_time')
+        expected_pks = list(queryset.order_by('-create_time', 'pk').values_list('pk', flat=True))
+        pages, cursor = [], ''
+        while cursor is not None:
+            _, results, data = self.paginate(queryset, cursor)
+            pages.append([task_result.pk for task_result in results])
+            cursor = self.get_cursor(data.get('next'))
+        self.assertEqual([pk for page in pages for pk in page], expected_pks)
+        # 从最后一页沿previous链接返回第一页
+        cursor, walked_back = self.get_cursor(data.get('previous')), []
+        while cursor is not None:
+            _, results, data = self.paginate(queryset, cursor)
+            walked_back = [task_result.pk for task_result in results] + walked_back
+            cursor = self.get_cursor(data.get('previous'))
+        self.assertEqual(walked_back, [pk for page in pages[:-1] for pk in page])
 
-# Create your tests here.
+    def test_fallback_to_page_number_for_unsupported_ordering(self):
+        # 按表达式或可为NULL的字段排序时退化为页码分页
+        for queryset in (TaskResult.objects.order_by(F('create_time').desc()),
+                         TaskResult.objects.order_by('-device')):
+            paginator, results, data = self.paginate(queryset)
+            self.assertFalse(paginator.cursor_mode)
+            self.assertEqual(len(results), 2)
+            self.assertEqual(data.get('current_page'), 1)
@@ -4,6 +4,7 @@ from drf_spectacular.utils import extend_schema
 from django_filters import rest_framework as filters
 
 from utils.drf_utils.custom_json_response import JsonResponse, unite_response_format_schema
+from utils.drf_utils.values_serializer import ValuesListModelMixin
 from task.serializers.task_results import TaskResultCreateUpdateSerializer, TaskResultRetrieveSerializer
 from task.models import TaskResult
 
@@ -25,9 +26,11 @@ class TaskResultFilter(filters.FilterSet):
 
 
 @extend_schema(tags=['任务执行结果管理'])
-class TaskResultViewSet(ModelViewSet):
+class TaskResultViewSet(ValuesListModelMixin, ModelViewSet):
     queryset = TaskResult.objects.all().order_by('-create_time')
     filterset_class = TaskResultFilter
+    # 列表接口使用values()快速序列化
+    values_serializer_actions = ['list']
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -1,6 +1,7 @@
 import os
 
 from celery import Celery
+from click import Option
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sugar.settings')
@@ -15,3 +16,8 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
+
+# 批量写入工作项变更记录的consumer, 启动worker时指定--changelog-consumer后启用
+app.user_options['worker'].add(Option(('--changelog-consumer',), is_flag=True, default=False,
+                                      help='Consume changelog_queue and batch insert work item changelogs.'))
+app.steps['consumer'].add('pm.changelog_writer:ChangelogConsumerStep')
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 import os
 import sys
 import environ
+from celery.schedules import crontab
 from datetime import timedelta
 from pathlib import Path
 
@@ -89,6 +90,11 @@ REST_FRAMEWORK = {
         # 指定使用JWT认证
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    # 使用基于orjson的JSON渲染器(未安装orjson时自动退化为DRF默认的JSONRenderer)
+    'DEFAULT_RENDERER_CLASSES': [
+        'utils.drf_utils.custom_json_renderer.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     # 在全局指定分页的引擎
     'DEFAULT_PAGINATION_CLASS': 'utils.drf_utils.my_page_number_pagination.MyPageNumberPagination',
     # 同时必须指定每页显示的条数
@@ -104,7 +110,9 @@ REST_FRAMEWORK = {
             'utils.drf_utils.custom_permissions.RbacPermission',
         ],
     # 指定drf使用的过滤后端
-    'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    # SparseFieldsFilterBackend: 根据fields/omit参数裁剪查询的数据库列
+    'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend',
+                                'utils.drf_utils.sparse_fields.SparseFieldsFilterBackend'],
     # 接口限流
     'DEFAULT_THROTTLE_CLASSES': [
         'rest_framework.throttling.AnonRateThrottle',
@@ -136,9 +144,32 @@ WHITE_URL_LIST = [
     f'{API_PREFIX}/system/users/token/refresh/', f'{API_PREFIX}/system/users/register/',
     f'{API_PREFIX}/system/users/profile/', f'{API_PREFIX}/system/users/reset-password/',
     f'{API_PREFIX}/system/permissions/get-user-permissions/', f'{API_PREFIX}/system/users/update-profile/',
-    f'{API_PREFIX}/system/users/statistics/'
+    f'{API_PREFIX}/system/users/statistics/',
+    # 全局搜索在接口内部按用户的接口权限及项目成员过滤数据
+    f'{API_PREFIX}/system/search/'
 ]
 
+# 序列化器中用户姓名(username -> name)的进程内缓存过期时间(秒), 设置为0时不启用
+USER_NAME_CACHE_TIMEOUT = 10
+
+# 列表接口分页总数: 同一过滤条件的精确总数缓存时间(秒), 设置为0时不缓存
+PAGINATION_COUNT_CACHE_TIMEOUT = 30
+# 列表接口分页总数: 无过滤条件时, 表统计信息估算的总数超过该值则直接使用估算值(仅支持MySQL/PostgreSQL)
+PAGINATION_ESTIMATE_COUNT_THRESHOLD = 100000
+# 批量新增/修改/删除接口单次请求的最大数据条数
+BULK_OPERATION_MAX_SIZE = 500
+# 全文搜索后端: 默认使用倒排索引表(支持所有数据库), MySQL可使用FULLTEXT索引(ngram parser)
+# 'utils.django_utils.search_index.MySQLFulltextSearchBackend'
+SEARCH_BACKEND = 'utils.django_utils.search_index.InvertedIndexSearchBackend'
+# 全文搜索最多返回的数据条数(按相关度排序)
+SEARCH_MAX_RESULTS = 1000
+# 树形数据(e.g. 工作项的父子关系)子树查询的最大深度, 防止parent数据成环时无限递归
+TREE_QUERY_MAX_DEPTH = 32
+# 组织架构/权限树形数据接口的redis缓存过期时间(秒), 数据变化时通过递增版本号立即失效
+TREE_CACHE_TIMEOUT = 60 * 60
+# 工作项排序值超过该长度时, 在后台重新平衡所有工作项的排序值(排序值字段最大长度为64)
+WORK_ITEM_RANK_REBALANCE_LENGTH = 32
+
 AUTHENTICATION_BACKENDS = [
     # 自定义用户认证后端
     'utils.django_utils.custom_user_authentication_backend.MyCustomUserAuthBackend',
@@ -231,22 +262,36 @@ CELERY_BROKER_URL = f"amqp://{env('RABBITMQ_USER')}:{env('RABBITMQ_PASSWORD')}@{
 CELERY_ENABLE_UTC = False
 DJANGO_CELERY_BEAT_TZ_AWARE = False
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+# 固定的定时任务, 启动beat时同步到数据库
+CELERY_BEAT_SCHEDULE = {
+    # 每小时刷新一次迭代当天的快照, 当天最后一次执行的结果即为当天结束时的状态
+    'pm-snapshot-sprints': {'task': 'pm.tasks.snapshot_sprints', 'schedule': crontab(minute=55)},
+}
 CELERY_TASK_ROUTES = {
     'device.tasks.check_device_status': {'queue': 'check_device_status_queue', 'routing_key': 'device_status'},
     'device.tasks.deploy_agent_to_device': {'queue': 'deploy_agent_to_device_queue',
                                             'routing_key': 'deploy_agent'},
+    'pm.tasks.rebalance_work_item_ranks': {'queue': 'pm_maintenance_queue', 'routing_key': 'pm_maintenance'},
+    'pm.tasks.snapshot_sprints': {'queue': 'pm_maintenance_queue', 'routing_key': 'pm_maintenance'},
 }
 CELERY_TASK_QUEUES = {
     # queue name : { ...configs }
     'check_device_status_queue': {'exchange': 'device_exchange', 'exchange_type': 'direct', 'durable': True,
                                   'auto_delete': False, 'routing_key': 'device_status'},
     'deploy_agent_to_device_queue': {'exchange': 'device_exchange', 'exchange_type': 'direct', 'durable': True,
-                                     'auto_delete': False, 'routing_key': 'deploy_agent'}
+                                     'auto_delete': False, 'routing_key': 'deploy_agent'},
+    'pm_maintenance_queue': {'exchange': 'pm_exchange', 'exchange_type': 'direct', 'durable': True,
+                             'auto_delete': False, 'routing_key': 'pm_maintenance'}
 }
 
 # 异步任务相关配置
 TASK_CHECK_DEVICE_STATUS_TIME = env('TASK_CHECK_DEVICE_STATUS_TIME')
 TASK_CHECK_DEVICE_STATUS_RESULT_TIMEOUT = env('TASK_CHECK_DEVICE_STATUS_RESULT_TIMEOUT')
+# 工作项变更记录是否通过变更记录队列异步批量写入(需启动带--changelog-consumer参数的worker)
+TASK_CHANGELOG_WRITE_BEHIND = env.bool('TASK_CHANGELOG_WRITE_BEHIND', default=False)
+# 变更记录批量写入的条数及时间间隔(毫秒), 满足其一即写入
+TASK_CHANGELOG_BATCH_SIZE = env.int('TASK_CHANGELOG_BATCH_SIZE', default=200)
+TASK_CHANGELOG_BATCH_INTERVAL_MS = env.int('TASK_CHANGELOG_BATCH_INTERVAL_MS', default=500)
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/3.2/howto/static-files/
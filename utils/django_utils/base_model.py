@@ -2,6 +2,8 @@
 # @File    : base_model.py
 # @Software: PyCharm
 # @Description:
+from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.db import models
 
 
@@ -9,12 +11,90 @@ class BaseModel(models.Model):
     """
     数据库表公共字段
     """
+    # 字符串类型的用户名字段 -> 对应的用户外键字段
+    # 过渡期间两者同时写入, 读取用户信息时优先使用外键字段(select_related)
+    USER_FOREIGN_KEY_FIELDS = {'creator': 'creator_user', 'modifier': 'modifier_user'}
+
     create_time = models.DateTimeField(auto_now_add=True, verbose_name='创建时间', help_text='创建时间')
     update_time = models.DateTimeField(auto_now=True, verbose_name='更新时间', help_text='更新时间')
     creator = models.CharField(max_length=150, verbose_name='创建人', help_text='创建人')
     modifier = models.CharField(max_length=150, verbose_name='最后修改人', help_text='最后修改人')
+    creator_user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, editable=False,
+                                     on_delete=models.SET_NULL, related_name='+', verbose_name='创建人(用户)',
+                                     help_text='创建人(用户)')
+    modifier_user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, editable=False,
+                                      on_delete=models.SET_NULL, related_name='+', verbose_name='最后修改人(用户)',
+                                      help_text='最后修改人(用户)')
 
     class Meta:
         # 设置当前模型类为抽象类，用于其他模型类来继承，数据库迁移时不会创建当前模型类的表
         abstract = True
         verbose_name = '公共字段表'
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 记录从数据库加载时的用户名, 保存时只对发生变化的用户名重新查询用户外键
+        instance._loaded_usernames = {name_field: getattr(instance, name_field) for name_field in
+                                      cls.USER_FOREIGN_KEY_FIELDS if name_field in field_names}
+        return instance
+
+    def get_pending_user_fields(self):
+        """
+        获取需要重新同步用户外键的用户名字段
+        @return: {用户名字段: username}
+        """
+        loaded_usernames = getattr(self, '_loaded_usernames', {})
+        pending_fields = {}
+        for name_field, fk_field in self.USER_FOREIGN_KEY_FIELDS.items():
+            username = getattr(self, name_field)
+            fk_value = getattr(self, f'{fk_field}_id')
+            if name_field in loaded_usernames and loaded_usernames.get(name_field) == username and (
+                    fk_value is not None or not username):
+                continue
+            pending_fields[name_field] = username
+        return pending_fields
+
+    def apply_user_foreign_keys(self, pending_fields: dict, users: dict):
+        for name_field, username in pending_fields.items():
+            setattr(self, self.USER_FOREIGN_KEY_FIELDS.get(name_field), users.get(username))
+        self._loaded_usernames = {name_field: getattr(self, name_field) for name_field in self.USER_FOREIGN_KEY_FIELDS}
+        return [self.USER_FOREIGN_KEY_FIELDS.get(name_field) for name_field in pending_fields]
+
+    def sync_user_foreign_keys(self):
+        """
+        根据字符串类型的用户名字段同步用户外键字段, 所有需要同步的用户名只查询一次
+        @return: 发生同步的外键字段名列表
+        """
+        pending_fields = self.get_pending_user_fields()
+        if not pending_fields:
+            return []
+        usernames = {username for username in pending_fields.values() if username}
+        users = {user.username: user for user in
+                 get_user_model().objects.filter(username__in=usernames)} if usernames else {}
+        return self.apply_user_foreign_keys(pending_fields, users)
+
+    @classmethod
+    def bulk_sync_user_foreign_keys(cls, instances):
+        """
+        批量同步用户外键字段(bulk_create/bulk_update不会调用save()), 所有实例的用户名只查询一次
+        @return: 发生同步的外键字段名集合
+        """
+        pending_data = [(instance, instance.get_pending_user_fields()) for instance in instances]
+        usernames = {username for _, pending_fields in pending_data for username in pending_fields.values() if username}
+        users = {user.username: user for user in
+                 get_user_model().objects.filter(username__in=usernames)} if usernames else {}
+        synced_fields = set()
+        for instance, pending_fields in pending_data:
+            if pending_fields:
+                synced_fields.update(instance.apply_user_foreign_keys(pending_fields, users))
+        return synced_fields
+
+    def save(self, *args, **kwargs):
+        synced_fields = self.sync_user_foreign_keys()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and synced_fields:
+            kwargs['update_fields'] = set(update_fields) | {
+                fk_field for name_field, fk_field in self.USER_FOREIGN_KEY_FIELDS.items()
+                if name_field in update_fields and fk_field in synced_fields}
+        super().save(*args, **kwargs)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# @File    : change_tracker.py
+# @Software: PyCharm
+# @Description: 字段级变更追踪: 只快照需要记录的字段, 与validated_data对比生成变更记录
+from django.db import models
+from rest_framework import serializers
+
+# 日期时间类字段按DRF默认格式输出, 与序列化结果一致
+REPRESENTATION_FIELD_CLASSES = {models.DateTimeField: serializers.DateTimeField,
+                                models.DateField: serializers.DateField,
+                                models.TimeField: serializers.TimeField}
+
+
+class FieldChangeTracker:
+    """
+    字段级变更追踪, 每个模型创建一次(e.g. 作为ViewSet的类属性), 选项名称在创建时预先计算
+    1.snapshot(): 在保存之前快照已加载的模型对象中需要追踪的字段, 不查询数据库(多对多字段除外)
+    2.diff(): 用快照与validated_data对比, 只对比本次提交的字段(兼容partial update)
+    e.g. tracker = FieldChangeTracker(WorkItem, {'name': '标题', 'priority': '优先级'})
+         snapshot = tracker.snapshot(instance)
+         serializer.save()
+         changelog = tracker.diff(snapshot, serializer.validated_data)
+    """
+    # 值为None时变更记录中显示的内容
+    null_display = 'null'
+
+    def __init__(self, model, fields: dict):
+        """
+        @param model: 模型类
+        @param fields: {需要追踪的字段名: 字段描述}
+        """
+        self.model = model
+        self.descriptions = dict(fields)
+        self.model_fields = {name: model._meta.get_field(name) for name in fields}
+        self.choice_labels = {name: dict(field.flatchoices) for name, field in self.model_fields.items()
+                              if getattr(field, 'choices', None)}
+        self.representation_fields = {}
+        for name, field in self.model_fields.items():
+            for model_field_class, serializer_field_class in REPRESENTATION_FIELD_CLASSES.items():
+                if isinstance(field, model_field_class):
+                    self.representation_fields[name] = serializer_field_class()
+                    break
+
+    def get_value(self, name: str, value):
+        """
+        把模型对象的属性值或validated_data中的值转换为可对比的值(外键、多对多转换为主键)
+        """
+        field = self.model_fields.get(name)
+        if value is None:
+            return None
+        if field.many_to_many:
+            return sorted(obj.pk if isinstance(obj, models.Model) else obj for obj in value)
+        if field.is_relation:
+            return value.pk if isinstance(value, models.Model) else value
+        return value
+
+    def snapshot(self, instance):
+        """
+        @return: {字段名: 值}
+        """
+        data = {}
+        for name, field in self.model_fields.items():
+            if field.many_to_many:
+                data[name] = self.get_value(name, getattr(instance, name).all())
+            elif field.is_relation:
+                data[name] = getattr(instance, field.attname)
+            else:
+                data[name] = getattr(instance, name)
+        return data
+
+    def display(self, name: str, value):
+        if value is None:
+            return self.null_display
+        if name in self.choice_labels:
+            return self.choice_labels.get(name).get(value, value)
+        if name in self.representation_fields:
+            return self.representation_fields.get(name).to_representation(value)
+        return value
+
+    def diff(self, snapshot: dict, validated_data: dict):
+        """
+        @param snapshot: snapshot()的返回值
+        @param validated_data: 序列化器校验后的数据
+        @return: [{'key': 字段名, 'desc': 字段描述, 'origin': 修改前的值, 'current': 修改后的值}]
+        """
+        results = []
+        for name in self.model_fields:
+            if name not in validated_data:
+                continue
+            origin = snapshot.get(name)
+            current = self.get_value(name, validated_data.get(name))
+            if origin != current:
+                results.append({'key': name, 'desc': self.descriptions.get(name), 'origin': self.display(name, origin),
+                                'current': self.display(name, current)})
+        return results
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+# @File    : closure_table.py
+# @Software: PyCharm
+# @Description: 树形数据(自关联parent)的闭包表: 后代/祖先/深度查询均为一次索引查询, 修改父节点时在事务中增量维护
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Max
+from django.db.models.signals import post_save, post_delete
+
+# 已声明的闭包表 {tree: ClosureTree}
+closure_trees = {}
+
+
+def get_closure_model():
+    from system.models import TreeClosure
+    return TreeClosure
+
+
+def iter_closure_rows(parents: dict):
+    """
+    根据 {节点ID: 父节点ID} 计算闭包表数据
+    父子关系成环时, 沿parent向上查找到重复的节点为止
+    @return: 生成器 (祖先ID, 后代ID, 深度)
+    """
+    for node_id in parents:
+        ancestor_id, depth, visited = node_id, 0, set()
+        while ancestor_id in parents and ancestor_id not in visited:
+            visited.add(ancestor_id)
+            yield ancestor_id, node_id, depth
+            ancestor_id, depth = parents.get(ancestor_id), depth + 1
+
+
+def rebuild_closure(model, closure_model, tree: str, parent_field: str = 'parent', batch_size: int = 1000):
+    """
+    一次查询出所有节点的父节点, 在内存中计算后分批写入闭包表, 数据迁移中可以传入历史模型
+    @param model: 树形数据的模型类
+    @param closure_model: 闭包表模型类
+    @param tree: 树形数据类型, e.g. system.organization
+    @return: 写入的闭包表数据条数
+    """
+    parents = dict(model._default_manager.values_list('pk', model._meta.get_field(parent_field).attname))
+    rows = iter_closure_rows(parents)
+    count = 0
+    with transaction.atomic():
+        closure_model.objects.filter(tree=tree).delete()
+        while True:
+            batch = [closure_model(tree=tree, ancestor_id=ancestor_id, descendant_id=descendant_id, depth=depth)
+                     for ancestor_id, descendant_id, depth in islice(rows, batch_size)]
+            if not batch:
+                break
+            closure_model.objects.bulk_create(batch)
+            count += len(batch)
+    return count
+
+
+def update_tree_closure(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    新增节点或父节点发生变化时, 维护闭包表(与数据修改在同一事务中)
+    loaddata导入数据时不处理, 导入后执行 python manage.py rebuild_tree_closure
+    """
+    closure_tree = closure_trees.get(sender._meta.label_lower)
+    if raw or (update_fields is not None and closure_tree.parent_field not in update_fields):
+        return
+    parent_id = getattr(instance, closure_tree.parent_attname)
+    if created:
+        closure_tree.insert_node(instance.pk, parent_id)
+    elif closure_tree.get_parent_id(instance.pk) != parent_id:
+        closure_tree.move_node(instance.pk, parent_id)
+
+
+def remove_tree_closure(sender, instance, **kwargs):
+    closure_trees.get(sender._meta.label_lower).remove_node(instance.pk)
+
+
+class ClosureTree:
+    """
+    树形数据的闭包表声明
+    e.g. organization_closure = ClosureTree(Organization)
+    在模型所属应用的AppConfig.ready()中调用connect_signals()后, 模型对象新增/修改父节点/删除时自动维护闭包表
+    queryset.update()修改父节点后需执行rebuild()
+    """
+
+    def __init__(self, model, parent_field: str = 'parent'):
+        self.model = model
+        self.parent_field = parent_field
+        self.parent_attname = model._meta.get_field(parent_field).attname
+        self.tree = model._meta.label_lower
+        closure_trees[self.tree] = self
+
+    def connect_signals(self):
+        post_save.connect(update_tree_closure, sender=self.model, dispatch_uid=f'update_tree_closure:{self.tree}')
+        post_delete.connect(remove_tree_closure, sender=self.model, dispatch_uid=f'remove_tree_closure:{self.tree}')
+
+    def get_queryset(self):
+        return get_closure_model().objects.filter(tree=self.tree)
+
+    def descendants(self, node_id, include_self: bool = True):
+        """
+        @return: 后代ID的子查询, e.g. User.objects.filter(department__in=organization_closure.descendants(1))
+        """
+        queryset = self.get_queryset().filter(ancestor_id=node_id)
+        if not include_self:
+            queryset = queryset.filter(depth__gt=0)
+        return queryset.values('descendant_id')
+
+    def ancestors(self, node_id, include_self: bool = True):
+        """
+        @return: 祖先ID的子查询
+        """
+        queryset = self.get_queryset().filter(descendant_id=node_id)
+        if not include_self:
+            queryset = queryset.filter(depth__gt=0)
+        return queryset.values('ancestor_id')
+
+    def is_descendant(self, node_id, ancestor_id):
+        """
+        node_id是否为ancestor_id的后代(包含其本身)
+        """
+        return self.get_queryset().filter(ancestor_id=ancestor_id, descendant_id=node_id).exists()
+
+    def get_depth(self, node_id):
+        """
+        @return: 节点的深度, 根节点为0
+        """
+        return self.get_queryset().filter(descendant_id=node_id).aggregate(depth=Max('depth')).get('depth') or 0
+
+    def get_parent_id(self, node_id):
+        return self.get_queryset().filter(descendant_id=node_id, depth=1).values_list(
+            'ancestor_id', flat=True).first()
+
+    def create_rows(self, rows):
+        closure_model = get_closure_model()
+        closure_model.objects.bulk_create([
+            closure_model(tree=self.tree, ancestor_id=ancestor_id, descendant_id=descendant_id, depth=depth)
+            for ancestor_id, descendant_id, depth in rows], batch_size=1000)
+
+    def insert_node(self, node_id, parent_id):
+        """
+        新增节点: 父节点的所有祖先都是新节点的祖先
+        """
+        rows = [(node_id, node_id, 0)]
+        if parent_id is not None:
+            rows.extend((ancestor_id, node_id, depth + 1) for ancestor_id, depth in
+                        self.get_queryset().filter(descendant_id=parent_id).values_list('ancestor_id', 'depth'))
+        self.create_rows(rows)
+
+    def move_node(self, node_id, parent_id):
+        """
+        修改父节点: 删除子树与原祖先之间的关系, 再建立子树与新父节点的所有祖先之间的关系
+        """
+        with transaction.atomic():
+            subtree = list(self.get_queryset().filter(ancestor_id=node_id).values_list('descendant_id', 'depth'))
+            if not subtree:
+                # 闭包表中还没有该节点(e.g. 导入数据后尚未重建闭包表)
+                subtree = [(node_id, 0)]
+                self.create_rows([(node_id, node_id, 0)])
+            subtree_ids = [descendant_id for descendant_id, _ in subtree]
+            if parent_id in subtree_ids:
+                raise ValueError(f'{self.tree}: 父节点{parent_id}不能为节点{node_id}本身或其后代')
+            old_ancestor_ids = list(self.get_queryset().filter(descendant_id=node_id, depth__gt=0).values_list(
+                'ancestor_id', flat=True))
+            if old_ancestor_ids:
+                self.get_queryset().filter(ancestor_id__in=old_ancestor_ids, descendant_id__in=subtree_ids).delete()
+            if parent_id is not None:
+                ancestors = list(self.get_queryset().filter(descendant_id=parent_id).values_list('ancestor_id', 'depth'))
+                self.create_rows((ancestor_id, descendant_id, ancestor_depth + depth + 1)
+                                 for ancestor_id, ancestor_depth in ancestors for descendant_id, depth in subtree)
+
+    def remove_node(self, node_id):
+        """
+        删除节点: 子节点的parent已被置为NULL(on_delete=SET_NULL), 子树成为新的树, 删除子树与该节点及其祖先之间的关系
+        """
+        with transaction.atomic():
+            ancestor_ids = list(self.get_queryset().filter(descendant_id=node_id).values_list('ancestor_id', flat=True))
+            descendant_ids = list(self.get_queryset().filter(ancestor_id=node_id).values_list(
+                'descendant_id', flat=True))
+            self.get_queryset().filter(ancestor_id__in=ancestor_ids or [node_id],
+                                       descendant_id__in=descendant_ids or [node_id]).delete()
+
+    def rebuild(self, batch_size: int = 1000):
+        return rebuild_closure(self.model, get_closure_model(), self.tree, self.parent_field, batch_size)
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+# @File    : counter_cache.py
+# @Software: PyCharm
+# @Description: 反规范化的计数字段(e.g. 工作项的评论数): 新增/删除/修改外键时使用F()表达式原子更新, 支持分批对账修复
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.signals import post_init, post_save, post_delete
+from django.utils import timezone
+
+# 每批对账的数据条数
+RECONCILE_CHUNK_SIZE = 1000
+# 已声明的计数字段 {子模型: [CounterCache, ...]}
+counter_caches = defaultdict(list)
+
+
+def reconcile_counter(parent_model, child_model, foreign_key: str, counter_field: str,
+                      chunk_size: int = RECONCILE_CHUNK_SIZE):
+    """
+    按主键顺序分批重新统计计数字段, 只更新与实际数量不一致的数据, 每批在单独的事务中提交
+    数据迁移中调用时需传入历史模型类(apps.get_model)
+    @param parent_model: 计数字段所在的模型类
+    @param child_model: 被计数的模型类
+    @param foreign_key: 子模型指向parent_model的外键字段名
+    @param counter_field: 计数字段名
+    @return: 修复的数据条数
+    """
+    fk_attname = child_model._meta.get_field(foreign_key).attname
+    last_pk = None
+    repaired_count = 0
+    while True:
+        queryset = parent_model._default_manager.order_by('pk')
+        if last_pk is not None:
+            queryset = queryset.filter(pk__gt=last_pk)
+        rows = list(queryset.values_list('pk', counter_field)[:chunk_size])
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        actual_counts = dict(child_model._default_manager.filter(**{f'{fk_attname}__in': [pk for pk, _ in rows]})
+                             .order_by().values_list(fk_attname).annotate(count=Count('pk')))
+        # {实际数量: [主键, ...]}
+        pk_groups = defaultdict(list)
+        for pk, count in rows:
+            if actual_counts.get(pk, 0) != count:
+                pk_groups[actual_counts.get(pk, 0)].append(pk)
+        with transaction.atomic():
+            for count, pks in pk_groups.items():
+                parent_model._default_manager.filter(pk__in=pks).update(**{counter_field: count})
+                repaired_count += len(pks)
+    return repaired_count
+
+
+def track_counter_foreign_keys(sender, instance, **kwargs):
+    for counter_cache in counter_caches.get(sender, []):
+        counter_cache.track(instance)
+
+
+def update_counter_caches(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    新增数据或外键发生变化时, 更新外键指向的数据的计数字段
+    loaddata导入数据时不处理, 导入后执行 python manage.py reconcile_counter_caches
+    """
+    if raw:
+        return
+    for counter_cache in counter_caches.get(sender, []):
+        if update_fields is None or counter_cache.foreign_key in update_fields:
+            counter_cache.sync([instance], created=created)
+
+
+def remove_counter_caches(sender, instance, **kwargs):
+    for counter_cache in counter_caches.get(sender, []):
+        counter_cache.remove([instance])
+
+
+class CounterCache:
+    """
+    计数字段声明, e.g. comment_counter = CounterCache(Comment, 'work_item', 'comment_count')
+    在模型所属应用的AppConfig.ready()中调用connect_signals()后, 模型对象保存/删除时自动更新计数
+    bulk_create/bulk_update后需手动调用sync()
+    计数变化时同时更新计数字段所在数据的auto_now字段(update_time), 使条件GET(ETag)感知到变化
+    """
+
+    def __init__(self, model, foreign_key: str, counter_field: str):
+        """
+        @param model: 被计数的模型类(子模型)
+        @param foreign_key: 子模型的外键字段名
+        @param counter_field: 外键指向的模型中的计数字段名
+        """
+        self.model = model
+        self.foreign_key = foreign_key
+        self.fk_attname = model._meta.get_field(foreign_key).attname
+        self.parent_model = model._meta.get_field(foreign_key).related_model
+        self.counter_field = counter_field
+        self.loaded_attr = f'_counter_loaded_{self.fk_attname}'
+        self.auto_now_fields = [field.attname for field in self.parent_model._meta.concrete_fields
+                                if getattr(field, 'auto_now', False)]
+        counter_caches[model].append(self)
+
+    def connect_signals(self):
+        # 同一子模型的多个计数字段共用一组信号处理函数
+        label = self.model._meta.label_lower
+        post_init.connect(track_counter_foreign_keys, sender=self.model,
+                          dispatch_uid=f'track_counter_foreign_keys:{label}')
+        post_save.connect(update_counter_caches, sender=self.model, dispatch_uid=f'update_counter_caches:{label}')
+        post_delete.connect(remove_counter_caches, sender=self.model, dispatch_uid=f'remove_counter_caches:{label}')
+
+    def track(self, instance):
+        """
+        记录外键的当前值, 保存时据此判断外键是否发生变化
+        延迟加载(only/defer)的外键不记录, 避免额外的查询
+        """
+        if self.fk_attname in instance.__dict__:
+            setattr(instance, self.loaded_attr, instance.__dict__.get(self.fk_attname))
+
+    def apply(self, deltas: dict):
+        """
+        @param deltas: {外键值: 计数变化量}, 变化量相同的数据一次UPDATE
+        """
+        pk_groups = defaultdict(list)
+        for pk, delta in deltas.items():
+            if pk is not None and delta:
+                pk_groups[delta].append(pk)
+        touched_values = {field_name: timezone.now() for field_name in self.auto_now_fields}
+        for delta, pks in pk_groups.items():
+            queryset = self.parent_model._default_manager.filter(pk__in=pks)
+            if delta < 0:
+                # 计数已经不准确(e.g. 直接修改了数据库)时不减为负数, 由对账命令修复
+                queryset = queryset.filter(**{f'{self.counter_field}__gte': -delta})
+            queryset.update(**{self.counter_field: F(self.counter_field) + delta}, **touched_values)
+
+    def sync(self, instances, created: bool = False):
+        """
+        新增或修改后更新计数: 新增时外键值+1, 外键变化时原外键值-1、新外键值+1
+        """
+        deltas = Counter()
+        for instance in instances:
+            current = getattr(instance, self.fk_attname)
+            loaded = None if created else getattr(instance, self.loaded_attr, current)
+            if loaded != current:
+                deltas[loaded] -= 1
+                deltas[current] += 1
+            self.track(instance)
+        self.apply(deltas)
+
+    def remove(self, instances):
+        """
+        删除后外键值-1
+        """
+        counts = Counter(getattr(instance, self.loaded_attr, getattr(instance, self.fk_attname))
+                         for instance in instances)
+        self.apply({pk: -count for pk, count in counts.items()})
+
+    def reconcile(self, chunk_size: int = RECONCILE_CHUNK_SIZE):
+        return reconcile_counter(self.parent_model, self.model, self.foreign_key, self.counter_field, chunk_size)
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# @File    : lexorank.py
+# @Software: PyCharm
+# @Description: 字典序排序值(LexoRank风格): 在两个排序值之间生成新的排序值, 拖拽排序时只需修改被移动的一条数据
+# 排序值为由RANK_ALPHABET组成的字符串, 按字典序排序, 看作36进制小数(0.xxx), 不以'0'结尾, 因此任意两个不同的排序值之间总能插入新值
+RANK_ALPHABET = '0123456789abcdefghijklmnopqrstuvwxyz'
+RANK_BASE = len(RANK_ALPHABET)
+
+
+def _midpoint(before: str, after: str = None):
+    if after:
+        # 跳过公共前缀(before较短时按'0'补齐)
+        n = 0
+        while n < len(after) and (before[n] if n < len(before) else RANK_ALPHABET[0]) == after[n]:
+            n += 1
+        if n > 0:
+            return after[:n] + _midpoint(before[n:], after[n:])
+    digit_before = RANK_ALPHABET.index(before[0]) if before else 0
+    digit_after = RANK_ALPHABET.index(after[0]) if after else RANK_BASE
+    if digit_after - digit_before > 1:
+        return RANK_ALPHABET[(digit_before + digit_after) // 2]
+    # 首位相邻时, after的首位本身就位于两者之间(after还有后续位), 否则在before的后续位中继续取中间值
+    if after and len(after) > 1:
+        return after[0]
+    return RANK_ALPHABET[digit_before] + _midpoint(before[1:])
+
+
+def rank_between(before: str = None, after: str = None):
+    """
+    生成位于before与after之间的排序值
+    @param before: 上方的排序值, 为None时表示最前
+    @param after: 下方的排序值, 为None时表示最后
+    e.g. rank_between('a', 'b') -> 'ai', rank_between('a', 'a1') -> 'a0i'
+    """
+    before = before or ''
+    if after is not None and before >= after:
+        raise ValueError(f'排序值{before!r}必须小于{after!r}')
+    return _midpoint(before, after)
+
+
+def rank_after(rank: str):
+    """
+    生成紧跟在rank之后的排序值: 按rank的长度在末位+1(向前进位), 连续追加时排序值的长度不会增长
+    e.g. rank_after('9k3') -> '9k4', rank_after('9kz') -> '9l'
+    """
+    if not rank:
+        return rank_between(None, None)
+    digits = [RANK_ALPHABET.index(char) for char in rank]
+    for position in range(len(digits) - 1, -1, -1):
+        if digits[position] < RANK_BASE - 1:
+            digits[position] += 1
+            return ''.join(RANK_ALPHABET[digit] for digit in digits[:position + 1])
+    # 全部为最大值时只能加长
+    return rank_between(rank, None)
+
+
+def spread_ranks(count: int, min_gap: int = RANK_BASE ** 2):
+    """
+    生成count个等间距的排序值(用于初始化及重新平衡), 相邻排序值之间至少间隔min_gap个末位单位
+    """
+    length = 1
+    while RANK_BASE ** length // (count + 1) < min_gap:
+        length += 1
+    step = RANK_BASE ** length // (count + 1)
+    ranks = []
+    for position in range(1, count + 1):
+        value = position * step
+        digits = []
+        for _ in range(length):
+            value, digit = divmod(value, RANK_BASE)
+            digits.append(RANK_ALPHABET[digit])
+        ranks.append(''.join(reversed(digits)).rstrip(RANK_ALPHABET[0]))
+    return ranks
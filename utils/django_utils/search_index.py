@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+# @File    : search_index.py
+# @Software: PyCharm
+# @Description: 全文搜索: 适用于中文的二元分词(bigram)倒排索引, 可选MySQL FULLTEXT(ngram parser)后端
+import re
+import unicodedata
+from collections import Counter
+from functools import reduce
+from operator import or_
+
+from django.db import connection
+from django.db.models import Case, When, Value, IntegerField, Max, Sum, Q
+from django.db.models.signals import post_save, post_delete
+from django.utils.module_loading import import_string
+
+from sugar.settings import SEARCH_BACKEND, SEARCH_MAX_RESULTS
+
+# 中日韩文字连续片段 或 字母数字组成的单词
+TOKEN_PATTERN = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+|[a-z0-9]+')
+CJK_PATTERN = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]')
+# 与SearchToken.token的长度一致
+TOKEN_MAX_LENGTH = 32
+# 单次搜索最多使用的查询词数量
+QUERY_MAX_TERMS = 16
+# 限制范围搜索时, 范围内的数据不足时候选数据窗口扩大的倍数
+SEARCH_WINDOW_GROWTH = 4
+# 每次按主键检查范围的候选数据条数
+SCOPE_CHECK_CHUNK_SIZE = 1000
+# 已声明的搜索索引 {doc_type: SearchIndex}
+search_indexes = {}
+
+
+def normalize_text(text: str):
+    return unicodedata.normalize('NFKC', text or '').lower()
+
+
+def tokenize(text: str):
+    """
+    索引分词
+    1.中文片段切分为二元分词, 片段的最后一个字单独作为一个分词, 保证每个字都是某个分词的开头(单字搜索使用前缀匹配)
+    2.字母数字按单词切分
+    e.g. '修复登录bug' -> ['修复', '复登', '登录', '录', 'bug']
+    """
+    tokens = []
+    for segment in TOKEN_PATTERN.findall(normalize_text(text)):
+        if CJK_PATTERN.match(segment):
+            tokens.extend(segment[i:i + 2] for i in range(len(segment) - 1))
+            tokens.append(segment[-1])
+        else:
+            tokens.append(segment[:TOKEN_MAX_LENGTH])
+    return tokens
+
+
+def parse_query(query: str):
+    """
+    搜索词分词
+    @return: [(查询词, 是否前缀匹配)], 中文二元分词精确匹配, 中文单字及单词前缀匹配
+    """
+    terms = []
+    for segment in TOKEN_PATTERN.findall(normalize_text(query)):
+        if CJK_PATTERN.match(segment) and len(segment) > 1:
+            terms.extend((segment[i:i + 2], False) for i in range(len(segment) - 1))
+        else:
+            terms.append((segment[:TOKEN_MAX_LENGTH], True))
+    return list(dict.fromkeys(terms))[:QUERY_MAX_TERMS]
+
+
+class SearchIndex:
+    """
+    模型的搜索索引声明
+    e.g. work_item_search_index = SearchIndex(WorkItem, {'name': 3, 'desc': 1})
+    在模型所属应用的AppConfig.ready()中调用connect_signals()后, 模型对象保存/删除时自动更新索引
+    bulk_create/bulk_update后需手动调用update()
+    """
+
+    def __init__(self, model, fields: dict, result_fields: tuple = ('id',), scope=None, route_name: str = None):
+        """
+        @param model: 模型类
+        @param fields: {需要索引的字段名: 权重}
+        @param result_fields: 全局搜索结果中返回的字段
+        @param scope: 全局搜索时用户可以访问的数据, 参数为用户, 返回queryset, 为None时不限制
+        @param route_name: 全局搜索时用户需要拥有该列表接口的权限(e.g. project-list), 为None时不限制
+        """
+        self.model = model
+        self.fields = fields
+        self.result_fields = result_fields
+        self.scope = scope
+        self.route_name = route_name
+        self.doc_type = model._meta.label_lower
+        search_indexes[self.doc_type] = self
+
+    def connect_signals(self):
+        post_save.connect(update_search_index, sender=self.model, dispatch_uid=f'update_search_index:{self.doc_type}')
+        post_delete.connect(remove_search_index, sender=self.model, dispatch_uid=f'remove_search_index:{self.doc_type}')
+
+    def get_scope_queryset(self, user):
+        return self.scope(user) if self.scope is not None else None
+
+    def get_tokens(self, instance):
+        """
+        @return: {分词: 权重}
+        """
+        weights = Counter()
+        for field_name, weight in self.fields.items():
+            for token in tokenize(getattr(instance, field_name)):
+                weights[token] += weight
+        return weights
+
+    def update(self, instances):
+        get_search_backend().update(self, instances)
+
+    def remove(self, ids):
+        get_search_backend().remove(self, ids)
+
+    def search_scored(self, query: str, limit: int = SEARCH_MAX_RESULTS, scope_queryset=None):
+        """
+        限制范围时不在搜索查询中嵌入范围子查询(耗时会随数据表增大而增加):
+        先不限制范围取出相关度最高的候选数据, 只按主键检查候选数据是否在范围内,
+        范围内的数据不足limit条且还有更多候选数据时, 扩大候选窗口重新搜索, 直到取满limit条或取完所有候选数据
+        @param scope_queryset: 只返回该queryset中的数据, 为None时不限制
+        @return: 按相关度从高到低排列的[(ID, 相关度)]
+        """
+        backend = get_search_backend()
+        if scope_queryset is None:
+            return backend.search(self, query, limit)
+        scope_queryset = scope_queryset.order_by()
+        window, checked_ids, scope_ids = limit, set(), set()
+        while True:
+            candidates = backend.search(self, query, window)
+            new_ids = [object_id for object_id, _ in candidates if object_id not in checked_ids]
+            for i in range(0, len(new_ids), SCOPE_CHECK_CHUNK_SIZE):
+                scope_ids.update(scope_queryset.filter(pk__in=new_ids[i:i + SCOPE_CHECK_CHUNK_SIZE]).values_list(
+                    'pk', flat=True))
+            checked_ids.update(new_ids)
+            results = [(object_id, score) for object_id, score in candidates if object_id in scope_ids]
+            if len(results) >= limit or len(candidates) < window:
+                return results[:limit]
+            window *= SEARCH_WINDOW_GROWTH
+
+    def search(self, query: str, limit: int = SEARCH_MAX_RESULTS, scope_queryset=None):
+        """
+        @param scope_queryset: 只返回该queryset中的数据, 为None时不限制
+        @return: 按相关度从高到低排列的ID列表
+        """
+        return [object_id for object_id, _ in self.search_scored(query, limit, scope_queryset)]
+
+    def filter_queryset(self, queryset, query: str):
+        """
+        只保留匹配搜索词的数据并按相关度排序
+        在已按其他条件过滤后的queryset中搜索(按主键检查候选数据, 见search_scored), 返回数量上限SEARCH_MAX_RESULTS在过滤之后生效
+        (过滤后匹配的数据超过该数量时, 只保留相关度最高的SEARCH_MAX_RESULTS条)
+        """
+        ids = self.search(query, scope_queryset=queryset)
+        if not ids:
+            return queryset.none()
+        return queryset.filter(pk__in=ids).order_by(
+            Case(*[When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)], output_field=IntegerField()))
+
+
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    """
+    被索引的字段可能发生变化时, 更新搜索索引
+    """
+    search_index = search_indexes.get(sender._meta.label_lower)
+    if update_fields is None or set(update_fields) & set(search_index.fields):
+        search_index.update([instance])
+
+
+def remove_search_index(sender, instance, **kwargs):
+    search_indexes.get(sender._meta.label_lower).remove([instance.pk])
+
+
+class InvertedIndexSearchBackend:
+    """
+    基于system_search_token表的倒排索引, 支持所有数据库
+    搜索时只按分词走(doc_type, token)索引, 耗时与匹配的分词数量有关, 与数据表的大小无关
+    """
+
+    @staticmethod
+    def get_token_model():
+        from system.models import SearchToken
+        return SearchToken
+
+    @staticmethod
+    def get_prefix_condition(term: str):
+        # SQLite中带ESCAPE的LIKE不会使用索引, 改为范围查询
+        if connection.vendor == 'sqlite':
+            return Q(token__gte=term, token__lt=term + chr(0x10ffff))
+        return Q(token__startswith=term)
+
+    def update(self, search_index: SearchIndex, instances):
+        token_model = self.get_token_model()
+        instances = [instance for instance in instances if instance.pk is not None]
+        if not instances:
+            return
+        self.remove(search_index, [instance.pk for instance in instances])
+        token_model.objects.bulk_create([
+            token_model(doc_type=search_index.doc_type, object_id=instance.pk, token=token, weight=weight)
+            for instance in instances for token, weight in search_index.get_tokens(instance).items()
+        ], batch_size=1000)
+
+    def remove(self, search_index: SearchIndex, ids):
+        self.get_token_model().objects.filter(doc_type=search_index.doc_type, object_id__in=ids).delete()
+
+    def search(self, search_index: SearchIndex, query: str, limit: int):
+        """
+        @return: 按相关度从高到低排列的[(object_id, 相关度)]
+        """
+        terms = parse_query(query)
+        if not terms:
+            return []
+        conditions = [self.get_prefix_condition(term) if is_prefix else Q(token=term) for term, is_prefix in terms]
+        # 每个查询词都要匹配(与icontains的语义接近), 按匹配分词的权重之和排序
+        matched = {f'term_{i}': Max(Case(When(condition, then=Value(1)), default=Value(0),
+                                         output_field=IntegerField())) for i, condition in enumerate(conditions)}
+        return list(self.get_token_model().objects.filter(reduce(or_, conditions), doc_type=search_index.doc_type)
+                    .values('object_id').annotate(score=Sum('weight'), **matched)
+                    .filter(**{name: 1 for name in matched}).order_by('-score', '-object_id')
+                    .values_list('object_id', 'score')[:limit])
+
+
+class MySQLFulltextSearchBackend:
+    """
+    MySQL FULLTEXT索引(WITH PARSER ngram), 由MySQL维护索引, 无需写入system_search_token表
+    需先执行 python manage.py rebuild_search_index 创建FULLTEXT索引
+    """
+
+    @staticmethod
+    def get_index_name(search_index: SearchIndex):
+        return f'ft_{search_index.model._meta.db_table}'[:64]
+
+    def create_fulltext_index(self, search_index: SearchIndex):
+        table = search_index.model._meta.db_table
+        index_name = self.get_index_name(search_index)
+        with connection.cursor() as cursor:
+            if index_name in connection.introspection.get_constraints(cursor, table):
+                return False
+            columns = ', '.join(connection.ops.quote_name(search_index.model._meta.get_field(field_name).column)
+                                for field_name in search_index.fields)
+            cursor.execute(f'ALTER TABLE {connection.ops.quote_name(table)} ADD FULLTEXT INDEX '
+                           f'{connection.ops.quote_name(index_name)} ({columns}) WITH PARSER ngram')
+        return True
+
+    def update(self, search_index: SearchIndex, instances):
+        pass
+
+    def remove(self, search_index: SearchIndex, ids):
+        pass
+
+    def search(self, search_index: SearchIndex, query: str, limit: int):
+        """
+        @return: 按相关度从高到低排列的[(object_id, 相关度)]
+        """
+        words = TOKEN_PATTERN.findall(normalize_text(query))[:QUERY_MAX_TERMS]
+        if not words:
+            return []
+        model = search_index.model
+        columns = ', '.join(connection.ops.quote_name(model._meta.get_field(field_name).column)
+                            for field_name in search_index.fields)
+        match = f'MATCH({columns}) AGAINST (%s IN BOOLEAN MODE)'
+        # 布尔模式下每个词都必须匹配, 双引号内的词按ngram短语匹配
+        against = ' '.join(f'+"{word}"' for word in words)
+        pk_column = connection.ops.quote_name(model._meta.pk.column)
+        sql = f'SELECT {pk_column}, {match} AS score FROM {connection.ops.quote_name(model._meta.db_table)} ' \
+              f'WHERE {match} ORDER BY score DESC, {pk_column} DESC LIMIT %s'
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [against, against, limit])
+            return [(row[0], row[1]) for row in cursor.fetchall()]
+
+
+_backend = None
+
+
+def get_search_backend():
+    global _backend
+    if _backend is None:
+        _backend = import_string(SEARCH_BACKEND)()
+    return _backend
+
+
+def search_documents(user, query: str, limit: int = SEARCH_MAX_RESULTS, doc_types: list = None):
+    """
+    在所有(或指定的)搜索索引中搜索用户可以访问的数据, 每种数据类型最多返回limit条
+    每种数据类型分别搜索, 用户可以访问的范围只对候选数据按主键检查(见SearchIndex.search_scored), 不会遗漏范围内的数据
+    @return: 按相关度从高到低排列的[(doc_type, object_id)]
+    """
+    from utils.drf_utils.permission_cache import has_route_permission
+    documents = []
+    for doc_type, search_index in search_indexes.items():
+        if (doc_types is not None and doc_type not in doc_types) or (
+                search_index.route_name is not None and not has_route_permission(user, search_index.route_name)):
+            continue
+        documents.extend((score, doc_type, object_id) for object_id, score in search_index.search_scored(
+            query, limit, search_index.get_scope_queryset(user)))
+    # 稳定排序, 相关度相同时保持各数据类型内的顺序
+    documents.sort(key=lambda document: document[0], reverse=True)
+    return [(doc_type, object_id) for _, doc_type, object_id in documents]
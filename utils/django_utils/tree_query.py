@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# @File    : tree_query.py
+# @Software: PyCharm
+# @Description: 自关联(parent)树形数据的子树查询: 一次递归CTE查询出整棵子树, 不再逐个节点递归查询
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from sugar.settings import TREE_QUERY_MAX_DEPTH
+
+
+def get_subtree_queryset(model, root_id, parent_field: str = 'parent', max_depth: int = TREE_QUERY_MAX_DEPTH):
+    """
+    获取以root_id为根节点的整棵子树(包含根节点), 子树ID由递归CTE子查询得到, 可以继续filter/values
+    MySQL需要8.0及以上版本
+    @param model: 模型类
+    @param root_id: 根节点ID
+    @param parent_field: 自关联外键字段名
+    @param max_depth: 最大查询深度, 防止parent数据成环时无限递归
+    """
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    pk = qn(model._meta.pk.column)
+    parent = qn(model._meta.get_field(parent_field).column)
+    sql = (f'WITH RECURSIVE subtree (node_id, depth) AS ('
+           f'SELECT {pk}, 0 FROM {table} WHERE {pk} = %s '
+           f'UNION ALL '
+           f'SELECT child.{pk}, subtree.depth + 1 FROM {table} child '
+           f'INNER JOIN subtree ON child.{parent} = subtree.node_id WHERE subtree.depth < %s'
+           f') SELECT node_id FROM subtree')
+    return model._default_manager.filter(pk__in=RawSQL(sql, (root_id, max_depth)))
+
+
+def build_subtree(rows, root_id, parent_key: str = 'parent'):
+    """
+    把子树数据组装为嵌套结构, 同时计算每个节点的深度
+    父子关系成环时(根节点的parent在子树中), 忽略根节点的parent
+    @param rows: 子树数据(dict)列表
+    @return: (根节点, 按从上到下的层级顺序排列的节点列表), 每个节点增加depth、children, 根节点不存在时返回(None, [])
+    """
+    nodes = {row.get('id'): {**row, 'depth': 0, 'children': []} for row in rows}
+    root = nodes.get(root_id)
+    if root is None:
+        return None, []
+    for node_id, node in nodes.items():
+        parent_node = nodes.get(node.get(parent_key))
+        if parent_node is not None and node_id != root_id:
+            parent_node.get('children').append(node)
+    ordered_nodes = [root]
+    for node in ordered_nodes:
+        for child in node.get('children'):
+            child['depth'] = node.get('depth') + 1
+            ordered_nodes.append(child)
+    return root, ordered_nodes
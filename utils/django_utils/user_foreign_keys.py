@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+# @File    : user_foreign_keys.py
+# @Software: PyCharm
+# @Description: 根据字符串类型的用户名字段分批回填用户外键字段
+from django.db import transaction
+from django.db.models import Q
+
+# 每批处理的数据条数
+BACKFILL_CHUNK_SIZE = 1000
+
+
+def backfill_user_foreign_keys(model_class, user_model, field_mapping: dict, chunk_size: int = BACKFILL_CHUNK_SIZE):
+    """
+    按主键顺序分批回填用户外键, 每批在单独的事务中提交, 不会长时间锁表
+    数据迁移中调用时需传入历史模型类(apps.get_model), 因此不依赖模型类上的属性
+    @param model_class: 模型类
+    @param user_model: 用户模型类
+    @param field_mapping: {用户名字段: 用户外键字段}, e.g. {'creator': 'creator_user'}
+    @param chunk_size: 每批处理的数据条数
+    @return: 回填的字段值数量
+    """
+    user_ids = dict(user_model.objects.values_list('username', 'id'))
+    pending_condition = Q()
+    for name_field, fk_field in field_mapping.items():
+        pending_condition |= Q(**{f'{fk_field}__isnull': True}) & ~Q(**{name_field: ''})
+    value_fields = []
+    for name_field, fk_field in field_mapping.items():
+        value_fields.extend([name_field, f'{fk_field}_id'])
+    queryset = model_class.objects.filter(pending_condition).order_by('pk')
+    last_pk = None
+    backfill_count = 0
+    while True:
+        chunk_queryset = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(chunk_queryset.values_list('pk', *value_fields)[:chunk_size])
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        # {(外键字段, 用户ID): [主键, ...]}
+        pk_groups = {}
+        for row in rows:
+            for index, fk_field in enumerate(field_mapping.values()):
+                username, fk_value = row[1 + index * 2], row[2 + index * 2]
+                user_id = user_ids.get(username)
+                if fk_value is None and user_id is not None:
+                    pk_groups.setdefault((fk_field, user_id), []).append(row[0])
+        with transaction.atomic():
+            for (fk_field, user_id), pks in pk_groups.items():
+                model_class.objects.filter(pk__in=pks).update(**{f'{fk_field}_id': user_id})
+                backfill_count += len(pks)
+    return backfill_count
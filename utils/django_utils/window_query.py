@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+# @File    : window_query.py
+# @Software: PyCharm
+# @Description: 基于窗口函数的查询: 分组取前N条数据, 一次查询代替每组一次查询
+from django.db import connections
+from django.db.models import F, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
+
+
+def get_top_n_per_group(queryset, partition_by: str, ordering: list, limit: int):
+    """
+    每组只保留排序后的前limit条数据, 结果仍为queryset, 可以继续values/order_by
+    ROW_NUMBER() OVER (PARTITION BY ... ORDER BY ...)作为子查询, MySQL需要8.0及以上版本
+    @param queryset: 需要分组的数据
+    @param partition_by: 分组字段名, e.g. work_item_status
+    @param ordering: 组内排序, e.g. ['-priority', '-id']
+    @param limit: 每组保留的数据条数
+    """
+    order_by = [F(field_name[1:]).desc() if field_name.startswith('-') else F(field_name).asc()
+                for field_name in ordering]
+    ranked_queryset = queryset.order_by().annotate(
+        group_rank=Window(expression=RowNumber(), partition_by=[F(partition_by)], order_by=order_by))
+    sql, params = ranked_queryset.values('pk', 'group_rank').query.sql_with_params()
+    qn = connections[queryset.db].ops.quote_name
+    pk_column = qn(queryset.model._meta.pk.column)
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT ranked.{pk_column} FROM ({sql}) ranked WHERE ranked.{qn("group_rank")} <= %s', (*params, limit)))
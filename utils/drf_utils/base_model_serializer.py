@@ -3,8 +3,22 @@
 # @Software: PyCharm
 # @Description:
 from rest_framework import serializers
+from rest_framework.serializers import ALL_FIELDS
 
+from utils.drf_utils.sparse_fields import SparseFieldsMixin
 
-class BaseModelSerializer(serializers.ModelSerializer):
+
+class BaseModelSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     create_time = serializers.DateTimeField(format='%Y-%m-%d %H:%M:%S', read_only=True, help_text='创建时间')
     update_time = serializers.DateTimeField(format='%Y-%m-%d %H:%M:%S', read_only=True, help_text='更新时间')
+
+    def get_field_names(self, declared_fields, info):
+        """
+        fields='__all__'时不返回用户外键字段(e.g. creator_user), 避免响应中暴露用户主键, 用户姓名通过*_name字段返回
+        """
+        field_names = super().get_field_names(declared_fields, info)
+        if getattr(self.Meta, 'fields', None) != ALL_FIELDS:
+            return field_names
+        user_fk_fields = set(getattr(self.Meta.model, 'USER_FOREIGN_KEY_FIELDS', {}).values())
+        return [field_name for field_name in field_names
+                if field_name not in user_fk_fields or field_name in declared_fields]
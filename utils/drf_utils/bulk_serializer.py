@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+# @File    : bulk_serializer.py
+# @Software: PyCharm
+# @Description: 批量新增/修改的序列化器: 一次校验所有数据, 使用bulk_create/bulk_update写入
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections
+from django.utils import timezone
+from rest_framework import serializers
+
+from sugar.settings import BULK_OPERATION_MAX_SIZE
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    批量校验时, 优先从BulkListSerializer预加载的对象中取值, 避免每条数据查询一次关联对象
+    """
+    preloaded_objects = None
+
+    def to_python_pk(self, data):
+        try:
+            return self.get_queryset().model._meta.pk.to_python(data)
+        except (DjangoValidationError, TypeError, ValueError):
+            return None
+
+    def to_internal_value(self, data):
+        if self.preloaded_objects is not None and not isinstance(data, bool):
+            obj = self.preloaded_objects.get(self.to_python_pk(data))
+            if obj is not None:
+                return obj
+        return super().to_internal_value(data)
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    批量新增/修改
+    1.校验前按字段一次性预加载所有数据引用的关联对象(子序列化器需使用PreloadedPrimaryKeyRelatedField)
+    2.create: bulk_create + 一次性写入多对多关联表
+      数据库不支持批量插入后返回自增主键(MySQL)时, 若子序列化器的Meta声明了bulk_create_natural_key(本批数据中值唯一的字段),
+      bulk_create后按该字段一次查询回主键, 否则逐条插入
+    3.update: self.instance为与data顺序一致的模型对象列表, 逐条校验时子序列化器绑定对应的模型对象, bulk_update + 重建多对多关联
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('max_length', BULK_OPERATION_MAX_SIZE)
+        kwargs.setdefault('allow_empty', False)
+        super().__init__(*args, **kwargs)
+
+    def get_preloaded_fields(self):
+        for field in self.child.fields.values():
+            relation = field.child_relation if isinstance(field, serializers.ManyRelatedField) else field
+            if isinstance(relation, PreloadedPrimaryKeyRelatedField) and not field.read_only:
+                yield field, relation
+
+    def preload_related_objects(self, data):
+        for field, relation in self.get_preloaded_fields():
+            pks = set()
+            for item in data:
+                if not isinstance(item, dict) or item.get(field.field_name) is None:
+                    continue
+                values = item.get(field.field_name)
+                for value in (values if isinstance(values, list) else [values]):
+                    pk = relation.to_python_pk(value) if not isinstance(value, bool) else None
+                    if pk is not None:
+                        pks.add(pk)
+            relation.preloaded_objects = relation.get_queryset().in_bulk(pks) if pks else {}
+
+    def to_internal_value(self, data):
+        if isinstance(data, list) and len(data) <= (self.max_length or len(data)):
+            self.preload_related_objects(data)
+        if not isinstance(self.instance, list):
+            return super().to_internal_value(data)
+        # 修改时子序列化器的instance默认是整个列表, 逐条校验前绑定对应的模型对象,
+        # 使依赖instance的校验(e.g. UniqueValidator排除自身、validate_<field>中读取原值)按修改而不是新增处理
+        instances = iter(self.instance)
+        child_instance = self.child.instance
+        child_run_validation = self.child.run_validation
+
+        def run_validation(item):
+            self.child.instance = next(instances, None)
+            return child_run_validation(item)
+
+        self.child.run_validation = run_validation
+        try:
+            return super().to_internal_value(data)
+        finally:
+            del self.child.run_validation
+            self.child.instance = child_instance
+
+    @property
+    def model(self):
+        return self.child.Meta.model
+
+    def pop_many_to_many_data(self, attrs: dict):
+        return {field.name: attrs.pop(field.name) for field in self.model._meta.many_to_many if field.name in attrs}
+
+    def set_many_to_many_data(self, instances, many_to_many_data: list, clear: bool = False):
+        """
+        一次性写入多对多关联表
+        @param instances: 模型对象列表
+        @param many_to_many_data: 与instances一一对应的 {多对多字段名: 关联对象列表}
+        @param clear: 是否先清空原有的关联数据
+        """
+        for field in self.model._meta.many_to_many:
+            pairs = [(instance, data.get(field.name)) for instance, data in zip(instances, many_to_many_data)
+                     if field.name in data]
+            if not pairs:
+                continue
+            through = field.remote_field.through
+            source_name = field.m2m_field_name()
+            target_name = field.m2m_reverse_field_name()
+            if clear:
+                through.objects.filter(**{f'{source_name}__in': [instance.pk for instance, _ in pairs]}).delete()
+            through.objects.bulk_create([
+                through(**{f'{source_name}_id': instance.pk, f'{target_name}_id': related_obj.pk})
+                for instance, related_objs in pairs for related_obj in set(related_objs)
+            ])
+
+    def sync_user_foreign_keys(self, instances):
+        if hasattr(self.model, 'bulk_sync_user_foreign_keys'):
+            return self.model.bulk_sync_user_foreign_keys(instances)
+        return set()
+
+    def fetch_created_pks(self, instances, natural_key: str):
+        """
+        bulk_create后按natural_key字段一次查询回主键, 该字段的值与已有数据重复时无法区分, 抛出异常(调用方的事务回滚)
+        """
+        values = [getattr(instance, natural_key) for instance in instances]
+        rows = list(self.model._default_manager.filter(**{f'{natural_key}__in': values}).values_list(natural_key, 'pk'))
+        if len(set(values)) != len(values) or len(rows) != len(values):
+            raise serializers.ValidationError('批量新增的数据与已有数据冲突, 请重试.', code=40000)
+        pks = dict(rows)
+        for instance in instances:
+            instance.pk = pks.get(getattr(instance, natural_key))
+
+    def create(self, validated_data):
+        many_to_many_data = [self.pop_many_to_many_data(attrs) for attrs in validated_data]
+        instances = [self.model(**attrs) for attrs in validated_data]
+        self.sync_user_foreign_keys(instances)
+        can_return_pks = connections[self.model.objects.db].features.can_return_rows_from_bulk_insert
+        natural_key = getattr(self.child.Meta, 'bulk_create_natural_key', None)
+        # 逐条插入时会触发post_save信号, 调用方据此判断是否需要手动处理信号中的逻辑(e.g. 更新搜索索引)
+        self.saved_individually = not can_return_pks and natural_key is None
+        if not self.saved_individually:
+            instances = self.model.objects.bulk_create(instances)
+            if not can_return_pks:
+                self.fetch_created_pks(instances, natural_key)
+        else:
+            # 多对多数据及响应数据需要主键, 无法查询回主键时逐条插入(仍在同一事务中)
+            for instance in instances:
+                instance.save(force_insert=True)
+        self.set_many_to_many_data(instances, many_to_many_data)
+        return instances
+
+    def update(self, instances, validated_data):
+        many_to_many_data = []
+        update_fields = set()
+        now = timezone.now()
+        for instance, attrs in zip(instances, validated_data):
+            many_to_many_data.append(self.pop_many_to_many_data(attrs))
+            for attr, value in attrs.items():
+                setattr(instance, attr, value)
+            update_fields.update(attrs.keys())
+            # bulk_update不会触发auto_now
+            for field in self.model._meta.concrete_fields:
+                if getattr(field, 'auto_now', False):
+                    setattr(instance, field.attname, now)
+                    update_fields.add(field.name)
+        update_fields.update(self.sync_user_foreign_keys(instances))
+        if update_fields:
+            self.model.objects.bulk_update(instances, update_fields, batch_size=BULK_OPERATION_MAX_SIZE)
+        self.set_many_to_many_data(instances, many_to_many_data, clear=True)
+        return instances
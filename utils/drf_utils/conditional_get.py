@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+# @File    : conditional_get.py
+# @Software: PyCharm
+# @Description: 条件GET请求(ETag/Last-Modified), 数据未变化时在序列化之前直接返回304
+import hashlib
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class NotModified(APIException):
+    """
+    数据未变化, 由custom_exception_handler转换为不带响应体的304响应
+    """
+    status_code = status.HTTP_304_NOT_MODIFIED
+    default_detail = 'Not Modified'
+    default_code = 'not_modified'
+
+    def __init__(self, headers: dict):
+        super().__init__()
+        self.headers = headers
+
+
+def get_data_version_cache_key(label: str):
+    return f'conditional_get:version:{label}'
+
+
+def bump_data_version(label: str):
+    """
+    递增数据版本号, 使在conditional_get_versions中声明了该数据类型的接口的ETag失效
+    @param label: 数据类型, e.g. system.user
+    """
+    cache_key = get_data_version_cache_key(label)
+    try:
+        cache.incr(cache_key)
+    except ValueError:
+        # 版本号不存在时初始化
+        cache.set(cache_key, 1, None)
+
+
+def bump_data_version_on_changed(sender, **kwargs):
+    """
+    信号处理函数: 数据变化时在事务提交后递增sender的数据版本号
+    """
+    label = sender._meta.label_lower
+    transaction.on_commit(lambda: bump_data_version(label))
+
+
+def touch_update_time_on_m2m_changed(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """
+    信号处理函数: 多对多关系的增删不会修改update_time, 在此更新声明多对多字段的一方的update_time
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        if action != 'pre_clear' and not pk_set:
+            return
+        queryset = type(instance)._default_manager.filter(pk=instance.pk)
+    elif action == 'pre_clear':
+        m2m_field = next(field for field in model._meta.many_to_many if field.remote_field.through is sender)
+        queryset = model._default_manager.filter(pk__in=sender._default_manager.filter(**{
+            m2m_field.m2m_reverse_field_name(): instance.pk}).values(m2m_field.m2m_field_name()))
+    elif pk_set:
+        queryset = model._default_manager.filter(pk__in=pk_set)
+    else:
+        return
+    queryset.update(update_time=timezone.now())
+
+
+def get_timestamp(value):
+    """
+    update_time转换为时间戳(USE_TZ=False时为当前时区的本地时间)
+    """
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, timezone.get_current_timezone())
+    return int(value.timestamp())
+
+
+class ConditionalGetMixin:
+    """
+    为ViewSet的list/retrieve接口提供ETag及Last-Modified
+    1.list: 根据过滤后的queryset的max(update_time)及总数计算(一次聚合查询)
+    2.retrieve: 根据单条数据的update_time计算
+    3.请求头If-None-Match/If-Modified-Since与之匹配时, 在执行序列化之前返回304
+    4.序列化结果包含关联表数据时(e.g. sprint_name), 在conditional_get_related中声明关联字段, 其update_time一并参与计算
+    5.序列化结果依赖的数据变化时不会修改update_time的(e.g. 用户修改姓名后的*_name字段、删除迭代后外键被置为NULL),
+      在conditional_get_versions中声明数据类型, 其数据版本号一并参与计算, 数据变化时需调用bump_data_version()
+    6.多对多字段(e.g. 关注人)的增删需连接touch_update_time_on_m2m_changed, 更新声明多对多字段的一方的update_time
+    注意: 只能感知update_time及数据版本号的变化, 序列化结果依赖统计数据等其他数据的接口不要启用
+    """
+    conditional_get_actions = ['list', 'retrieve']
+    conditional_get_related = []
+    conditional_get_versions = []
+
+    def get_conditional_validators(self, request):
+        """
+        @return: (etag, last_modified时间戳), 数据不存在时返回(None, None)
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        time_fields = ['update_time'] + [f'{field_name}__update_time' for field_name in self.conditional_get_related]
+        if self.action == 'retrieve':
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            times = queryset.filter(**{self.lookup_field: self.kwargs.get(lookup_url_kwarg)}).values_list(
+                *time_fields).first()
+            if times is None:
+                return None, None
+            count = 1
+        else:
+            data = queryset.order_by().aggregate(count=Count('pk'), **{
+                field_name: Max(field_name) for field_name in time_fields})
+            times = [data.get(field_name) for field_name in time_fields]
+            count = data.get('count')
+        last_modified = max([value for value in times if value is not None], default=None)
+        signature = ':'.join([value.isoformat() if value else '' for value in times] + [str(count)])
+        if self.conditional_get_versions:
+            versions = cache.get_many([get_data_version_cache_key(label) for label in self.conditional_get_versions])
+            signature += ':' + ':'.join(str(versions.get(get_data_version_cache_key(label), 0))
+                                        for label in self.conditional_get_versions)
+        # 不同用户、不同查询参数及不同响应格式的结果不同
+        user_id = getattr(request.user, 'pk', None)
+        signature = f'{self.get_queryset().model._meta.label}:{user_id}:{request.get_full_path()}:' \
+                    f'{request.accepted_media_type}:{signature}'
+        etag = f'W/"{hashlib.md5(signature.encode("utf-8")).hexdigest()}"'
+        return etag, get_timestamp(last_modified) if last_modified else None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.conditional_headers = {}
+        if request.method not in ('GET', 'HEAD') or self.action not in self.conditional_get_actions:
+            return
+        etag, last_modified = self.get_conditional_validators(request)
+        if etag is None:
+            return
+        self.conditional_headers['ETag'] = etag
+        if last_modified is not None:
+            self.conditional_headers['Last-Modified'] = http_date(last_modified)
+        response = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+        if response is not None and response.status_code == status.HTTP_304_NOT_MODIFIED:
+            raise NotModified(self.conditional_headers)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            for key, value in getattr(self, 'conditional_headers', {}).items():
+                response[key] = value
+        return response
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# @File    : count_provider.py
+# @Software: PyCharm
+# @Description: 分页时的总数统计: 无过滤条件的大表使用表统计信息估算, 其余按过滤条件缓存精确总数
+import hashlib
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+from sugar.settings import PAGINATION_COUNT_CACHE_TIMEOUT, PAGINATION_ESTIMATE_COUNT_THRESHOLD
+
+ESTIMATE_COUNT_SQL = {
+    'mysql': 'SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s',
+    'postgresql': 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+}
+
+
+def is_unfiltered_queryset(queryset: QuerySet):
+    """
+    queryset是否为整表数据(没有过滤条件、去重、分组及集合运算)
+    """
+    query = queryset.query
+    return not (query.where or query.distinct or query.group_by or query.combinator or
+                query.low_mark or query.high_mark is not None)
+
+
+def get_estimated_count(queryset: QuerySet):
+    """
+    根据数据库的表统计信息估算总数, 数据库不支持时返回None
+    """
+    connection = connections[queryset.db]
+    sql = ESTIMATE_COUNT_SQL.get(connection.vendor)
+    if sql is None:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [queryset.model._meta.db_table])
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+def get_cached_count(queryset: QuerySet):
+    """
+    按查询语句(过滤条件)缓存精确总数, 翻页时同一过滤条件不会重复COUNT
+    """
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    signature = hashlib.md5(f'{queryset.db}:{sql}:{params!r}'.encode('utf-8')).hexdigest()
+    cache_key = f'pagination:count:{signature}'
+    count = cache.get(cache_key)
+    if count is None:
+        count = queryset.count()
+        cache.set(cache_key, count, PAGINATION_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def get_queryset_count(queryset):
+    """
+    获取分页使用的总数
+    1.整表数据且估算值超过阈值时, 使用表统计信息估算的总数
+    2.其余情况使用按过滤条件缓存的精确总数
+    """
+    if not isinstance(queryset, QuerySet):
+        return len(queryset)
+    if is_unfiltered_queryset(queryset):
+        estimated_count = get_estimated_count(queryset)
+        if estimated_count is not None and estimated_count >= PAGINATION_ESTIMATE_COUNT_THRESHOLD:
+            return estimated_count
+    if not PAGINATION_COUNT_CACHE_TIMEOUT:
+        return queryset.count()
+    return get_cached_count(queryset)
+
+
+class CountProviderPaginator(Paginator):
+    """
+    使用get_queryset_count()统计总数的Django分页器
+    """
+
+    @cached_property
+    def count(self):
+        return get_queryset_count(self.object_list)
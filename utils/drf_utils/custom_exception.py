@@ -3,8 +3,11 @@
 # @Software: PyCharm
 # @Description:
 from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 from rest_framework.views import exception_handler
 
+from utils.drf_utils.conditional_get import NotModified
+
 
 def custom_exception_handler(exc, context):
     """
@@ -20,6 +23,9 @@ def custom_exception_handler(exc, context):
                 response.data = {'code': 40000, 'message': response.data, 'data': None}
         return response
     """
+    # 条件GET请求数据未变化时, 返回不带响应体的304
+    if isinstance(exc, NotModified):
+        return Response(status=exc.status_code, headers=exc.headers)
     response = exception_handler(exc, context)
     if response is not None:
         # 字段校验错误处理
@@ -39,7 +45,14 @@ def custom_exception_handler(exc, context):
                 response.data['code'] = 40000
                 response.data['data'] = None
             if isinstance(response.data, list):
-                response.data = {'code': 40000, 'message': response.data[0], 'data': None}
+                # 批量接口(many=True)的错误信息为与请求数据一一对应的列表, 取第一条有错误的数据返回
+                error_index, error_item = next(((index, item) for index, item in enumerate(response.data) if item),
+                                               (0, response.data[0] if response.data else None))
+                if isinstance(error_item, dict):
+                    error_key, error_value = list(error_item.items())[0]
+                    error_value = error_value[0] if isinstance(error_value, list) else error_value
+                    error_item = f"第{error_index + 1}条数据 {error_key}: {error_value}"
+                response.data = {'code': 40000, 'message': error_item, 'data': None}
             return response
         if 'detail' in response.data:
             response.data = {'code': 40000, 'message': response.data.get('detail'), 'data': None}
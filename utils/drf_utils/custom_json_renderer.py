@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+# @File    : custom_json_renderer.py
+# @Software: PyCharm
+# @Description: 基于orjson的JSON渲染器, 未安装orjson时退化为DRF默认的JSONRenderer
+from decimal import Decimal
+from functools import lru_cache
+
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+ENVELOPE_KEYS = ['code', 'message', 'data']
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    自定义JSON渲染器, 输出格式与DRF的JSONRenderer保持一致(紧凑格式、不转义中文、转义\\u2028和\\u2029)
+    1.datetime/date/time/Decimal/UUID等类型交给DRF的JSONEncoder处理, 保证格式一致
+    2.统一响应体 {code, message, data} 中code和message部分预先编码并缓存, 只需编码data部分
+    3.需要缩进输出(如可浏览API)、orjson不支持的数据(如超过64位的整数)时, 使用DRF默认的渲染方式
+    4.Decimal类型的NaN/Infinity与JSONRenderer一致抛出ValueError(在default中检查, 没有额外的开销)
+    注意: 以下差异不做处理(检查需要遍历整个响应数据, 抵消了orjson的性能优势), 输出不保证与JSONRenderer逐字节一致
+      1.float类型的NaN/Infinity输出为null, JSONRenderer(allow_nan=False)抛出ValueError
+      2.极大/极小浮点数的指数写法不同, orjson输出1e16, JSONRenderer输出1e+16, 数值等价
+    """
+    orjson_options = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME |
+                      orjson.OPT_PASSTHROUGH_DATACLASS) if orjson else 0
+
+    def __init__(self):
+        self.encoder = JSONEncoder()
+
+    def default(self, obj):
+        # 抛出的异常由orjson转换为JSONEncodeError, 交给DRF默认的渲染方式抛出ValueError
+        if isinstance(obj, Decimal) and not obj.is_finite():
+            raise ValueError('Out of range float values are not JSON compliant')
+        return self.encoder.default(obj)
+
+    def dumps(self, data):
+        ret = orjson.dumps(data, default=self.default, option=self.orjson_options)
+        # 与JSONRenderer保持一致, 转义\u2028和\u2029
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def get_envelope_prefix(code: int, message: str):
+        """
+        预先编码统一响应体中的 {"code":xxx,"message":"xxx","data": 部分
+        """
+        return b'{"code":' + orjson.dumps(code) + b',"message":' + orjson.dumps(message).replace(
+            b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029') + b',"data":'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            if type(data) is dict and list(data.keys()) == ENVELOPE_KEYS and type(data.get('code')) is int and type(
+                    data.get('message')) is str:
+                return self.get_envelope_prefix(data.get('code'), data.get('message')) + self.dumps(
+                    data.get('data')) + b'}'
+            return self.dumps(data)
+        except (orjson.JSONEncodeError, TypeError, OverflowError):
+            return super().render(data, accepted_media_type, renderer_context)
@@ -2,10 +2,9 @@
 # @File    : custom_permissions.py
 # @Software: PyCharm
 # @Description:
-import re
 from rest_framework import permissions
-from sugar.settings import WHITE_URL_LIST, API_PREFIX
-from utils.drf_utils.model_utils import get_user_permissions
+from utils.drf_utils.permission_cache import is_white_url, get_user_permission_matcher
+from utils.drf_utils.route_utils import get_permission_route_key
 
 
 class RbacPermission(permissions.BasePermission):
@@ -20,19 +19,22 @@ class RbacPermission(permissions.BasePermission):
         # if request.method == 'DELETE':
         #     return False
         """URL白名单 如果请求url在白名单, 放行"""
-        for safe_url in WHITE_URL_LIST:
-            if re.match(f'^{safe_url}$', request_url_path):
-                return True
+        if is_white_url(request_url_path):
+            return True
         """如果用户是超级用户, 则放开权限(只用作系统初始化时注册的superuser用户添加初始数据时使用)"""
         # if request.user.is_superuser:
         #     return True
         """RBAC API权限验证"""
         # API权限验证
-        user_permissions = get_user_permissions(request.user)
-        for user_permission in user_permissions:
-            if user_permission.get('method') == request_method and re.match(
-                    f"^{(API_PREFIX + user_permission.get('url_path'))}$",
-                    request_url_path):
+        user_permission_matcher = get_user_permission_matcher(request.user)
+        # 1.路由索引匹配: 根据当前请求解析出的路由名称+请求方法判断
+        resolver_match = request.resolver_match
+        if resolver_match and resolver_match.url_name and get_permission_route_key(
+                resolver_match.url_name, request_method) in user_permission_matcher.get('routes'):
+            return True
+        # 2.未解析出路由名称的权限, 使用按请求方法分组并预编译的权限正则匹配
+        for pattern in user_permission_matcher.get('patterns').get(request_method, []):
+            if pattern.match(request_url_path):
                 return True
 
     # def has_object_permission(self, request, view, obj):
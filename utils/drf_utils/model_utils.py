@@ -1,36 +1,15 @@
-def get_obj_child_ids(parent: int, models_class_name, ids: set):
-    """
-    获取models模型的子id集合
-    :param parent: models模型类ID
-    :param models_class_name: models模型对象类
-    :param ids: 默认为空集合
-    """
-    objs = models_class_name.objects.filter(parent=parent)
-    for obj in objs:
-        ids.add(obj.id)
-        get_obj_child_ids(obj.id, models_class_name, ids)
-
-
 def get_user_permissions(user_obj):
     """
     获取用户对象所拥有的所有API权限
+    一次查询取出用户所有角色下的接口权限, 并在数据库中去重
     @param user_obj:
     @return:
     """
-    role_list = user_obj.roles.all()
-    request_api_permissions = list()
-    for role in role_list:
-        permission_list = role.permissions.values('method', 'url_path')
-        for permission in permission_list:
-            if permission.get('method') != '' and permission.get('url_path') != '':
-                # 去重
-                permission_data = {
-                    'method': permission.get('method'),
-                    'url_path': permission.get('url_path')
-                }
-                if permission_data not in request_api_permissions:
-                    request_api_permissions.append(permission_data)
-    return request_api_permissions
+    from system.models import Permission
+    permission_list = Permission.objects.filter(role__in=user_obj.roles.all()).exclude(method='').exclude(
+        url_path='').values('method', 'url_path', 'route_name').distinct().order_by('method', 'url_path')
+    return [{'method': item.get('method'), 'url_path': item.get('url_path'), 'route_name': item.get('route_name')}
+            for item in permission_list]
 
 
 def generate_object_tree_data(p_serializer_data):
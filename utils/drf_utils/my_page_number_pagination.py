@@ -4,11 +4,40 @@
 # @File    : my_page_number_pagination.py
 # @Software: PyCharm
 # @Description:
+import base64
+import binascii
+import datetime
+import json
+import math
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+from utils.drf_utils.count_provider import CountProviderPaginator, get_queryset_count
+
+
+class CursorJSONEncoder(DjangoJSONEncoder):
+    """
+    游标中的datetime/time保留到微秒(DjangoJSONEncoder只保留到毫秒, 同一毫秒内的数据会被跳过)
+    解码后的字符串作为过滤条件时由模型字段的to_python()解析, 精度不变
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat(timespec='microseconds')
+        return super().default(o)
 
 
 class MyPageNumberPagination(PageNumberPagination):
+    # 使用带缓存及估算功能的总数统计
+    django_paginator_class = CountProviderPaginator
     # 设置每页最大数据条目为50
     max_page_size = 50
     # 覆盖page_size字段为size
@@ -17,6 +46,48 @@ class MyPageNumberPagination(PageNumberPagination):
     page_query_description = '第几页'
     # 配置size字段在接口文档中的描述信息
     page_size_query_description = '每页几条'
+    # 传入cursor参数时使用游标(keyset)分页, 第一页传空值即可(?cursor=)
+    cursor_query_param = 'cursor'
+    cursor_query_description = '游标分页(传入该参数时不再使用页码分页, 第一页传空值, 之后传响应中next/previous链接里的值; ' \
+                               '接口的排序字段不支持游标分页时退化为页码分页)'
+    # 游标分页默认不统计总数, 需要总数时传with_total=true
+    with_total_query_param = 'with_total'
+    with_total_query_description = '游标分页时是否统计总数及总页数(true/false)'
+    invalid_cursor_message = '无效的cursor'
+    # 页码分页时传count_exact=false则不统计总数, 响应中count为null, 通过has_next判断是否有下一页
+    count_exact_query_param = 'count_exact'
+    count_exact_query_description = '页码分页时是否统计总数(默认true, 为false时count/total_pages为null)'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        self.count_exact = request.query_params.get(self.count_exact_query_param, '').lower() not in ('false', '0')
+        if self.cursor_mode:
+            fields = self.get_keyset_ordering(queryset)
+            if fields is not None:
+                return self.paginate_queryset_by_cursor(queryset, request, fields)
+            # 排序字段不支持游标分页, 退化为页码分页
+            self.cursor_mode = False
+        if not self.count_exact:
+            return self.paginate_queryset_without_count(queryset, request)
+        return super().paginate_queryset(queryset, request, view)
+
+    def paginate_queryset_without_count(self, queryset, request):
+        """
+        不统计总数的页码分页: 多查询一条数据用于判断是否还有下一页
+        """
+        self.request = request
+        self.no_count_page_size = self.get_page_size(request)
+        try:
+            self.no_count_page_number = int(request.query_params.get(self.page_query_param, 1))
+            if self.no_count_page_number < 1:
+                raise ValueError
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_page_message.format(page_number=request.query_params.get(
+                self.page_query_param), message='页码必须为正整数'))
+        offset = (self.no_count_page_number - 1) * self.no_count_page_size
+        results = list(queryset[offset:offset + self.no_count_page_size + 1])
+        self.has_next = len(results) > self.no_count_page_size
+        return results[:self.no_count_page_size]
 
     def get_paginated_response(self, data):
         """
@@ -25,6 +96,32 @@ class MyPageNumberPagination(PageNumberPagination):
         @param data:
         @return:
         """
+        if self.cursor_mode:
+            return Response(OrderedDict([
+                ('count', self.count),
+                ('next', self.get_cursor_link(self.next_position)),
+                ('previous', self.get_cursor_link(self.previous_position)),
+                ('results', data),
+                ('total_pages', math.ceil(self.count / self.cursor_page_size) if self.count is not None else None),
+                ('current_page', None),
+                ('page_size', self.cursor_page_size),
+            ]))
+        if not self.count_exact:
+            url = self.request.build_absolute_uri()
+            previous_link = None
+            if self.no_count_page_number > 1:
+                previous_link = replace_query_param(url, self.page_query_param, self.no_count_page_number - 1)
+            return Response(OrderedDict([
+                ('count', None),
+                ('next', replace_query_param(url, self.page_query_param, self.no_count_page_number + 1)
+                 if self.has_next else None),
+                ('previous', previous_link),
+                ('results', data),
+                ('total_pages', None),
+                ('current_page', self.no_count_page_number),
+                ('page_size', self.no_count_page_size),
+                ('has_next', self.has_next),
+            ]))
         # 调用父类中的get_paginated_response()方法获得dict类型返回值，再进行定制
         response = super().get_paginated_response(data)
         response.data['total_pages'] = self.page.paginator.num_pages
@@ -32,6 +129,139 @@ class MyPageNumberPagination(PageNumberPagination):
         response.data['page_size'] = self.get_page_size(self.request)
         return Response(response.data)
 
+    @staticmethod
+    def is_keyset_field(model, field_name: str):
+        """
+        排序字段能否作为游标: 必须是模型自身不允许为NULL的非关联字段
+        (跨表字段无法从数据中取值, 值为NULL时无法构造 __lt/__gt 过滤条件)
+        """
+        if LOOKUP_SEP in field_name:
+            return False
+        try:
+            field = model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            return False
+        return field.concrete and not field.is_relation and not field.null
+
+    @classmethod
+    def get_keyset_ordering(cls, queryset):
+        """
+        获取queryset的排序字段, 并追加主键作为唯一排序依据
+        @return: [(字段名, 是否倒序), ...], 按表达式/注解/可为NULL的字段排序时无法使用游标分页, 返回None
+        """
+        pk_name = queryset.model._meta.pk.name
+        ordering = list(queryset.query.order_by) or ['-pk']
+        fields = []
+        for item in ordering:
+            if not isinstance(item, str):
+                return None
+            field_name = item.lstrip('-')
+            field_name = pk_name if field_name == 'pk' else field_name
+            if not cls.is_keyset_field(queryset.model, field_name):
+                return None
+            fields.append((field_name, item.startswith('-')))
+        if pk_name not in [field_name for field_name, _ in fields]:
+            fields.append((pk_name, False))
+        return fields
+
+    @staticmethod
+    def build_keyset_filter(fields, values, reverse):
+        """
+        构造 (f1, f2, ...) 在排序方向上位于 (v1, v2, ...) 之后的过滤条件
+        e.g. -create_time, task_uuid: create_time < v1 OR (create_time = v1 AND task_uuid > v2)
+        """
+        condition = Q()
+        equal_condition = Q()
+        for (field_name, desc), value in zip(fields, values):
+            lookup = 'lt' if desc != reverse else 'gt'
+            condition |= equal_condition & Q(**{f'{field_name}__{lookup}': value})
+            equal_condition &= Q(**{field_name: value})
+        return condition
+
+    def decode_cursor(self, cursor: str):
+        if not cursor:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+            return {'values': list(position['v']), 'reverse': bool(position.get('r'))}
+        except (TypeError, ValueError, KeyError, binascii.Error, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def encode_cursor(position: dict):
+        data = json.dumps({'v': position.get('values'), 'r': int(position.get('reverse'))}, cls=CursorJSONEncoder)
+        return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+
+    def paginate_queryset_by_cursor(self, queryset, request, fields):
+        """
+        游标分页: 按排序字段的值定位(WHERE ... ORDER BY ... LIMIT), 不执行COUNT及OFFSET
+        @param fields: get_keyset_ordering()返回的排序字段
+        """
+        self.request = request
+        self.cursor_page_size = self.get_page_size(request)
+        with_total = request.query_params.get(self.with_total_query_param, '').lower() in ('true', '1')
+        self.count = get_queryset_count(queryset) if with_total else None
+        position = self.decode_cursor(request.query_params.get(self.cursor_query_param))
+        if position is not None and len(position.get('values')) != len(fields):
+            raise NotFound(self.invalid_cursor_message)
+        reverse = bool(position and position.get('reverse'))
+        ordering = [f'-{field_name}' if desc != reverse else field_name for field_name, desc in fields]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.build_keyset_filter(fields, position.get('values'), reverse))
+        # 多查询一条数据用于判断是否还有下一页
+        results = list(queryset[:self.cursor_page_size + 1])
+        has_more = len(results) > self.cursor_page_size
+        results = results[:self.cursor_page_size]
+        if reverse:
+            results.reverse()
+
+        def get_position(obj, is_reverse):
+            # values()查询出的数据为dict
+            if isinstance(obj, dict):
+                return {'values': [obj[field_name] for field_name, _ in fields], 'reverse': is_reverse}
+            return {'values': [getattr(obj, field_name) for field_name, _ in fields], 'reverse': is_reverse}
+
+        self.next_position = None
+        self.previous_position = None
+        if results:
+            if has_more or reverse:
+                self.next_position = get_position(results[-1], False)
+            if (has_more and reverse) or (position is not None and not reverse):
+                self.previous_position = get_position(results[0], True)
+        return results
+
+    def get_cursor_link(self, position):
+        if position is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position))
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append({
+            'name': self.cursor_query_param,
+            'required': False,
+            'in': 'query',
+            'description': self.cursor_query_description,
+            'schema': {'type': 'string'},
+        })
+        parameters.append({
+            'name': self.count_exact_query_param,
+            'required': False,
+            'in': 'query',
+            'description': self.count_exact_query_description,
+            'schema': {'type': 'boolean'},
+        })
+        parameters.append({
+            'name': self.with_total_query_param,
+            'required': False,
+            'in': 'query',
+            'description': self.with_total_query_description,
+            'schema': {'type': 'boolean'},
+        })
+        return parameters
+
     def get_paginated_response_schema(self, schema):
         """
         自定义接口文档中action=list的接口的schema
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+# @File    : permission_cache.py
+# @Software: PyCharm
+# @Description: 用户API权限匹配器的编译与缓存
+import logging
+import re
+import uuid
+
+from django.core.cache import cache
+
+from sugar.settings import WHITE_URL_LIST, API_PREFIX
+from utils.drf_utils.model_utils import get_user_permissions
+from utils.drf_utils.route_utils import get_permission_route_key, get_named_route_samples, match_route_samples
+
+logger = logging.getLogger('my_debug_logger')
+
+# 权限版本号(随机值, 不会重复), 角色权限/用户角色/权限路径发生变化时重新生成, 所有用户的权限缓存随之失效
+RBAC_VERSION_CACHE_KEY = 'rbac:version'
+# redis中缓存的用户权限数据的过期时间(秒)
+RBAC_USER_PERMISSIONS_TIMEOUT = 60 * 60
+# 进程内缓存的最大用户数, 超出后清空重建
+RBAC_LOCAL_CACHE_MAX_SIZE = 10000
+
+# 进程内缓存 {user_id: (version, matcher)}
+_local_user_matchers = {}
+# 进程内缓存 {权限签名: matcher}, 拥有相同角色的用户共用同一个编译结果
+_compiled_matchers = {}
+
+
+def compile_url_patterns(url_patterns):
+    """
+    把多个url正则合并编译为一个 `^(?:p1|p2|...)$` 的正则, 合并失败(如命名分组重名)时退化为逐个编译的正则列表
+    @param url_patterns: 完整的url正则列表
+    @return: 编译后的正则对象列表
+    """
+    compiled_patterns = []
+    for url_pattern in url_patterns:
+        try:
+            compiled_patterns.append(re.compile(f'^{url_pattern}$'))
+        except re.error as e:
+            logger.warning(f'invalid permission url pattern: {url_pattern}, {e}')
+    if len(compiled_patterns) <= 1:
+        return compiled_patterns
+    try:
+        return [re.compile('^(?:' + '|'.join(f'(?:{pattern.pattern[1:-1]})' for pattern in compiled_patterns) + ')$')]
+    except re.error:
+        return compiled_patterns
+
+
+WHITE_URL_PATTERNS = compile_url_patterns(WHITE_URL_LIST)
+
+
+def is_white_url(url_path: str):
+    return any(pattern.match(url_path) for pattern in WHITE_URL_PATTERNS)
+
+
+def get_rbac_version():
+    """
+    获取权限版本号, 版本号不存在(被淘汰或redis重启)时生成新的随机版本号
+    不能回退为固定的初始值, 否则之前在该初始值下缓存的权限(进程内及redis中)会重新生效
+    """
+    version = cache.get(RBAC_VERSION_CACHE_KEY)
+    if version is None:
+        # 多个进程同时初始化时只有一个add成功, 其余进程读取成功写入的版本号
+        version = uuid.uuid4().hex
+        if not cache.add(RBAC_VERSION_CACHE_KEY, version, None):
+            version = cache.get(RBAC_VERSION_CACHE_KEY) or version
+    return version
+
+
+def bump_rbac_version():
+    """
+    重新生成权限版本号, 使所有用户的权限缓存失效
+    """
+    cache.set(RBAC_VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+    _local_user_matchers.clear()
+
+
+def build_permission_matcher(permissions: dict):
+    """
+    @param permissions: {'routes': [route_key, ...], 'patterns': {method: [url_path, ...]}}
+    @return: {'routes': frozenset(route_key, ...), 'patterns': {method: [compiled pattern, ...]}}
+    """
+    signature = (tuple(sorted(permissions.get('routes', []))),
+                 tuple(sorted((method, tuple(url_paths)) for method, url_paths in
+                              permissions.get('patterns', {}).items())))
+    matcher = _compiled_matchers.get(signature)
+    if matcher is None:
+        matcher = {
+            'routes': frozenset(permissions.get('routes', [])),
+            'patterns': {method: compile_url_patterns([API_PREFIX + url_path for url_path in url_paths])
+                         for method, url_paths in permissions.get('patterns', {}).items()}
+        }
+        if len(_compiled_matchers) >= RBAC_LOCAL_CACHE_MAX_SIZE:
+            _compiled_matchers.clear()
+        _compiled_matchers[signature] = matcher
+    return matcher
+
+
+def get_user_permission_matcher(user_obj):
+    """
+    获取用户的API权限匹配器, 依次查找进程内缓存、redis缓存, 都未命中时查询数据库
+    已解析出路由名称的权限放入路由索引集合, 其余权限按请求方法分组编译为正则
+    @param user_obj:
+    @return: {'routes': frozenset(route_key, ...), 'patterns': {method: [compiled pattern, ...]}}
+    """
+    version = get_rbac_version()
+    local_data = _local_user_matchers.get(user_obj.id)
+    if local_data and local_data[0] == version:
+        return local_data[1]
+    cache_key = f'rbac:permissions:{user_obj.id}:{version}'
+    permissions = cache.get(cache_key)
+    if permissions is None:
+        permissions = {'routes': [], 'patterns': {}}
+        for user_permission in get_user_permissions(user_obj):
+            if user_permission.get('route_name'):
+                permissions['routes'].append(
+                    get_permission_route_key(user_permission.get('route_name'), user_permission.get('method')))
+            else:
+                permissions['patterns'].setdefault(user_permission.get('method'), []).append(
+                    user_permission.get('url_path'))
+        cache.set(cache_key, permissions, RBAC_USER_PERMISSIONS_TIMEOUT)
+    matcher = build_permission_matcher(permissions)
+    if len(_local_user_matchers) >= RBAC_LOCAL_CACHE_MAX_SIZE:
+        _local_user_matchers.clear()
+    _local_user_matchers[user_obj.id] = (version, matcher)
+    return matcher
+
+
+def has_route_permission(user_obj, route_name: str, method: str = 'GET'):
+    """
+    判断用户是否拥有某个接口的权限, 用于接口内部按权限过滤数据(e.g. 全局搜索只返回用户有权限查看的数据类型)
+    @param user_obj:
+    @param route_name: 路由名称, e.g. project-list
+    @param method: 请求方法
+    """
+    user_permission_matcher = get_user_permission_matcher(user_obj)
+    if get_permission_route_key(route_name, method) in user_permission_matcher.get('routes'):
+        return True
+    sample_paths = get_named_route_samples().get(route_name)
+    return any(match_route_samples(pattern, sample_paths)
+               for pattern in user_permission_matcher.get('patterns').get(method, []))
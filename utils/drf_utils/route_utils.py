@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+# @File    : route_utils.py
+# @Software: PyCharm
+# @Description: 把权限的请求路径(正则)映射为DRF路由名称
+import re
+from functools import lru_cache
+
+from django.urls import get_resolver
+
+from sugar.settings import API_PREFIX, API_VERSION
+
+# 生成路由示例路径时, 除version以外的路径参数使用的示例值
+# 每个值生成一个示例路径, 权限的请求路径需匹配所有示例路径才等价于该路由, 避免只授权了某个ID(e.g. /pm/work-items/1/)的权限被扩大为整个路由
+ROUTE_SAMPLE_KWARG_VALUES = ('1', '2')
+
+
+def get_permission_route_key(route_name: str, method: str):
+    """
+    权限的路由索引key, e.g. work-item-detail:PATCH
+    """
+    return f'{route_name}:{method}'
+
+
+@lru_cache(maxsize=None)
+def get_named_route_samples():
+    """
+    遍历项目中所有具名路由, 为每个路由生成示例请求路径(每个ROUTE_SAMPLE_KWARG_VALUES中的值一个)
+    忽略format后缀路由及同名的多个路由(如每个router都会注册的api-root)
+    @return: {route_name: ('/api/v1/pm/work-items/1/', '/api/v1/pm/work-items/2/')}
+    """
+    resolver = get_resolver()
+    route_samples = {}
+    for route_name in resolver.reverse_dict.keys():
+        if not isinstance(route_name, str):
+            continue
+        format_strings = set()
+        for possibilities, pattern, defaults, converters in resolver.reverse_dict.getlist(route_name):
+            for format_string, params in possibilities:
+                if 'format' not in params:
+                    format_strings.add((format_string, tuple(params)))
+        if len(format_strings) == 1:
+            format_string, params = format_strings.pop()
+            route_samples[route_name] = tuple(
+                '/' + format_string % {param: API_VERSION if param == 'version' else value for param in params}
+                for value in ROUTE_SAMPLE_KWARG_VALUES)
+    return route_samples
+
+
+def match_route_samples(pattern, sample_paths: tuple):
+    """
+    权限的请求路径(正则)是否匹配路由的所有示例路径, 即与该路由等价
+    """
+    return bool(sample_paths) and all(pattern.match(sample_path) for sample_path in sample_paths)
+
+
+def resolve_route_name(url_path: str):
+    """
+    查找与权限请求路径唯一匹配的路由名称
+    @param url_path: 权限的请求路径(不含API_PREFIX), e.g. /pm/work-items/\\d+/
+    @return: 路由名称, 无法唯一匹配时返回空字符串
+    """
+    if not url_path:
+        return ''
+    try:
+        pattern = re.compile(f'^{API_PREFIX + url_path}$')
+    except re.error:
+        return ''
+    matched_route_names = [route_name for route_name, sample_paths in get_named_route_samples().items()
+                           if match_route_samples(pattern, sample_paths)]
+    if len(matched_route_names) == 1:
+        return matched_route_names[0]
+    return ''
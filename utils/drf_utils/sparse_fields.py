@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+# @File    : sparse_fields.py
+# @Software: PyCharm
+# @Description: 稀疏字段集(?fields=a,b / ?omit=c,d), 同时裁剪序列化字段及查询的数据库列
+from collections import OrderedDict
+
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+FIELDS_QUERY_PARAM = 'fields'
+OMIT_QUERY_PARAM = 'omit'
+
+
+def parse_field_names(value: str):
+    return {name.strip() for name in value.split(',') if name.strip()} if value else set()
+
+
+def get_sparse_field_names(request):
+    """
+    解析请求中的fields/omit参数, 只对GET/HEAD请求生效
+    @return: (需要返回的字段集合, 没有传fields时为None; 需要排除的字段集合)
+    """
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return None, set()
+    query_params = getattr(request, 'query_params', request.GET)
+    fields = query_params.get(FIELDS_QUERY_PARAM)
+    return (parse_field_names(fields) if fields else None), parse_field_names(query_params.get(OMIT_QUERY_PARAM))
+
+
+class SparseFieldsMixin:
+    """
+    根据请求中的fields/omit参数裁剪顶层序列化器的字段, 嵌套序列化器不受影响
+    未返回的字段不会绑定到序列化器上, 其中的SerializerMethodField也就不会执行
+    sparse_required_fields: 无论如何都保留的字段(e.g. 生成树形数据依赖的id/parent)
+    sparse_method_field_sources: SerializerMethodField依赖的模型字段, 未声明时该字段保留则不裁剪数据库列
+    """
+    sparse_required_fields = ()
+    sparse_method_field_sources = {}
+
+    def is_root_serializer(self):
+        parent = self.parent
+        if parent is None:
+            return True
+        return isinstance(parent, serializers.ListSerializer) and parent.parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.is_root_serializer():
+            return fields
+        field_names, omit_names = get_sparse_field_names(self.context.get('request'))
+        if field_names is None and not omit_names:
+            return fields
+        return OrderedDict((name, field) for name, field in fields.items() if name in self.sparse_required_fields or (
+                (field_names is None or name in field_names) and name not in omit_names))
+
+    def get_required_model_fields(self):
+        """
+        获取裁剪后的字段需要查询的模型字段名, 无法确定时返回None
+        """
+        model_field_names = set()
+        for field_name, field in self.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                if field_name not in self.sparse_method_field_sources:
+                    return None
+                model_field_names.update(self.sparse_method_field_sources.get(field_name))
+                continue
+            if field.source == '*':
+                return None
+            model_field_names.add(field.source_attrs[0])
+        return model_field_names
+
+
+class SparseFieldsFilterBackend(BaseFilterBackend):
+    """
+    传入fields/omit参数时, 对queryset进行裁剪
+    1.defer()未返回的普通字段(主键、外键及跨表字段不做处理)
+    2.去掉未返回字段对应的prefetch_related
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        field_names, omit_names = get_sparse_field_names(request)
+        if (field_names is None and not omit_names) or not hasattr(view, 'get_serializer_class'):
+            return queryset
+        serializer_class = view.get_serializer_class()
+        if serializer_class is None or not issubclass(serializer_class, SparseFieldsMixin) or getattr(
+                getattr(serializer_class, 'Meta', None), 'model', None) is not queryset.model:
+            return queryset
+        serializer = serializer_class(context=view.get_serializer_context())
+        required_field_names = serializer.get_required_model_fields()
+        if required_field_names is None:
+            return queryset
+        prefetch_lookups = queryset._prefetch_related_lookups
+        kept_lookups = [lookup for lookup in prefetch_lookups if getattr(
+            lookup, 'prefetch_through', lookup).split('__')[0] in required_field_names]
+        if len(kept_lookups) != len(prefetch_lookups):
+            queryset = queryset.prefetch_related(None).prefetch_related(*kept_lookups)
+        annotations = queryset.query.annotations
+        deferred_field_names = [field.name for field in queryset.model._meta.concrete_fields if not (
+                field.primary_key or field.is_relation or field.name in required_field_names or
+                field.name in annotations)]
+        return queryset.defer(*deferred_field_names) if deferred_field_names else queryset
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': FIELDS_QUERY_PARAM,
+                'required': False,
+                'in': 'query',
+                'description': '只返回指定的字段, 多个字段用英文逗号分隔',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': OMIT_QUERY_PARAM,
+                'required': False,
+                'in': 'query',
+                'description': '不返回指定的字段, 多个字段用英文逗号分隔',
+                'schema': {'type': 'string'},
+            },
+        ]
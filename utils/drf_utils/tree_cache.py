@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# @File    : tree_cache.py
+# @Software: PyCharm
+# @Description: 树形数据接口的版本化缓存: 进程内缓存 + redis缓存, 数据变化时重新生成版本号使缓存失效
+import hashlib
+import uuid
+
+from django.core.cache import cache
+
+from sugar.settings import TREE_CACHE_TIMEOUT
+
+# 进程内缓存的最大数据条数(不同过滤条件), 超出后清空重建
+TREE_LOCAL_CACHE_MAX_SIZE = 256
+
+# 进程内缓存 {(tree, 过滤条件签名): (version, payload)}
+_local_tree_payloads = {}
+
+
+def get_tree_version_cache_key(tree: str):
+    return f'tree:version:{tree}'
+
+
+def get_tree_version(tree: str):
+    """
+    获取树形数据的版本号, 版本号不存在(被淘汰或redis重启)时生成新的随机版本号, 避免旧版本号下的缓存重新生效
+    """
+    cache_key = get_tree_version_cache_key(tree)
+    version = cache.get(cache_key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(cache_key, version, None):
+            version = cache.get(cache_key) or version
+    return version
+
+
+def bump_tree_version(tree: str):
+    """
+    重新生成树形数据的版本号, 使该树形数据所有过滤条件下的缓存失效
+    @param tree: 树形数据类型, e.g. system.organization
+    """
+    cache.set(get_tree_version_cache_key(tree), uuid.uuid4().hex, None)
+    for key in [key for key in _local_tree_payloads if key[0] == tree]:
+        _local_tree_payloads.pop(key, None)
+
+
+def get_filter_signature(request):
+    """
+    根据查询参数(过滤条件、fields/omit等)生成签名, 参数顺序不影响签名
+    """
+    query_params = sorted((key, tuple(values)) for key, values in request.query_params.lists())
+    return hashlib.md5(repr(query_params).encode('utf-8')).hexdigest()
+
+
+def get_cached_tree_payload(tree: str, request, build_payload):
+    """
+    获取树形数据接口的响应数据, 依次查找进程内缓存、redis缓存, 都未命中时调用build_payload()生成
+    @param tree: 树形数据类型, e.g. system.organization
+    @param request: 请求对象, 不同的查询参数分别缓存
+    @param build_payload: 生成响应数据的函数
+    """
+    version = get_tree_version(tree)
+    signature = get_filter_signature(request)
+    local_data = _local_tree_payloads.get((tree, signature))
+    if local_data and local_data[0] == version:
+        return local_data[1]
+    cache_key = f'tree:payload:{tree}:{version}:{signature}'
+    payload = cache.get(cache_key)
+    if payload is None:
+        payload = build_payload()
+        cache.set(cache_key, payload, TREE_CACHE_TIMEOUT)
+    if len(_local_tree_payloads) >= TREE_LOCAL_CACHE_MAX_SIZE:
+        _local_tree_payloads.clear()
+    _local_tree_payloads[(tree, signature)] = (version, payload)
+    return payload
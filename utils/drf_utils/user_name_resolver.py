@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+# @File    : user_name_resolver.py
+# @Software: PyCharm
+# @Description: 批量解析 username -> 用户姓名, 供序列化器中的 *_name 字段使用
+import time
+
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
+from rest_framework import serializers
+
+from sugar.settings import USER_NAME_CACHE_TIMEOUT
+
+# 进程内缓存 {username: (name, expire_at)}, USER_NAME_CACHE_TIMEOUT为0时不启用
+_process_user_names = {}
+
+
+def clear_process_user_name(username: str):
+    _process_user_names.pop(username, None)
+
+
+class UserNameResolver:
+    """
+    用户姓名解析器: 一次查询批量加载多个username对应的姓名, 在同一个请求内复用
+    """
+
+    def __init__(self):
+        self.user_names = {}
+
+    def prefetch(self, usernames):
+        """
+        批量加载尚未解析过的username
+        @param usernames: username集合
+        """
+        missing_usernames = {username for username in usernames if username and username not in self.user_names}
+        if not missing_usernames:
+            return
+        now = time.monotonic()
+        if USER_NAME_CACHE_TIMEOUT:
+            for username in list(missing_usernames):
+                cache_data = _process_user_names.get(username)
+                if cache_data and cache_data[1] > now:
+                    self.user_names[username] = cache_data[0]
+                    missing_usernames.discard(username)
+            if not missing_usernames:
+                return
+        user_names = dict(get_user_model().objects.filter(username__in=missing_usernames).values_list(
+            'username', 'name'))
+        for username in missing_usernames:
+            # 用户不存在时姓名为None, 同样记录下来避免重复查询
+            self.user_names[username] = user_names.get(username)
+            if USER_NAME_CACHE_TIMEOUT and username in user_names:
+                _process_user_names[username] = (user_names.get(username), now + USER_NAME_CACHE_TIMEOUT)
+
+    def has(self, username: str):
+        return username in self.user_names
+
+    def get_name(self, username: str):
+        if not username:
+            return None
+        if username not in self.user_names:
+            self.prefetch({username})
+        return self.user_names.get(username)
+
+
+def get_user_name_resolver(context: dict):
+    """
+    获取请求级别的用户姓名解析器, 没有request时绑定在序列化器的context上
+    """
+    request = context.get('request')
+    holder = getattr(request, '_request', request)
+    if holder is None:
+        return context.setdefault('user_name_resolver', UserNameResolver())
+    resolver = getattr(holder, 'user_name_resolver', None)
+    if resolver is None:
+        resolver = UserNameResolver()
+        setattr(holder, 'user_name_resolver', resolver)
+    return resolver
+
+
+@extend_schema_field(OpenApiTypes.STR)
+class UserNameField(serializers.ReadOnlyField):
+    """
+    根据source指定的username字段返回用户姓名, e.g. owner_name = UserNameField(source='owner')
+    只按username字段解析(与values()快速序列化一致), 不读取用户外键(e.g. owner_user), 两者不一致时以username字段为准
+    序列化列表数据时, 第一次取值就把当前页所有数据中的username一次性加载出来
+    """
+
+    def to_representation(self, value):
+        resolver = get_user_name_resolver(self.context)
+        if value and not resolver.has(value):
+            resolver.prefetch(self.get_page_usernames() | {value})
+        return resolver.get_name(value)
+
+    def get_page_usernames(self):
+        """
+        收集当前页(ListSerializer.instance)所有数据中, 所有UserNameField对应的username
+        """
+        serializer = self.parent
+        list_serializer = getattr(serializer, 'parent', None)
+        if not isinstance(list_serializer, serializers.ListSerializer):
+            return set()
+        instances = list_serializer.instance
+        # 只处理已经加载到内存中的数据, 避免再次查询数据库
+        if isinstance(instances, QuerySet):
+            if instances._result_cache is None:
+                return set()
+        elif not isinstance(instances, (list, tuple)):
+            return set()
+        user_name_fields = [field for field in serializer.fields.values() if isinstance(field, UserNameField)]
+        usernames = set()
+        for instance in instances:
+            for field in user_name_fields:
+                try:
+                    username = field.get_attribute(instance)
+                except (AttributeError, KeyError):
+                    continue
+                if isinstance(username, str):
+                    usernames.add(username)
+        return usernames
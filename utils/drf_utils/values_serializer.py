@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+# @File    : values_serializer.py
+# @Software: PyCharm
+# @Description: 只读列表接口的快速序列化: 把序列化器类编译成基于queryset.values()的扁平投影, 不再实例化模型对象
+from collections import defaultdict
+from functools import lru_cache
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import QuerySet
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from utils.drf_utils.sparse_fields import SparseFieldsMixin
+from utils.drf_utils.user_name_resolver import UserNameField, get_user_name_resolver
+
+# DB返回值与序列化结果一致, 无需转换的字段类型
+IDENTITY_FIELD_CLASSES = (serializers.CharField, serializers.IntegerField, serializers.JSONField,
+                          serializers.ReadOnlyField)
+# 嵌套序列化器及依赖request生成链接的字段无法编译为投影
+UNSUPPORTED_FIELD_CLASSES = (serializers.BaseSerializer, serializers.FileField, serializers.HyperlinkedRelatedField)
+
+
+class ValuesRow(dict):
+    """
+    values()查询出的一行数据, 支持按属性取值, 供SerializerMethodField对应的get_xxx()方法使用
+    注意: 外键字段的值为主键而非模型对象
+    """
+
+    def __getattr__(self, item):
+        try:
+            return self[item]
+        except KeyError:
+            raise AttributeError(item)
+
+
+def format_datetime_column(field: serializers.DateTimeField, values: list, context: dict):
+    """
+    批量格式化一列datetime数据, 与DateTimeField.to_representation()的结果一致
+    '%Y-%m-%d %H:%M:%S'格式使用isoformat()代替strftime(), 速度更快
+    """
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format != '%Y-%m-%d %H:%M:%S':
+        return [field.to_representation(value) if value else None for value in values]
+    results = []
+    for value in values:
+        if not value:
+            results.append(None)
+        elif isinstance(value, str):
+            results.append(value)
+        else:
+            value = field.enforce_timezone(value)
+            # strftime('%Y')不会对小于1000的年份补零, 与isoformat()不同
+            results.append(value.strftime(output_format) if value.year < 1000 else value.replace(
+                tzinfo=None).isoformat(' ', 'seconds'))
+    return results
+
+
+class ValuesProjection:
+    """
+    由序列化器类编译得到的扁平投影
+    1.普通字段、外键主键字段、'a.b'形式的跨表字段直接映射为values()中的查询路径
+    2.DateTimeField按列批量格式化, UserNameField按列批量解析用户姓名
+    3.多对多主键字段按当前页数据的ID额外一次查询
+    4.SerializerMethodField调用序列化器的get_xxx()方法, 参数为ValuesRow
+    """
+
+    def __init__(self, serializer_class, field_names: tuple = None):
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model
+        self.pk_name = self.model._meta.pk.name
+        self.value_paths = [self.pk_name]
+        self.columns = []
+        self.many_to_many_columns = []
+        self.method_columns = []
+        for field in serializer_class()._readable_fields:
+            if field_names is None or field.field_name in field_names:
+                self.compile_field(field)
+
+    def add_value_path(self, path):
+        if path not in self.value_paths:
+            self.value_paths.append(path)
+        return path
+
+    def compile_field(self, field):
+        if isinstance(field, serializers.SerializerMethodField):
+            # get_xxx()方法依赖的字段, 未声明时查询所有字段
+            sources = getattr(self.serializer_class, 'sparse_method_field_sources', {}).get(field.field_name)
+            if sources is None:
+                sources = [model_field.name for model_field in self.model._meta.concrete_fields]
+            for source in sources:
+                self.add_value_path(source)
+            self.method_columns.append((field.field_name, field.method_name or f'get_{field.field_name}'))
+            self.columns.append((field.field_name, None, None))
+            return
+        if isinstance(field, serializers.ManyRelatedField):
+            if not isinstance(field.child_relation, serializers.PrimaryKeyRelatedField) or \
+                    field.child_relation.pk_field is not None:
+                raise ImproperlyConfigured(f'{self.serializer_class.__name__}.{field.field_name}: '
+                                           f'多对多字段只支持PrimaryKeyRelatedField')
+            self.many_to_many_columns.append((field.field_name, self.model._meta.get_field(field.source)))
+            self.columns.append((field.field_name, None, None))
+            return
+        if isinstance(field, UNSUPPORTED_FIELD_CLASSES) or field.source == '*':
+            raise ImproperlyConfigured(f'{self.serializer_class.__name__}.{field.field_name}: '
+                                       f'不支持嵌套序列化器、文件、超链接及source="*"的字段')
+        path = self.add_value_path('__'.join(field.source_attrs))
+        if isinstance(field, serializers.DateTimeField):
+            converter = format_datetime_column
+        elif isinstance(field, UserNameField):
+            converter = self.resolve_user_name_column
+        elif isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+            converter = None
+        elif type(field) in IDENTITY_FIELD_CLASSES:
+            converter = None
+        else:
+            converter = self.convert_column
+        self.columns.append((field.field_name, path, converter and (field, converter)))
+
+    @staticmethod
+    def convert_column(field, values: list, context: dict):
+        return [None if value is None else field.to_representation(value) for value in values]
+
+    @staticmethod
+    def resolve_user_name_column(field, values: list, context: dict):
+        resolver = get_user_name_resolver(context)
+        resolver.prefetch({value for value in values if value})
+        return [None if value is None else resolver.get_name(value) for value in values]
+
+    def get_values_queryset(self, queryset: QuerySet):
+        """
+        把queryset转换为只查询投影所需字段的values() queryset, 排序字段一并查询(游标分页需要)
+        """
+        value_paths = list(self.value_paths)
+        for item in queryset.query.order_by:
+            if isinstance(item, str) and item.lstrip('-') not in ('pk', '?') and item.lstrip('-') not in value_paths:
+                value_paths.append(item.lstrip('-'))
+        return queryset.prefetch_related(None).values(*value_paths)
+
+    def get_many_to_many_column(self, m2m_field, ids: list):
+        """
+        一次查询当前页所有数据的多对多主键, 排序与relationship.all()一致
+        """
+        related_ids = defaultdict(list)
+        lookup = m2m_field.related_query_name()
+        for obj_id, related_id in m2m_field.related_model._default_manager.filter(
+                **{f'{lookup}__in': ids}).values_list(lookup, 'pk'):
+            related_ids[obj_id].append(related_id)
+        return [related_ids.get(obj_id, []) for obj_id in ids]
+
+    def serialize(self, rows, context: dict = None):
+        """
+        序列化values()查询出的数据, 结果与 serializer_class(rows_instances, many=True).data 一致
+        """
+        context = context if context is not None else {}
+        rows = list(rows)
+        if not rows:
+            return []
+        ids = [row[self.pk_name] for row in rows]
+        many_to_many_data = {field_name: self.get_many_to_many_column(m2m_field, ids)
+                             for field_name, m2m_field in self.many_to_many_columns}
+        method_data = {}
+        if self.method_columns:
+            serializer = self.serializer_class(context=context)
+            value_rows = [ValuesRow(row) for row in rows]
+            for field_name, method_name in self.method_columns:
+                method = getattr(serializer, method_name)
+                method_data[field_name] = [method(row) for row in value_rows]
+        keys = []
+        columns = []
+        for field_name, path, converter in self.columns:
+            keys.append(field_name)
+            if path is None:
+                columns.append(many_to_many_data[field_name] if field_name in many_to_many_data else method_data[
+                    field_name])
+                continue
+            values = [row[path] for row in rows]
+            if converter is not None:
+                field, convert = converter
+                values = convert(field, values, context)
+            columns.append(values)
+        return [dict(zip(keys, values)) for values in zip(*columns)]
+
+
+@lru_cache(maxsize=256)
+def compile_values_projection(serializer_class, field_names: tuple = None):
+    """
+    编译并缓存序列化器类对应的投影
+    @param serializer_class: 序列化器类
+    @param field_names: 只编译其中的字段(稀疏字段集), 为None时编译所有字段
+    """
+    return ValuesProjection(serializer_class, field_names)
+
+
+class ValuesListModelMixin:
+    """
+    为ViewSet的只读列表接口启用values()快速序列化, 需在values_serializer_actions中显式声明启用的action
+    e.g. class DeviceViewSet(ValuesListModelMixin, ModelViewSet): values_serializer_actions = ['list']
+    """
+    values_serializer_actions = []
+
+    def list(self, request, *args, **kwargs):
+        if self.action not in self.values_serializer_actions:
+            return super().list(request, *args, **kwargs)
+        return self.get_values_list_response(self.filter_queryset(self.get_queryset()))
+
+    def get_values_list_response(self, queryset):
+        """
+        分页并使用投影序列化queryset, 返回与ListModelMixin.list()相同格式的响应
+        """
+        serializer_class = self.get_serializer_class()
+        field_names = None
+        if issubclass(serializer_class, SparseFieldsMixin):
+            # 按fields/omit参数裁剪后的字段编译投影
+            field_names = tuple(serializer_class(context=self.get_serializer_context()).fields.keys())
+        projection = compile_values_projection(serializer_class, field_names)
+        queryset = projection.get_values_queryset(queryset)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(projection.serialize(page, self.get_serializer_context()))
+        return Response(projection.serialize(queryset, self.get_serializer_context()))